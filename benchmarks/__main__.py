@@ -0,0 +1,145 @@
+"""
+Throughput benchmarks.
+
+Run with ``python -m benchmarks``; see ``--help`` for the options. Results
+are written as JSON, named after the current commit, so that two commits
+can be compared with ``--compare``.
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict
+
+from loguru import logger
+
+from .suite import Result, bench_extract_ids, bench_parse, bench_pipeline, bench_save
+
+BENCHMARKS = ("parse", "extract_ids", "save", "pipeline")
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def _commit() -> str:
+    """Short hash of the checked out commit, marked if there are changes."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{commit}-dirty" if dirty else commit
+
+
+async def run_benchmarks(args: argparse.Namespace) -> Dict[str, Result]:
+    """Run the selected benchmarks."""
+    selected = args.only or BENCHMARKS
+    results: Dict[str, Result] = {}
+    with tempfile.TemporaryDirectory() as directory:
+        if "parse" in selected:
+            results.update(bench_parse(args.pages, args.repeat))
+        if "extract_ids" in selected:
+            results.update(await bench_extract_ids(args.rows, args.repeat))
+        if "save" in selected:
+            results.update(await bench_save(args.schools, Path(directory)))
+        if "pipeline" in selected:
+            results.update(
+                await bench_pipeline(
+                    args.schools, args.latency, args.workers, Path(directory)
+                )
+            )
+    return results
+
+
+def compare(previous: Dict[str, Any], current: Dict[str, Any]) -> None:
+    """Print the change of every throughput metric between two result files."""
+    print(f"{previous['commit']} -> {current['commit']}")
+    for name, result in current["benchmarks"].items():
+        old = previous["benchmarks"].get(name, {})
+        for metric, value in result.items():
+            if not metric.endswith("_per_sec") or not old.get(metric):
+                continue
+            change = (value / old[metric] - 1) * 100
+            print(
+                f"  {name}.{metric}: {old[metric]:.1f} -> {value:.1f} "
+                f"({change:+.1f}%)"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Scraper throughput benchmarks")
+    parser.add_argument(
+        "--only", nargs="+", choices=BENCHMARKS, help="Benchmarks to run (all)"
+    )
+    parser.add_argument(
+        "--pages", type=int, default=200, help="Details pages to parse (200)"
+    )
+    parser.add_argument(
+        "--rows", type=int, default=30000, help="Rows of the list page (30000)"
+    )
+    parser.add_argument(
+        "--schools",
+        type=int,
+        default=1000,
+        help="Schools to save and to run through the pipeline (1000)",
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.05,
+        help="Seconds the fake site takes to answer (0.05)",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=2, help="Parser processes in the pipeline (2)"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Runs of each timing, best kept (3)"
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        help="JSON file for the results (benchmarks/results/<commit>.json)",
+    )
+    parser.add_argument(
+        "--compare", type=Path, help="Earlier results to compare against"
+    )
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    commit = _commit()
+    results = {
+        "commit": commit,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "benchmarks": asyncio.run(run_benchmarks(args)),
+    }
+
+    output = args.output or RESULTS_DIR / f"{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(json.dumps(results["benchmarks"], indent=2))
+    print(f"Results written to {output}")
+
+    if args.compare:
+        compare(json.loads(args.compare.read_text()), results)
+
+
+if __name__ == "__main__":
+    main()
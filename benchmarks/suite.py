@@ -0,0 +1,166 @@
+import time
+import uuid
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, List
+
+from config.config import FakeSiteConfig, config
+from src.database import operations
+from src.database.operations import DatabaseManager
+from src.fake_site.pages import details_page, list_page, synthetic_schools
+from src.fake_site.server import FakeSite
+from src.managers import job_ledger, school_manager
+from src.managers.school_manager import SchoolManager
+from src.parsers.backends import PARSER_BACKENDS, parse_details
+from src.scrapers.list_scraper import ListScraper
+from src.scrapers.rate_limiter import rate_limiter
+from src.scrapers.session_pool import session_pool
+
+# Results of one benchmark: metric name to value
+Result = Dict[str, Any]
+
+
+def school_ids(count: int) -> List[str]:
+    """IDs of count synthetic schools."""
+    return [school.id for school in synthetic_schools(count)]
+
+
+def _best_of(repeat: int, function: Callable[[], Any]) -> float:
+    """Shortest run time of function, in seconds."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+@asynccontextmanager
+async def temp_database(directory: Path) -> AsyncIterator[DatabaseManager]:
+    """Point the global database at a new, empty SQLite file."""
+    previous_url = config.database.url
+    config.database.url = f"sqlite:///{directory / f'{uuid.uuid4().hex}.db'}"
+    database = DatabaseManager()
+    config.database.url = previous_url
+
+    modules = (operations, school_manager, job_ledger)
+    previous_dbs = [getattr(module, "db") for module in modules]
+    for module in modules:
+        setattr(module, "db", database)
+    try:
+        await database.create_tables()
+        yield database
+    finally:
+        for module, previous_db in zip(modules, previous_dbs):
+            setattr(module, "db", previous_db)
+        await database.engine.dispose()
+
+
+def bench_parse(pages: int, repeat: int) -> Dict[str, Result]:
+    """Details pages parsed per second, by parser backend."""
+    html_pages = [details_page(school_id) for school_id in school_ids(pages)]
+    results = {}
+    for backend in PARSER_BACKENDS:
+        seconds = _best_of(
+            repeat, lambda: [parse_details(html, backend) for html in html_pages]
+        )
+        results[f"parse.{backend}"] = {
+            "pages": pages,
+            "seconds": seconds,
+            "pages_per_sec": pages / seconds,
+        }
+    return results
+
+
+async def bench_extract_ids(rows: int, repeat: int) -> Dict[str, Result]:
+    """Search result rows turned into school IDs per second."""
+    html = list_page(synthetic_schools(rows))
+    scraper = ListScraper()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        extracted = await scraper._extract_school_ids(html)
+        timings.append(time.perf_counter() - started)
+        if len(extracted) != rows:
+            raise RuntimeError(f"Extracted {len(extracted)} of {rows} school IDs")
+    seconds = min(timings)
+    return {
+        "extract_school_ids": {
+            "rows": rows,
+            "page_bytes": len(html.encode()),
+            "seconds": seconds,
+            "rows_per_sec": rows / seconds,
+        }
+    }
+
+
+async def bench_save(schools: int, directory: Path) -> Dict[str, Result]:
+    """Schools saved per second, one by one and in bulk."""
+    records = [
+        parse_details(details_page(school_id), "lxml")
+        for school_id in school_ids(schools)
+    ]
+
+    async with temp_database(directory) as database:
+        started = time.perf_counter()
+        for record in records:
+            await database.save_school(dict(record))
+        one_by_one = time.perf_counter() - started
+
+    async with temp_database(directory) as database:
+        started = time.perf_counter()
+        await database.save_schools_bulk([dict(record) for record in records])
+        bulk = time.perf_counter() - started
+
+    return {
+        "save.save_school": {
+            "rows": schools,
+            "seconds": one_by_one,
+            "rows_per_sec": schools / one_by_one,
+        },
+        "save.bulk": {
+            "rows": schools,
+            "seconds": bulk,
+            "rows_per_sec": schools / bulk,
+            "speedup": one_by_one / bulk,
+        },
+    }
+
+
+async def bench_pipeline(
+    schools: int, latency: float, workers: int, directory: Path
+) -> Dict[str, Result]:
+    """Schools listed, fetched, parsed and saved per second, end to end."""
+    site = FakeSite(FakeSiteConfig(schools=schools, port=0, latency=latency))
+    rate = rate_limiter.rate
+    rate_limiter.rate = 0  # Measure the pipeline, not the configured pace
+    try:
+        async with site, temp_database(directory):
+            manager = SchoolManager()
+            manager.scraper.base_url = f"{site.url}/detalleCentro"
+            lister = ListScraper()
+            lister.base_url = f"{site.url}/buscarCentros"
+
+            started = time.perf_counter()
+            async with session_pool:
+                await manager.process_all_schools(
+                    lister.iter_school_ids(), workers=workers
+                )
+            seconds = time.perf_counter() - started
+            saved = len(await manager.get_existing_school_ids())
+    finally:
+        rate_limiter.rate = rate
+
+    if saved != schools:
+        raise RuntimeError(f"Saved {saved} of {schools} schools")
+    return {
+        "pipeline": {
+            "schools": schools,
+            "latency": latency,
+            "workers": workers,
+            "requests": site.stats["requests"],
+            "final_concurrency": manager.scraper.limiter.metrics()["limit"],
+            "seconds": seconds,
+            "schools_per_sec": schools / seconds,
+        }
+    }
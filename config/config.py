@@ -1,7 +1,7 @@
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, Optional, Union
+from typing import Dict, List, Optional, Union
 
 import yaml
 
@@ -13,16 +13,31 @@ class APIConfig:
     default_payload: Dict[str, str]
 
 
+@dataclass
+class SQLiteProfileConfig:
+    journal_mode: str
+    synchronous: str
+    cache_size: int
+    mmap_size: int
+    temp_store: str
+    busy_timeout: int
+
+
 @dataclass
 class DatabaseConfig:
     url: str
     echo: bool = False
+    bulk_batch_size: int = 500
+    sqlite_profile: Optional[str] = None
+    sqlite_profiles: Dict[str, SQLiteProfileConfig] = field(default_factory=dict)
 
 
 @dataclass
 class StorageConfig:
     raw_data_path: Path
     processed_data_path: Path
+    store_raw_pages: bool = True
+    raw_page_ttl: int = 0
 
 
 @dataclass
@@ -31,6 +46,71 @@ class ScrapingConfig:
     request_timeout: int
     retry_attempts: int
     retry_delay: int
+    retry_max_delay: float = 60
+    circuit_failure_threshold: int = 10
+    circuit_reset_timeout: float = 30
+    rate_limit: float = 0
+    rate_limit_burst: int = 1
+    rate_limit_state_file: Optional[Path] = None
+    min_concurrent_requests: int = 1
+    initial_concurrent_requests: int = 5
+    latency_threshold: float = 10
+    list_sharding: str = "none"
+    list_naturalezas: List[str] = field(default_factory=lambda: ["1", "2"])
+    connection_limit: int = 100
+    connection_limit_per_host: int = 20
+    keepalive_timeout: float = 30
+    dns_cache_ttl: int = 300
+    compression: bool = True
+    fetch_window: int = 100
+    fetch_batch_size: int = 1000
+    session_per_batch: bool = False
+
+
+@dataclass
+class PipelineConfig:
+    queue_size: int
+    parse_workers: int
+    parse_chunk_size: int
+    parser_backend: str = "lxml"
+
+
+@dataclass
+class FakeSiteConfig:
+    schools: int = 100
+    host: str = "127.0.0.1"
+    port: int = 8080
+    latency: float = 0
+    latency_distribution: str = "constant"
+    error_rate: float = 0
+    throttle_rate: float = 0
+    max_concurrent: int = 0
+    retry_after: float = 1
+    drip_rate: float = 0
+    drip_chunk_size: int = 1024
+    drip_interval: float = 0.05
+    seed: int = 0
+
+
+@dataclass
+class MetricsConfig:
+    host: str = "127.0.0.1"
+    port: Optional[int] = None
+    summary_path: Optional[Path] = None
+
+
+@dataclass
+class ProfilingConfig:
+    output_path: Path = Path("data/profiles")
+    interval: float = 0.005
+    delay: float = 0
+    duration: float = 0
+
+
+@dataclass
+class ExportConfig:
+    batch_size: int = 10000
+    compression: str = "zstd"
 
 
 @dataclass
@@ -38,6 +118,7 @@ class LoggingConfig:
     level: str
     format: str
     file: Path
+    structured: bool = False
 
 
 class Config:
@@ -61,11 +142,21 @@ class Config:
         self.database = DatabaseConfig(
             url=db_url,
             echo=config_data["database"].get("echo", False),
+            bulk_batch_size=config_data["database"].get("bulk_batch_size", 500),
+            sqlite_profile=config_data["database"].get("sqlite_profile"),
+            sqlite_profiles={
+                name: SQLiteProfileConfig(**profile)
+                for name, profile in config_data["database"]
+                .get("sqlite_profiles", {})
+                .items()
+            },
         )
 
         self.storage = StorageConfig(
             raw_data_path=Path(config_data["storage"]["raw_data_path"]),
             processed_data_path=Path(config_data["storage"]["processed_data_path"]),
+            store_raw_pages=config_data["storage"].get("store_raw_pages", True),
+            raw_page_ttl=config_data["storage"].get("raw_page_ttl", 0),
         )
 
         self.scraping = ScrapingConfig(
@@ -73,12 +164,78 @@ class Config:
             request_timeout=config_data["scraping"]["request_timeout"],
             retry_attempts=config_data["scraping"]["retry_attempts"],
             retry_delay=config_data["scraping"]["retry_delay"],
+            retry_max_delay=config_data["scraping"].get("retry_max_delay", 60),
+            circuit_failure_threshold=config_data["scraping"].get(
+                "circuit_failure_threshold", 10
+            ),
+            circuit_reset_timeout=config_data["scraping"].get(
+                "circuit_reset_timeout", 30
+            ),
+            rate_limit=config_data["scraping"].get("rate_limit", 0),
+            rate_limit_burst=config_data["scraping"].get("rate_limit_burst", 1),
+            rate_limit_state_file=(
+                Path(config_data["scraping"]["rate_limit_state_file"])
+                if config_data["scraping"].get("rate_limit_state_file")
+                else None
+            ),
+            min_concurrent_requests=config_data["scraping"].get(
+                "min_concurrent_requests", 1
+            ),
+            initial_concurrent_requests=config_data["scraping"].get(
+                "initial_concurrent_requests", 5
+            ),
+            latency_threshold=config_data["scraping"].get("latency_threshold", 10),
+            list_sharding=config_data["scraping"].get("list_sharding", "none"),
+            list_naturalezas=config_data["scraping"].get(
+                "list_naturalezas", ["1", "2"]
+            ),
+            connection_limit=config_data["scraping"].get("connection_limit", 100),
+            connection_limit_per_host=config_data["scraping"].get(
+                "connection_limit_per_host", 20
+            ),
+            keepalive_timeout=config_data["scraping"].get("keepalive_timeout", 30),
+            dns_cache_ttl=config_data["scraping"].get("dns_cache_ttl", 300),
+            compression=config_data["scraping"].get("compression", True),
+            fetch_window=config_data["scraping"].get("fetch_window", 100),
+            fetch_batch_size=config_data["scraping"].get("fetch_batch_size", 1000),
+            session_per_batch=config_data["scraping"].get("session_per_batch", False),
+        )
+
+        self.pipeline = PipelineConfig(
+            queue_size=config_data["pipeline"]["queue_size"],
+            parse_workers=config_data["pipeline"]["parse_workers"],
+            parse_chunk_size=config_data["pipeline"]["parse_chunk_size"],
+            parser_backend=config_data["pipeline"].get("parser_backend", "lxml"),
+        )
+
+        self.fake_site = FakeSiteConfig(**config_data.get("fake_site", {}))
+
+        metrics_data = config_data.get("metrics", {})
+        self.metrics = MetricsConfig(
+            host=metrics_data.get("host", "127.0.0.1"),
+            port=metrics_data.get("port"),
+            summary_path=(
+                Path(metrics_data["summary_path"])
+                if metrics_data.get("summary_path")
+                else None
+            ),
         )
 
+        profiling_data = config_data.get("profiling", {})
+        self.profiling = ProfilingConfig(
+            output_path=Path(profiling_data.get("output_path", "data/profiles")),
+            interval=profiling_data.get("interval", 0.005),
+            delay=profiling_data.get("delay", 0),
+            duration=profiling_data.get("duration", 0),
+        )
+
+        self.export = ExportConfig(**config_data.get("export", {}))
+
         self.logging = LoggingConfig(
             level=config_data["logging"]["level"],
             format=config_data["logging"]["format"],
             file=Path(config_data["logging"]["file"]),
+            structured=config_data["logging"].get("structured", False),
         )
 
     def ensure_directories(self) -> None:
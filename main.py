@@ -1,12 +1,24 @@
 import argparse
 import asyncio
-import sys
+from contextlib import AsyncExitStack, nullcontext
+from typing import AsyncIterator
 
 from loguru import logger
 
+from config.config import config
+from src.database.export import EXPORT_FORMATS, DatasetExporter
 from src.database.operations import db
+from src.fake_site.server import FakeSite
+from src.managers.job_ledger import JobLedger
 from src.managers.school_manager import SchoolManager
-from src.scrapers.list_scraper import ListScraper
+from src.parsers.list_parser import SchoolListing
+from src.scrapers.list_scraper import SHARDING_MODES, ListScraper
+from src.scrapers.rate_limiter import rate_limiter
+from src.scrapers.session_pool import session_pool
+from src.utils.logging_config import configure_logging
+from src.utils.metrics import MetricsServer, metrics
+from src.utils.page_store import RawPageStore
+from src.utils.profiling import Profiler
 
 
 async def reset_database():
@@ -18,74 +30,224 @@ async def reset_database():
     logger.info("Database reset complete!")
 
 
-async def scrape_school_list() -> list[str]:
-    """Scrape the list of school IDs."""
-    scraper = ListScraper()
-    school_ids = await scraper.run()
-    logger.info(f"Found {len(school_ids)} schools")
-    return school_ids
+async def migrate_database():
+    """Bring an existing database up to the current schema."""
+    logger.info("Migrating database...")
+    await db.migrate()
+    logger.info("Database migration complete!")
 
 
-async def main():
-    logger.remove()  # Remove default handler
-    logger.add(
-        sys.stderr,
-        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green>"
-        "| <level>{level: <8}</level> "
-        "| <cyan>{name}</cyan>:<cyan>{function}</cyan>:"
-        "<cyan>{line}</cyan> - <level>{message}</level>",
-        level="INFO",
-        colorize=True,
+async def export_dataset(format: str) -> None:
+    """Write the schools dataset as columnar files."""
+    await migrate_database()
+    counts = await DatasetExporter(format=format).export()
+    logger.success(
+        f"Exported {counts['schools']} schools to {config.storage.processed_data_path}"
     )
 
+
+def use_site(url: str) -> None:
+    """Point the scrapers at another site serving the ministry's pages."""
+    url = url.rstrip("/")
+    config.api.base_url = f"{url}/buscarCentros"
+    config.api.details_url = f"{url}/detalleCentro"
+    logger.info(f"Scraping {url} instead of the ministry website")
+
+
+def scrape_school_list(sharding: str) -> AsyncIterator[SchoolListing]:
+    """Stream schools from the search results as they are downloaded."""
+    return ListScraper(sharding=sharding).iter_listings()
+
+
+async def main():
     parser = argparse.ArgumentParser(description="School data scraper and parser")
     parser.add_argument(
         "--action",
         type=str,
         required=True,
-        choices=["scrape", "reset-db"],
+        choices=["scrape", "reset-db", "migrate", "reparse", "export"],
         help="Action to perform: 'scrape' to process schools, "
-        "'reset-db' to reset the database",
+        "'reset-db' to reset the database, "
+        "'migrate' to upgrade an existing database to the current schema, "
+        "'reparse' to rebuild the database from stored pages, "
+        "'export' to write the dataset as columnar files",
     )
     parser.add_argument(
-        "--workers", type=int, default=10, help="Number of worker processes for parsing"
+        "--format",
+        type=str,
+        choices=sorted(EXPORT_FORMATS),
+        default="parquet",
+        help="File format for 'export': one file per table under "
+        "storage.processed_data_path (defaults to parquet)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Number of worker processes for parsing (defaults to "
+        "pipeline.parse_workers, or all CPU cores for 'reparse')",
     )
     parser.add_argument(
         "--force-update",
         action="store_true",
-        help="Force update of all schools, even if they exist in database",
+        help="Force update of all schools, even if their listing is unchanged",
+    )
+    parser.add_argument(
+        "--db-profile",
+        type=str,
+        choices=sorted(config.database.sqlite_profiles),
+        help="SQLite performance profile to use (defaults to 'bulk_load' for "
+        "'reparse' and --force-update, and to database.sqlite_profile otherwise)",
+    )
+    resume = parser.add_mutually_exclusive_group()
+    resume.add_argument(
+        "--resume",
+        metavar="RUN_ID",
+        help="Continue an interrupted scrape run where it stopped",
+    )
+    resume.add_argument(
+        "--retry-failed",
+        metavar="RUN_ID",
+        help="Process again only the schools that failed in a scrape run",
+    )
+    parser.add_argument(
+        "--list-sharding",
+        type=str,
+        choices=SHARDING_MODES,
+        default=config.scraping.list_sharding,
+        help="Split the school list search into parallel requests per province, "
+        "or per province and type of school (defaults to scraping.list_sharding)",
+    )
+    site = parser.add_mutually_exclusive_group()
+    site.add_argument(
+        "--fake-site",
+        action="store_true",
+        help="Scrape a local fake of the ministry website, with the latency "
+        "and faults configured in fake_site, e.g. to tune concurrency",
+    )
+    site.add_argument(
+        "--site-url",
+        metavar="URL",
+        help="Scrape another site serving buscarCentros and detalleCentro under "
+        "URL, e.g. a fake site started with 'python -m src.fake_site'",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=config.metrics.port,
+        help="Port serving the run's metrics at /metrics while scraping "
+        "(defaults to metrics.port; 0 picks a free port)",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Sample the call stacks of the event loop and the parser processes, "
+        "and time asyncio tasks, writing a report under profiling.output_path",
+    )
+    parser.add_argument(
+        "--structured-logs",
+        action="store_true",
+        default=config.logging.structured,
+        help="Also write logs as JSON lines to logging.file (defaults to "
+        "logging.structured)",
     )
     parser.add_argument("--debug", action="store_true", help="Enable debug logging")
     args = parser.parse_args()
 
-    # Update logging level if debug flag is set
-    if args.debug:
-        logger.remove()  # Remove previous handler
-        logger.add(
-            sys.stderr,
-            format="<green>{time:YYYY-MM-DD HH:mm:ss}</green>"
-            "| <level>{level: <8}</level> "
-            "| <cyan>{name}</cyan>:<cyan>{function}</cyan>:"
-            "<cyan>{line}</cyan> - <level>{message}</level>",
-            level="DEBUG",
-            colorize=True,
-        )
-        logger.debug("Debug logging enabled")
+    configure_logging(
+        "DEBUG" if args.debug else config.logging.level,
+        json_file=config.logging.file if args.structured_logs else None,
+    )
+    logger.debug("Debug logging enabled")
+
+    db_profile = args.db_profile
+    if db_profile is None and (args.force_update or args.action == "reparse"):
+        db_profile = "bulk_load"
+    if db_profile in config.database.sqlite_profiles:
+        await db.use_sqlite_profile(db_profile)
+        logger.info(f"Using SQLite profile '{db_profile}'")
+
+    with Profiler.from_config() if args.profile else nullcontext():
+        await run_action(args)
 
+
+async def run_action(args: argparse.Namespace) -> None:
+    """Perform the action selected on the command line."""
     if args.action == "reset-db":
         await reset_database()
         return
 
+    if args.action == "migrate":
+        await migrate_database()
+        return
+
+    if args.action == "reparse":
+        await SchoolManager(page_store=RawPageStore()).reparse_stored_pages(
+            workers=args.workers
+        )
+        return
+
+    if args.action == "export":
+        await export_dataset(args.format)
+        return
+
     # For scraping action
-    manager = SchoolManager()
-    school_ids = await scrape_school_list()
-
-    if args.force_update:
-        # Update all schools regardless of whether they exist
-        await manager.process_all_schools(school_ids, batch_size=args.workers)
-    else:
-        # Only process new schools (default behavior)
-        await manager.process_new_schools(school_ids, batch_size=args.workers)
+    async with AsyncExitStack() as stack:
+        real_site = not (args.fake_site or args.site_url)
+        if args.fake_site:
+            fake_site = await stack.enter_async_context(FakeSite())
+            use_site(fake_site.url)
+        elif args.site_url:
+            use_site(args.site_url)
+        if args.metrics_port is not None:
+            await stack.enter_async_context(
+                MetricsServer(metrics, config.metrics.host, args.metrics_port)
+            )
+        await scrape(args, real_site)
+
+
+async def scrape(args: argparse.Namespace, real_site: bool) -> None:
+    """Scrape schools and store them, as selected by the command line."""
+    metrics.reset()  # Before the scrapers register their gauges
+    await migrate_database()
+    # Pages of other sites must not be reused for the real one
+    store_pages = config.storage.store_raw_pages and real_site
+    page_store = RawPageStore() if store_pages else None
+    manager = SchoolManager(page_store=page_store)
+    # Detail fetches start while the school list is still downloading
+    listings = scrape_school_list(args.list_sharding)
+
+    # Update all schools with --force-update, otherwise only new schools and
+    # schools whose row in the search results changed (default behavior).
+    # Both scrapers share the pool's keep-alive connections for the whole run.
+    run_id = args.resume or args.retry_failed
+    try:
+        async with session_pool:
+            if run_id:
+                await manager.resume_run(
+                    run_id,
+                    listings,
+                    failed_only=bool(args.retry_failed),
+                    workers=args.workers,
+                )
+            else:
+                ledger = await JobLedger.start(force=args.force_update)
+                run_id = ledger.run_id
+                await manager.process_changed_schools(
+                    listings,
+                    force=args.force_update,
+                    workers=args.workers,
+                    ledger=ledger,
+                )
+                await ledger.finish()
+        if page_store is not None:
+            # Delete the previous versions of pages that changed
+            await page_store.aprune()
+    finally:
+        # Let the next run continue at the same pace
+        if real_site:
+            rate_limiter.save()
+        if run_id and config.metrics.summary_path is not None:
+            metrics.write_summary(config.metrics.summary_path / f"{run_id}.json")
 
 
 if __name__ == "__main__":
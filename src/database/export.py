@@ -0,0 +1,210 @@
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, cast
+
+from loguru import logger
+from sqlalchemy import Boolean, Column, Integer, Row, Table
+
+from config.config import config
+
+from .models import ImpartedStudy, School, school_studies
+from .operations import DatabaseManager, db
+
+# File extension of each export format
+EXPORT_FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+# Tables exported, as one file each
+EXPORT_TABLES: Sequence[Table] = (
+    cast(Table, School.__table__),
+    cast(Table, ImpartedStudy.__table__),
+    school_studies,
+)
+
+# Columns with few distinct values, stored once per batch (Parquet) or once
+# per file (Arrow) and referenced by index in each row
+DICTIONARY_COLUMNS = {
+    "autonomous_community",
+    "province",
+    "country",
+    "region",
+    "sub_region",
+    "municipality",
+    "nature",
+    "is_concerted",
+    "center_type",
+    "generic_name",
+    "degree",
+    "family",
+    "modality",
+}
+
+# Text columns holding JSON lists of strings, exported as lists
+LIST_COLUMNS = {"services"}
+
+# Codecs the Arrow IPC format supports; Parquet supports more
+ARROW_COMPRESSIONS = {"lz4", "zstd"}
+
+
+def _import_pyarrow() -> Any:
+    """Import pyarrow, which only exports need."""
+    try:
+        import pyarrow  # type: ignore[import-untyped]
+        import pyarrow.compute  # type: ignore[import-untyped]
+        import pyarrow.ipc  # type: ignore[import-untyped]
+        import pyarrow.parquet  # type: ignore[import-untyped]  # noqa: F401
+    except ImportError as e:
+        raise ImportError(
+            "Exporting the dataset requires pyarrow: pip install pyarrow"
+        ) from e
+    return pyarrow
+
+
+class DatasetExporter:
+    """
+    Exports the schools dataset as columnar files, one per table, for
+    analytics tools that scan whole tables (pandas, polars, DuckDB, Spark).
+
+    Tables are streamed from the database in batches of rows, each written
+    as a record batch, so memory use does not grow with the dataset.
+    Categorical text columns are dictionary-encoded, and the JSON services
+    column becomes a list column.
+    """
+
+    def __init__(
+        self,
+        format: str = "parquet",
+        output_path: Optional[Path] = None,
+        batch_size: Optional[int] = None,
+        compression: Optional[str] = None,
+        database: Optional[DatabaseManager] = None,
+    ):
+        """
+        Args:
+            format: One of EXPORT_FORMATS
+            output_path: Directory for the files (storage.processed_data_path)
+            batch_size: Rows per record batch (export.batch_size)
+            compression: Codec, or "none" (export.compression)
+            database: Database to export (the global one)
+        """
+        if format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {format}")
+        self.pa = _import_pyarrow()
+        self.format = format
+        self.output_path = output_path or config.storage.processed_data_path
+        self.batch_size = batch_size or config.export.batch_size
+        self.compression = compression or config.export.compression
+        self.database = database or db
+
+    async def export(self) -> Dict[str, int]:
+        """
+        Export every table in EXPORT_TABLES.
+
+        Returns:
+            Number of rows exported, by table name
+        """
+        self.output_path.mkdir(parents=True, exist_ok=True)
+        counts = {}
+        for table in EXPORT_TABLES:
+            counts[table.name] = await self.export_table(table)
+        return counts
+
+    async def export_table(self, table: Table) -> int:
+        """
+        Export one table to <output_path>/<table name><extension>.
+
+        The file is written under a temporary name and moved into place when
+        complete, so readers never see a partial export.
+
+        Returns:
+            Number of rows exported
+        """
+        path = self.output_path / f"{table.name}{EXPORT_FORMATS[self.format]}"
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        schema = self.schema(table)
+        # An Arrow file holds one dictionary per column for all its batches
+        dictionaries = await self.dictionaries(table) if self.format == "arrow" else {}
+        rows = 0
+        try:
+            with self._writer(tmp_path, schema) as writer:
+                async for batch in self.database.stream_rows(table, self.batch_size):
+                    writer.write_batch(self.record_batch(schema, batch, dictionaries))
+                    rows += len(batch)
+            os.replace(tmp_path, path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+        logger.info(f"Exported {rows} rows of {table.name} to {path}")
+        return rows
+
+    async def dictionaries(self, table: Table) -> Dict[str, Any]:
+        """The distinct values of each dictionary column of a table."""
+        return {
+            column.name: self.pa.array(
+                await self.database.distinct_values(column), self.pa.string()
+            )
+            for column in table.columns
+            if column.name in DICTIONARY_COLUMNS
+        }
+
+    def schema(self, table: Table) -> Any:
+        """The Arrow schema of a table."""
+        return self.pa.schema(
+            [
+                self.pa.field(column.name, self._type(column), column.nullable)
+                for column in table.columns
+            ]
+        )
+
+    def _type(self, column: Column) -> Any:
+        pa = self.pa
+        if column.name in LIST_COLUMNS:
+            return pa.list_(pa.string())
+        if column.name in DICTIONARY_COLUMNS:
+            return pa.dictionary(pa.int32(), pa.string())
+        if isinstance(column.type, Boolean):
+            return pa.bool_()
+        if isinstance(column.type, Integer):
+            return pa.int64()
+        return pa.string()
+
+    def record_batch(
+        self,
+        schema: Any,
+        rows: Sequence[Row[Any]],
+        dictionaries: Optional[Dict[str, Any]] = None,
+    ) -> Any:
+        """
+        Convert rows of a table to a record batch with the given schema.
+
+        Dictionary columns are encoded against the given dictionaries, or
+        against the distinct values of the batch for those missing.
+        """
+        dictionaries = dictionaries or {}
+        columns: List[Any] = []
+        for index, field in enumerate(schema):
+            values = [row[index] for row in rows]
+            if field.name in LIST_COLUMNS:
+                values = [json.loads(value) if value else None for value in values]
+            if field.name in dictionaries:
+                dictionary = dictionaries[field.name]
+                indices = self.pa.compute.index_in(
+                    self.pa.array(values, self.pa.string()), value_set=dictionary
+                )
+                array = self.pa.DictionaryArray.from_arrays(indices, dictionary)
+            elif self.pa.types.is_dictionary(field.type):
+                array = self.pa.array(values, self.pa.string()).dictionary_encode()
+            else:
+                array = self.pa.array(values, field.type)
+            columns.append(array)
+        return self.pa.RecordBatch.from_arrays(columns, schema=schema)
+
+    def _writer(self, path: Path, schema: Any) -> Any:
+        compression = None if self.compression == "none" else self.compression
+        if self.format == "parquet":
+            return self.pa.parquet.ParquetWriter(
+                path, schema, compression=compression or "none"
+            )
+        if compression not in ARROW_COMPRESSIONS:
+            compression = None
+        options = self.pa.ipc.IpcWriteOptions(compression=compression)
+        return self.pa.ipc.new_file(path, schema, options=options)
@@ -2,7 +2,7 @@ import json
 from datetime import datetime, timezone
 from typing import List, Optional
 
-from sqlalchemy import Column, ForeignKey, Integer, String, Table, Text
+from sqlalchemy import Boolean, Column, ForeignKey, Index, Integer, String, Table, Text
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -16,6 +16,8 @@ school_studies = Table(
     Base.metadata,
     Column("school_id", String, ForeignKey("schools.id"), primary_key=True),
     Column("study_id", Integer, ForeignKey("imparted_studies.id"), primary_key=True),
+    # The primary key covers lookups by school; this covers lookups by study
+    Index("ix_school_studies_study_id", "study_id"),
 )
 
 
@@ -44,14 +46,14 @@ class School(Base, TimestampMixin):
 
     # Location info
     autonomous_community: Mapped[Optional[str]] = mapped_column(String)
-    province: Mapped[Optional[str]] = mapped_column(String)
+    province: Mapped[Optional[str]] = mapped_column(String, index=True)
     country: Mapped[Optional[str]] = mapped_column(String)
     region: Mapped[Optional[str]] = mapped_column(String)
     sub_region: Mapped[Optional[str]] = mapped_column(String)
-    municipality: Mapped[Optional[str]] = mapped_column(String)
+    municipality: Mapped[Optional[str]] = mapped_column(String, index=True)
     locality: Mapped[Optional[str]] = mapped_column(String)
     address: Mapped[Optional[str]] = mapped_column(String)
-    postal_code: Mapped[Optional[str]] = mapped_column(String)
+    postal_code: Mapped[Optional[str]] = mapped_column(String, index=True)
 
     # Classification info
     nature: Mapped[Optional[str]] = mapped_column(String)  # Public, Private, etc.
@@ -59,6 +61,9 @@ class School(Base, TimestampMixin):
     center_type: Mapped[Optional[str]] = mapped_column(String)
     generic_name: Mapped[Optional[str]] = mapped_column(String)
 
+    # Hash of the school's row in the search results, see SchoolListing
+    listing_fingerprint: Mapped[Optional[str]] = mapped_column(String)
+
     # Additional info stored as JSON arrays
     _services: Mapped[Optional[str]] = mapped_column(
         "services", Text
@@ -85,6 +90,17 @@ class School(Base, TimestampMixin):
 
 class ImpartedStudy(Base, TimestampMixin):
     __tablename__ = "imparted_studies"
+    __table_args__ = (
+        # A study is identified by all four columns, see StudyKey
+        Index(
+            "uq_imparted_studies_identity",
+            "name",
+            "degree",
+            "family",
+            "modality",
+            unique=True,
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
 
@@ -104,3 +120,33 @@ class ImpartedStudy(Base, TimestampMixin):
     schools: Mapped[List["School"]] = relationship(
         "School", secondary=school_studies, back_populates="imparted_studies"
     )
+
+
+class ScrapeRun(Base, TimestampMixin):
+    """A scrape run, which can be resumed from its job ledger."""
+
+    __tablename__ = "scrape_runs"
+
+    id: Mapped[str] = mapped_column(String, primary_key=True)
+    # Whether every listed school was processed, not only changed ones
+    force: Mapped[bool] = mapped_column(Boolean, default=False)
+    # Whether every school of the search results has been added as a job
+    listed: Mapped[bool] = mapped_column(Boolean, default=False)
+    status: Mapped[str] = mapped_column(String, default="running")  # or "finished"
+
+
+class ScrapeJob(Base, TimestampMixin):
+    """A school processed by a scrape run, and how far it got."""
+
+    __tablename__ = "scrape_jobs"
+    __table_args__ = (Index("ix_scrape_jobs_run_status", "run_id", "status"),)
+
+    run_id: Mapped[str] = mapped_column(
+        String, ForeignKey("scrape_runs.id"), primary_key=True
+    )
+    school_id: Mapped[str] = mapped_column(String, primary_key=True)
+    # pending, fetched, parsed, saved or failed
+    status: Mapped[str] = mapped_column(String, default="pending")
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    last_error: Mapped[Optional[str]] = mapped_column(Text)
+    listing_fingerprint: Mapped[Optional[str]] = mapped_column(String)
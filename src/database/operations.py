@@ -1,26 +1,154 @@
+import json
+import os
+import uuid
 from contextlib import asynccontextmanager
-from typing import Any, AsyncGenerator, Dict, Optional
+from dataclasses import asdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import (
+    Any,
+    AsyncGenerator,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    cast,
+)
 
-from sqlalchemy import select
+from sqlalchemy import (
+    Column,
+    Connection,
+    Row,
+    Table,
+    bindparam,
+    delete,
+    event,
+    func,
+    insert,
+    inspect,
+    select,
+    text,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from config.config import config
 
-from .models import Base, ImpartedStudy, School
+from ..utils.metrics import FAST_BUCKETS, metrics
+from .models import Base, ImpartedStudy, School, ScrapeJob, ScrapeRun, school_studies
+from .study_cache import StudyCache, StudyKey
+
+# Keep row-value IN lists well under SQLite's bound parameter limit
+STUDY_LOOKUP_CHUNK = 200
+
+# Studies sharing a key with a lower ID, which older versions could create
+DUPLICATE_STUDIES = """
+    SELECT id, keep_id FROM (
+        SELECT id, MIN(id) OVER (PARTITION BY name, degree, family, modality)
+            AS keep_id
+        FROM imparted_studies
+    ) WHERE id != keep_id
+"""
+
+
+SAVE_SECONDS = metrics.histogram(
+    "db_save_seconds",
+    "Time to save one school (save_school) or one bulk batch (bulk)",
+    ("operation",),
+    buckets=FAST_BUCKETS,
+)
+COMMIT_SECONDS = metrics.histogram(
+    "db_commit_seconds", "Time to commit a transaction", buckets=FAST_BUCKETS
+)
+SCHOOLS_SAVED = metrics.counter("db_schools_saved_total", "Schools saved")
+
+
+# Files SQLite keeps next to a database, only valid with that very file
+SQLITE_SIDECARS = ("-wal", "-shm", "-journal")
+
+# Tables copied as they are into a database rebuilt from stored pages
+LEDGER_TABLES = (ScrapeRun.__tablename__, ScrapeJob.__tablename__)
+
+# Links of schools kept from the old database, to studies of the rebuilt one
+COPY_KEPT_STUDIES = """
+    INSERT INTO imparted_studies (name, degree, family, modality,
+                                  created_at, updated_at)
+    SELECT DISTINCT s.name, s.degree, s.family, s.modality,
+                    s.created_at, s.updated_at
+    FROM old.imparted_studies s
+    JOIN old.school_studies l ON l.study_id = s.id
+    WHERE l.school_id IN (SELECT id FROM temp.kept_schools)
+      AND NOT EXISTS (
+        SELECT 1 FROM imparted_studies t
+        WHERE t.name IS s.name AND t.degree IS s.degree
+          AND t.family IS s.family AND t.modality IS s.modality
+      )
+"""
+COPY_KEPT_LINKS = """
+    INSERT OR IGNORE INTO school_studies (school_id, study_id)
+    SELECT l.school_id, MIN(t.id)
+    FROM old.school_studies l
+    JOIN old.imparted_studies s ON s.id = l.study_id
+    JOIN imparted_studies t
+      ON t.name IS s.name AND t.degree IS s.degree
+     AND t.family IS s.family AND t.modality IS s.modality
+    WHERE l.school_id IN (SELECT id FROM temp.kept_schools)
+    GROUP BY l.school_id, s.id
+"""
 
 
 class DatabaseManager:
-    def __init__(self):
+    def __init__(self, url: Optional[str] = None):
         # Convert SQLite URL to async
-        db_url = config.database.url.replace("sqlite:///", "sqlite+aiosqlite:///")
+        url = url or config.database.url
+        db_url = url.replace("sqlite:///", "sqlite+aiosqlite:///")
 
         self.engine = create_async_engine(db_url, echo=config.database.echo)
+        self.sqlite_profile: Optional[str] = None
+        self._set_sqlite_profile(config.database.sqlite_profile)
+        event.listen(self.engine.sync_engine, "connect", self._apply_sqlite_profile)
         self.SessionLocal = async_sessionmaker(
             autocommit=False,
             autoflush=False,
             bind=self.engine,
             expire_on_commit=False,
         )
+        self.study_cache = StudyCache()
+
+    def _set_sqlite_profile(self, name: Optional[str]) -> None:
+        if name is not None and name not in config.database.sqlite_profiles:
+            raise ValueError(f"Unknown SQLite profile: {name}")
+        self.sqlite_profile = name
+
+    def _apply_sqlite_profile(
+        self, dbapi_connection: Any, connection_record: Any
+    ) -> None:
+        """Apply the active profile's PRAGMAs to a new connection."""
+        if self.sqlite_profile is None:
+            return
+        profile = config.database.sqlite_profiles[self.sqlite_profile]
+        cursor = dbapi_connection.cursor()
+        for pragma, value in asdict(profile).items():
+            cursor.execute(f"PRAGMA {pragma} = {value}")
+        cursor.close()
+
+    async def use_sqlite_profile(self, name: str) -> None:
+        """
+        Switch to another SQLite performance profile.
+
+        Pooled connections are closed so that every new connection is
+        configured with the profile's PRAGMAs.
+
+        Args:
+            name: Profile name from database.sqlite_profiles in config.yml
+        """
+        self._set_sqlite_profile(name)
+        await self.engine.dispose()
 
     async def create_tables(self) -> None:
         """Create all database tables."""
@@ -31,6 +159,149 @@ class DatabaseManager:
         """Drop all database tables."""
         async with self.engine.begin() as conn:
             await conn.run_sync(Base.metadata.drop_all)
+        self.study_cache.clear()
+
+    @property
+    def path(self) -> Path:
+        """The file of the SQLite database."""
+        database = self.engine.url.database
+        if not database or database == ":memory:":
+            raise RuntimeError("Not a file-backed SQLite database")
+        return Path(database)
+
+    async def create_rebuild(self) -> "DatabaseManager":
+        """
+        Create an empty database next to this one, to be filled and then
+        swapped in with finish_rebuild, so that this one stays intact until
+        the rebuild is complete.
+        """
+        path = self.path.with_name(f"{self.path.name}.rebuild")
+        _remove_sqlite_files(path)  # Left over by an interrupted rebuild
+        rebuilt = DatabaseManager(f"sqlite:///{path}")
+        rebuilt._set_sqlite_profile(self.sqlite_profile)
+        await rebuilt.create_tables()
+        return rebuilt
+
+    async def discard_rebuild(self, rebuilt: "DatabaseManager") -> None:
+        """Delete a rebuilt database instead of swapping it in."""
+        await rebuilt.engine.dispose()
+        _remove_sqlite_files(rebuilt.path)
+
+    async def finish_rebuild(self, rebuilt: "DatabaseManager") -> int:
+        """
+        Replace this database with a rebuilt one.
+
+        The scrape ledger, and the schools the rebuilt database lacks (with
+        their studies), are copied over first, so nothing the rebuild could
+        not recreate is lost.
+
+        Returns:
+            Number of schools kept from this database
+        """
+        async with rebuilt.engine.connect() as conn:
+            # Attached outside a transaction; the engine is disposed after
+            await conn.exec_driver_sql("ATTACH DATABASE ? AS old", (str(self.path),))
+            kept = await conn.run_sync(self._copy_into_rebuild)
+            await conn.commit()
+            # Leave every rebuilt row in the main file, the only one moved
+            await conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+
+        await rebuilt.engine.dispose()
+        await self.engine.dispose()
+        # Sidecars of the old file must not be applied to the rebuilt one;
+        # the main file is swapped atomically, so there is always a database
+        _remove_sqlite_sidecars(self.path)
+        os.replace(rebuilt.path, self.path)
+        _remove_sqlite_sidecars(rebuilt.path)
+        self.study_cache.clear()  # Study IDs differ in the rebuilt database
+        return kept
+
+    @staticmethod
+    def _copy_into_rebuild(conn: Connection) -> int:
+        """Copy what a rebuild cannot recreate from the attached old database."""
+        for name in LEDGER_TABLES:
+            columns = ", ".join(Base.metadata.tables[name].columns.keys())
+            conn.exec_driver_sql(
+                f"INSERT INTO {name} ({columns}) SELECT {columns} FROM old.{name}"
+            )
+
+        conn.exec_driver_sql(
+            "CREATE TEMP TABLE kept_schools AS SELECT id FROM old.schools "
+            "WHERE id NOT IN (SELECT id FROM main.schools)"
+        )
+        columns = ", ".join(School.__table__.columns.keys())
+        conn.exec_driver_sql(
+            f"INSERT INTO schools ({columns}) SELECT {columns} FROM old.schools "
+            "WHERE id IN (SELECT id FROM temp.kept_schools)"
+        )
+        conn.exec_driver_sql(COPY_KEPT_STUDIES)
+        conn.exec_driver_sql(COPY_KEPT_LINKS)
+        kept = conn.exec_driver_sql("SELECT COUNT(*) FROM temp.kept_schools").scalar()
+        conn.exec_driver_sql("DROP TABLE temp.kept_schools")
+        return kept or 0
+
+    async def migrate(self) -> None:
+        """
+        Bring an existing database up to the current schema.
+
+        Creates missing tables, columns and indexes. Duplicate imparted
+        studies are merged into the oldest copy first, so the unique study
+        index can be built on databases written before it existed.
+        """
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.run_sync(self._add_missing_columns)
+            await conn.run_sync(self._merge_duplicate_studies)
+            await conn.run_sync(self._create_indexes)
+        self.study_cache.clear()
+
+    @staticmethod
+    def _add_missing_columns(conn: Connection) -> None:
+        """Add the nullable columns that tables created by older versions lack."""
+        inspector = inspect(conn)
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                column_type = column.type.compile(dialect=conn.dialect)
+                conn.execute(
+                    text(
+                        f'ALTER TABLE "{table.name}" '
+                        f'ADD COLUMN "{column.name}" {column_type}'
+                    )
+                )
+
+    @staticmethod
+    def _merge_duplicate_studies(conn: Connection) -> None:
+        """Point links at the oldest copy of each study and drop the others."""
+        conn.execute(
+            text(
+                "INSERT OR IGNORE INTO school_studies (school_id, study_id) "
+                "SELECT school_studies.school_id, duplicates.keep_id "
+                f"FROM school_studies JOIN ({DUPLICATE_STUDIES}) AS duplicates "
+                "ON school_studies.study_id = duplicates.id"
+            )
+        )
+        conn.execute(
+            text(
+                "DELETE FROM school_studies WHERE study_id IN "
+                f"(SELECT id FROM ({DUPLICATE_STUDIES}))"
+            )
+        )
+        conn.execute(
+            text(
+                "DELETE FROM imparted_studies WHERE id IN "
+                f"(SELECT id FROM ({DUPLICATE_STUDIES}))"
+            )
+        )
+
+    @staticmethod
+    def _create_indexes(conn: Connection) -> None:
+        """Create the indexes that tables created by older versions lack."""
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
 
     @asynccontextmanager
     async def get_session(self) -> AsyncGenerator[AsyncSession, None]:
@@ -38,7 +309,8 @@ class DatabaseManager:
         session = self.SessionLocal()
         try:
             yield session
-            await session.commit()
+            with COMMIT_SECONDS.time():
+                await session.commit()
         except Exception:
             await session.rollback()
             raise
@@ -49,6 +321,14 @@ class DatabaseManager:
         self, school_data: Dict[str, Any], session: Optional[AsyncSession] = None
     ) -> School:
         """Save or update a school and its imparted studies."""
+        with SAVE_SECONDS.time(operation="save_school"):
+            school = await self._save_school(school_data, session)
+        SCHOOLS_SAVED.inc()
+        return school
+
+    async def _save_school(
+        self, school_data: Dict[str, Any], session: Optional[AsyncSession]
+    ) -> School:
         should_close_session = False
         if session is None:
             session = self.SessionLocal()
@@ -68,32 +348,34 @@ class DatabaseManager:
                 for key, value in school_data.items():
                     setattr(school, key, value)
 
-            # Handle imparted studies
-            # First, clear existing relationships
-            school.imparted_studies = []
-
-            # Then add or update studies
-            for study_data in imparted_studies_data:
-                # Try to find an existing study with the same attributes
-                stmt = select(ImpartedStudy).where(
-                    ImpartedStudy.name == study_data["name"],
-                    ImpartedStudy.degree == study_data["degree"],
-                    ImpartedStudy.family == study_data["family"],
-                    ImpartedStudy.modality == study_data["modality"],
+            # Replace the school's study links, creating the studies that don't
+            # exist. Study IDs come from the cache, so the links are written
+            # directly instead of loading every ImpartedStudy.
+            study_keys = list(
+                dict.fromkeys(
+                    self._study_key(study_data) for study_data in imparted_studies_data
                 )
-                result = await session.execute(stmt)
-                study = result.scalars().first()
-
-                if study is None:
-                    # Create new study if it doesn't exist
-                    study = ImpartedStudy(**study_data)
-                    session.add(study)
-
-                # Add the study to the school's imparted_studies
-                school.imparted_studies.append(study)
+            )
+            now = datetime.now(timezone.utc).isoformat()
+            study_ids = await self._resolve_study_ids(session, set(study_keys), now)
+            await session.flush()  # The school row must exist before its links
+            await session.execute(
+                delete(school_studies).where(school_studies.c.school_id == school_id)
+            )
+            if study_keys:
+                await session.execute(
+                    insert(school_studies),
+                    [
+                        {"school_id": school_id, "study_id": study_ids[key]}
+                        for key in study_keys
+                    ],
+                )
+            # Loaded again on access rather than left stale
+            session.expire(school, ["imparted_studies"])
 
             if should_close_session:
-                await session.commit()
+                with COMMIT_SECONDS.time():
+                    await session.commit()
             return school
 
         except Exception as e:
@@ -105,6 +387,332 @@ class DatabaseManager:
             if should_close_session:
                 await session.close()
 
+    async def save_schools_bulk(
+        self, schools_data: List[Dict[str, Any]], batch_size: Optional[int] = None
+    ) -> int:
+        """
+        Save or update many schools and their imparted studies.
+
+        Schools are upserted with ``INSERT ... ON CONFLICT DO UPDATE``, studies
+        are resolved with set-based queries and the school/study links are
+        replaced with a single multi-row insert. Each batch runs in its own
+        transaction.
+
+        Args:
+            schools_data: Parsed school dictionaries, as returned by the parser
+            batch_size: Number of schools per transaction (defaults to config)
+
+        Returns:
+            Number of schools saved
+        """
+        batch_size = batch_size or config.database.bulk_batch_size
+        saved = 0
+        for start in range(0, len(schools_data), batch_size):
+            batch = schools_data[start : start + batch_size]
+            with SAVE_SECONDS.time(operation="bulk"):
+                async with self.get_session() as session:
+                    batch_saved = await self._save_schools_batch(session, batch)
+            SCHOOLS_SAVED.inc(batch_saved)
+            saved += batch_saved
+        return saved
+
+    async def _save_schools_batch(
+        self, session: AsyncSession, schools_data: List[Dict[str, Any]]
+    ) -> int:
+        """Upsert one batch of schools and their study links in a session."""
+        now = datetime.now(timezone.utc).isoformat()
+
+        # Last occurrence wins if the same school appears twice in a batch
+        schools_by_id = {data["id"]: data for data in schools_data}
+        if not schools_by_id:
+            return 0
+
+        school_table = cast(Table, School.__table__)
+        school_rows = [self._school_row(data, now) for data in schools_by_id.values()]
+        upsert = sqlite_insert(school_table)
+        set_: Dict[str, Any] = {
+            column: upsert.excluded[column]
+            for column in school_rows[0]
+            if column not in ("id", "created_at")
+        }
+        # Records saved without a listing (e.g. new schools only) keep theirs
+        set_["listing_fingerprint"] = func.coalesce(
+            upsert.excluded.listing_fingerprint, school_table.c.listing_fingerprint
+        )
+        upsert = upsert.on_conflict_do_update(
+            index_elements=[school_table.c.id], set_=set_
+        )
+        await session.execute(upsert, school_rows)
+
+        study_keys = {
+            school_id: [
+                self._study_key(study) for study in data.get("imparted_studies", [])
+            ]
+            for school_id, data in schools_by_id.items()
+        }
+        study_ids = await self._resolve_study_ids(
+            session, {key for keys in study_keys.values() for key in keys}, now
+        )
+
+        await session.execute(
+            delete(school_studies).where(
+                school_studies.c.school_id.in_(list(schools_by_id))
+            )
+        )
+        links = {
+            (school_id, study_ids[key])
+            for school_id, keys in study_keys.items()
+            for key in keys
+        }
+        if links:
+            await session.execute(
+                insert(school_studies),
+                [
+                    {"school_id": school_id, "study_id": study_id}
+                    for school_id, study_id in sorted(links)
+                ],
+            )
+
+        return len(schools_by_id)
+
+    async def load_study_cache(self) -> None:
+        """Preload the imparted study cache from the database."""
+        async with self.get_session() as session:
+            await self.study_cache.load(session)
+
+    async def _resolve_study_ids(
+        self, session: AsyncSession, keys: Set[StudyKey], now: str
+    ) -> Dict[StudyKey, int]:
+        """Map study keys to IDs, inserting the studies that don't exist yet."""
+        if not self.study_cache.loaded:
+            await self.study_cache.load(session)
+
+        study_ids: Dict[StudyKey, int] = {}
+        unresolved: Set[StudyKey] = set()
+        for key in keys:
+            study_id = self.study_cache.get(key, session)
+            if study_id is None:
+                unresolved.add(key)
+            else:
+                study_ids[key] = study_id
+
+        if not unresolved:
+            return study_ids
+
+        # Another process may have added them since the cache was loaded
+        found = await self._find_study_ids(session, unresolved)
+        missing = unresolved - found.keys()
+        if missing:
+            # Another writer may insert the same study concurrently
+            await session.execute(
+                sqlite_insert(
+                    cast(Table, ImpartedStudy.__table__)
+                ).on_conflict_do_nothing(),
+                [
+                    {
+                        "name": name,
+                        "degree": degree,
+                        "family": family,
+                        "modality": modality,
+                        "created_at": now,
+                        "updated_at": now,
+                    }
+                    for name, degree, family, modality in sorted(missing)
+                ],
+            )
+            found.update(await self._find_study_ids(session, missing))
+
+        self.study_cache.add_pending(session, found)
+        study_ids.update(found)
+        return study_ids
+
+    async def _find_study_ids(
+        self, session: AsyncSession, keys: Set[StudyKey]
+    ) -> Dict[StudyKey, int]:
+        """Look up the IDs of existing studies by key."""
+        table = ImpartedStudy.__table__
+        key_columns = tuple_(
+            table.c.name, table.c.degree, table.c.family, table.c.modality
+        )
+        ordered_keys = sorted(keys)
+
+        study_ids: Dict[StudyKey, int] = {}
+        for start in range(0, len(ordered_keys), STUDY_LOOKUP_CHUNK):
+            chunk = ordered_keys[start : start + STUDY_LOOKUP_CHUNK]
+            result = await session.execute(
+                select(
+                    table.c.id,
+                    table.c.name,
+                    table.c.degree,
+                    table.c.family,
+                    table.c.modality,
+                ).where(key_columns.in_(chunk))
+            )
+            for study_id, *key in result:
+                study_ids.setdefault(tuple(key), study_id)  # type: ignore[arg-type]
+        return study_ids
+
+    @staticmethod
+    def _study_key(study_data: Dict[str, str]) -> StudyKey:
+        """Build the identity key of an imparted study."""
+        return (
+            study_data["name"],
+            study_data["degree"],
+            study_data["family"],
+            study_data["modality"],
+        )
+
+    @staticmethod
+    def _school_row(school_data: Dict[str, Any], now: str) -> Dict[str, Any]:
+        """Convert parsed school data into a row for the schools table."""
+        row = {
+            column.name: school_data.get(column.name)
+            for column in School.__table__.columns
+            if column.name not in ("services", "created_at", "updated_at")
+        }
+        services = school_data.get("services")
+        row["services"] = (
+            json.dumps(services, ensure_ascii=False) if services is not None else None
+        )
+        row["created_at"] = now
+        row["updated_at"] = now
+        return row
+
+    async def get_listing_fingerprints(self) -> Dict[str, Optional[str]]:
+        """Get the listing fingerprint of every stored school by ID."""
+        async with self.get_session() as session:
+            result = await session.execute(
+                select(School.id, School.listing_fingerprint)
+            )
+            return {school_id: fingerprint for school_id, fingerprint in result}
+
+    async def create_run(self, force: bool = False) -> str:
+        """Start a scrape run and return its ID."""
+        run_id = uuid.uuid4().hex[:12]
+        async with self.get_session() as session:
+            session.add(ScrapeRun(id=run_id, force=force))
+        return run_id
+
+    async def get_run(self, run_id: str) -> Optional[ScrapeRun]:
+        """Get a scrape run by its ID."""
+        async with self.get_session() as session:
+            return await session.get(ScrapeRun, run_id)
+
+    async def update_run(self, run_id: str, **values: Any) -> None:
+        """Update the columns of a scrape run."""
+        values["updated_at"] = datetime.now(timezone.utc).isoformat()
+        async with self.get_session() as session:
+            await session.execute(
+                update(ScrapeRun).where(ScrapeRun.id == run_id).values(**values)
+            )
+
+    async def save_jobs(
+        self,
+        run_id: str,
+        new_jobs: Dict[str, Optional[str]],
+        updates: Iterable[Dict[str, Any]],
+    ) -> None:
+        """
+        Record job ledger changes of a scrape run in a single transaction.
+
+        Args:
+            run_id: ID of the scrape run
+            new_jobs: Listing fingerprints of schools to add as pending jobs;
+                schools already in the run are left as they are
+            updates: Job changes, with ``school_id``, ``status``,
+                ``last_error`` and ``attempts`` (added to the current count)
+        """
+        now = datetime.now(timezone.utc).isoformat()
+        job_table = cast(Table, ScrapeJob.__table__)
+        # Bound parameter names must not clash with the updated columns
+        updates = [
+            {f"b_{key}": value for key, value in change.items()} for change in updates
+        ]
+
+        async with self.engine.begin() as conn:
+            if new_jobs:
+                await conn.execute(
+                    sqlite_insert(job_table).on_conflict_do_nothing(),
+                    [
+                        {
+                            "run_id": run_id,
+                            "school_id": school_id,
+                            "status": "pending",
+                            "attempts": 0,
+                            "listing_fingerprint": fingerprint,
+                            "created_at": now,
+                            "updated_at": now,
+                        }
+                        for school_id, fingerprint in new_jobs.items()
+                    ],
+                )
+            if updates:
+                await conn.execute(
+                    update(job_table)
+                    .where(
+                        job_table.c.run_id == run_id,
+                        job_table.c.school_id == bindparam("b_school_id"),
+                    )
+                    .values(
+                        status=bindparam("b_status"),
+                        last_error=bindparam("b_last_error"),
+                        attempts=job_table.c.attempts + bindparam("b_attempts"),
+                        updated_at=now,
+                    ),
+                    updates,
+                )
+
+    async def get_jobs(
+        self, run_id: str, statuses: Optional[Iterable[str]] = None
+    ) -> Dict[str, Optional[str]]:
+        """
+        Get the jobs of a scrape run, optionally only those in some statuses.
+
+        Returns:
+            Listing fingerprint of each job's school by school ID
+        """
+        query = select(ScrapeJob.school_id, ScrapeJob.listing_fingerprint).where(
+            ScrapeJob.run_id == run_id
+        )
+        if statuses is not None:
+            query = query.where(ScrapeJob.status.in_(list(statuses)))
+        async with self.get_session() as session:
+            result = await session.execute(query.order_by(ScrapeJob.school_id))
+            return {school_id: fingerprint for school_id, fingerprint in result}
+
+    async def count_jobs(self, run_id: str) -> Dict[str, int]:
+        """Count the jobs of a scrape run by status."""
+        async with self.get_session() as session:
+            result = await session.execute(
+                select(ScrapeJob.status, func.count())
+                .where(ScrapeJob.run_id == run_id)
+                .group_by(ScrapeJob.status)
+            )
+            return {status: count for status, count in result}
+
+    async def stream_rows(
+        self, table: Table, batch_size: int
+    ) -> AsyncIterator[Sequence[Row[Any]]]:
+        """
+        Stream all rows of a table in primary key order, in batches, without
+        loading the whole table into memory.
+
+        Args:
+            table: Table to read
+            batch_size: Rows per batch
+        """
+        query = select(table).order_by(*table.primary_key.columns)
+        async with self.engine.connect() as conn:
+            result = await conn.stream(query)
+            async for rows in result.partitions(batch_size):
+                yield rows
+
+    async def distinct_values(self, column: Column[Any]) -> List[Any]:
+        """The distinct non-null values of a column, in sorted order."""
+        query = select(column).where(column.is_not(None)).distinct().order_by(column)
+        async with self.engine.connect() as conn:
+            return list((await conn.execute(query)).scalars())
+
     async def get_school_by_id(self, school_id: str) -> Optional[School]:
         """Get a school by its ID."""
         async with self.get_session() as session:
@@ -120,12 +728,27 @@ class DatabaseManager:
         """Get all imparted studies for a school."""
         async with self.get_session() as session:
             result = await session.execute(
-                ImpartedStudy.__table__.select().where(
-                    ImpartedStudy.schools.any(School.id == school_id)
+                ImpartedStudy.__table__.select()
+                .join(
+                    school_studies,
+                    school_studies.c.study_id == ImpartedStudy.id,
                 )
+                .where(school_studies.c.school_id == school_id)
             )
             return result.scalars().all()
 
 
+def _remove_sqlite_files(path: Path) -> None:
+    """Delete an SQLite database file and its sidecar files."""
+    path.unlink(missing_ok=True)
+    _remove_sqlite_sidecars(path)
+
+
+def _remove_sqlite_sidecars(path: Path) -> None:
+    """Delete the sidecar files of an SQLite database."""
+    for suffix in SQLITE_SIDECARS:
+        Path(f"{path}{suffix}").unlink(missing_ok=True)
+
+
 # Global database manager instance
 db = DatabaseManager()
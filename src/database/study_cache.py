@@ -0,0 +1,87 @@
+import asyncio
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .models import ImpartedStudy
+
+# (name, degree, family, modality) identifying a distinct imparted study
+StudyKey = Tuple[str, str, str, str]
+
+
+class StudyCache:
+    """
+    In-memory map of imparted study keys to their database IDs.
+
+    The study catalogue is small and read far more often than it changes, so
+    it is loaded once and kept in memory. IDs of studies inserted by a
+    session are only published to the cache when that session commits, so a
+    rolled back transaction never leaves IDs behind that don't exist.
+    """
+
+    def __init__(self):
+        self._ids: Dict[StudyKey, int] = {}
+        self._lock = asyncio.Lock()
+        self.loaded = False
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    async def load(self, session: AsyncSession) -> None:
+        """Load every existing study, unless the cache is already loaded."""
+        async with self._lock:
+            if self.loaded:
+                return
+            result = await session.execute(
+                select(
+                    ImpartedStudy.id,
+                    ImpartedStudy.name,
+                    ImpartedStudy.degree,
+                    ImpartedStudy.family,
+                    ImpartedStudy.modality,
+                )
+            )
+            for study_id, *key in result:
+                self._ids.setdefault(tuple(key), study_id)  # type: ignore[arg-type]
+            self.loaded = True
+
+    def get(
+        self, key: StudyKey, session: Optional[AsyncSession] = None
+    ) -> Optional[int]:
+        """Get a study ID, including studies added but not yet committed by session."""
+        study_id = self._ids.get(key)
+        if study_id is None and session is not None:
+            study_id = session.info.get("pending_studies", {}).get(key)
+        return study_id
+
+    def add_pending(
+        self, session: AsyncSession, study_ids: Dict[StudyKey, int]
+    ) -> None:
+        """Record study IDs to publish once the session commits."""
+        session.info["study_cache"] = self
+        session.info.setdefault("pending_studies", {}).update(study_ids)
+
+    def update(self, study_ids: Dict[StudyKey, int]) -> None:
+        """Add committed study IDs to the cache."""
+        for key, study_id in study_ids.items():
+            self._ids.setdefault(key, study_id)
+
+    def clear(self) -> None:
+        """Forget all cached studies, e.g. after the tables are dropped."""
+        self._ids.clear()
+        self.loaded = False
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending_studies(session: Session) -> None:
+    cache = session.info.get("study_cache")
+    pending = session.info.pop("pending_studies", None)
+    if cache is not None and pending:
+        cache.update(pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_studies(session: Session) -> None:
+    session.info.pop("pending_studies", None)
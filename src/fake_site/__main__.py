@@ -0,0 +1,47 @@
+"""Serve the fake ministry website until interrupted: python -m src.fake_site"""
+
+import argparse
+import asyncio
+import dataclasses
+
+from loguru import logger
+
+from config.config import config
+
+from .server import LATENCY_DISTRIBUTIONS, FakeSite
+
+
+async def serve(site: FakeSite) -> None:
+    async with site:
+        logger.info(
+            f"Scrape it with: python main.py --action scrape --site-url {site.url}"
+        )
+        await asyncio.Event().wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Local fake of the ministry website (defaults from fake_site)"
+    )
+    parser.add_argument("--schools", type=int, help="Number of synthetic schools")
+    parser.add_argument("--port", type=int, help="Port to listen on (0: any)")
+    parser.add_argument("--latency", type=float, help="Median response time (s)")
+    parser.add_argument("--latency-distribution", choices=LATENCY_DISTRIBUTIONS)
+    parser.add_argument("--error-rate", type=float, help="Share of 500 responses")
+    parser.add_argument("--throttle-rate", type=float, help="Share of 429 responses")
+    parser.add_argument(
+        "--max-concurrent", type=int, help="Requests in flight before 429s (0: any)"
+    )
+    parser.add_argument("--drip-rate", type=float, help="Share of slow responses")
+    args = parser.parse_args()
+
+    overrides = {name: value for name, value in vars(args).items() if value is not None}
+    site = FakeSite(dataclasses.replace(config.fake_site, **overrides))
+    try:
+        asyncio.run(serve(site))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
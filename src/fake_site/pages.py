@@ -0,0 +1,70 @@
+from pathlib import Path
+from typing import List, NamedTuple
+
+from ..scrapers.list_scraper import PROVINCE_CODES
+
+# Pages recorded from the ministry website, shared with the tests
+TEMPLATES = Path(__file__).parents[2] / "tests" / "fixtures"
+
+# Province code 99 does not exist, so synthetic IDs never match real schools
+ID_PREFIX = "99"
+
+# Search result text for each naturaleza code
+NATURALEZAS = {"1": "Centro público", "2": "Centro privado"}
+
+_ID_FIELD = "<b>Código de centro:</b>&nbsp;&nbsp;<span>{}</span>"
+
+_LIST_ROW = """\t\t\t\t<tr>
+\t\t\t\t\t\t<td >Provincia {school.province}</td>
+\t\t\t\t\t\t<td >Localidad {school.locality}</td>
+\t\t\t\t\t\t<td >Colegio de Educación Infantil y Primaria</td>
+\t\t\t\t\t\t<td >Colegio {school.id}</td>
+\t\t\t\t\t\t<td >{school.id}</td>
+\t\t\t\t\t\t<td >{nature}</td>
+\t\t\t\t\t\t<td align="center">
+\t\t\t\t\t\t<a href="#" onclick="javascript:detalleCentro(&quot;{school.id}&quot;);">\
+<i class="fas fa-edit fa-lg align-middle" title="Detalle centro"></i></a>
+\t\t\t\t\t\t</td>
+\t\t\t\t</tr>
+"""
+
+
+class FakeSchool(NamedTuple):
+    id: str
+    province: str
+    naturaleza: str
+    locality: int
+
+
+def synthetic_schools(count: int) -> List[FakeSchool]:
+    """count synthetic schools, spread over every province and naturaleza."""
+    return [
+        FakeSchool(
+            id=f"{ID_PREFIX}{number:06d}",
+            province=PROVINCE_CODES[number % len(PROVINCE_CODES)],
+            naturaleza="2" if number % 3 == 0 else "1",
+            locality=number % 997,
+        )
+        for number in range(1, count + 1)
+    ]
+
+
+def details_page(school_id: str) -> str:
+    """Details page of a synthetic school."""
+    html = (TEMPLATES / "school.html").read_text(encoding="utf-8")
+    return html.replace(_ID_FIELD.format("123456"), _ID_FIELD.format(school_id))
+
+
+def list_page(schools: List[FakeSchool]) -> str:
+    """Search results page listing the given schools."""
+    html = (TEMPLATES / "schools.html").read_text(encoding="utf-8")
+    html = html.replace(
+        "<span>4</span> centros", f"<span>{len(schools)}</span> centros"
+    )
+    head, rest = html.split("<tbody>", 1)
+    tail = rest.split("</tbody>", 1)[1]
+    rows = "".join(
+        _LIST_ROW.format(school=school, nature=NATURALEZAS[school.naturaleza])
+        for school in schools
+    )
+    return f"{head}<tbody>\n{rows}\t\t\t</tbody>{tail}"
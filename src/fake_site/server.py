@@ -0,0 +1,165 @@
+import asyncio
+import math
+import random
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from aiohttp import web
+from loguru import logger
+
+from config.config import FakeSiteConfig, config
+
+from .pages import FakeSchool, details_page, list_page, synthetic_schools
+
+LATENCY_DISTRIBUTIONS = ("constant", "uniform", "exponential", "lognormal")
+
+# Spread of the lognormal latency; a few responses take several times the median
+LOGNORMAL_SIGMA = 0.75
+
+
+class FakeSite:
+    """
+    Local fake of the ministry website, for load tests without the real one.
+
+    Serves buscarCentros and detalleCentro under /centros for a set of
+    synthetic schools. Searches honour the province and naturaleza filters
+    used by list sharding. Every response is delayed by a random latency,
+    and a configurable share fails with a 500, is throttled with a 429 and
+    Retry-After, or is sent slowly a chunk at a time. Requests beyond
+    max_concurrent in flight are throttled too, like an overloaded server.
+    """
+
+    def __init__(self, settings: Optional[FakeSiteConfig] = None):
+        self.settings = settings or config.fake_site
+        if self.settings.latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(
+                f"Unknown latency distribution: {self.settings.latency_distribution}"
+            )
+        self.schools = synthetic_schools(self.settings.schools)
+        self.school_ids = {school.id for school in self.schools}
+        self.stats: Counter[str] = Counter()
+        self.in_flight = 0
+        self.url = ""
+        self._random = random.Random(self.settings.seed)
+        self._runner: Optional[web.AppRunner] = None
+        self._list_pages: Dict[Tuple[str, str], bytes] = {}
+        # Details pages only differ in the school ID
+        self._details_page = details_page("\0").encode().split(b"\0")
+
+    async def __aenter__(self) -> "FakeSite":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.stop()
+
+    async def start(self) -> None:
+        """Start serving; the base URL of the scrapers is then in self.url."""
+        app = web.Application()
+        app.router.add_post("/centros/buscarCentros", self._search)
+        app.router.add_post("/centros/detalleCentro", self._details)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.settings.host, self.settings.port)
+        await site.start()
+        host, port = self._runner.addresses[0][:2]
+        self.url = f"http://{host}:{port}/centros"
+        logger.info(
+            f"Fake site serving {len(self.schools)} schools at {self.url} "
+            f"({self.settings.latency}s {self.settings.latency_distribution} latency)"
+        )
+
+    async def stop(self) -> None:
+        """Stop serving."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+            logger.info(f"Fake site stopped: {self._summary()}")
+
+    def latency(self) -> float:
+        """Draw the delay of a response."""
+        median = self.settings.latency
+        if median <= 0:
+            return 0.0
+        distribution = self.settings.latency_distribution
+        if distribution == "uniform":
+            return self._random.uniform(0, 2 * median)
+        if distribution == "exponential":
+            return self._random.expovariate(math.log(2) / median)
+        if distribution == "lognormal":
+            return self._random.lognormvariate(math.log(median), LOGNORMAL_SIGMA)
+        return median
+
+    async def _search(self, request: web.Request) -> web.StreamResponse:
+        form = await request.post()
+        key = (str(form.get("comboprov", "00")), str(form.get("ssel_natur", "0")))
+        if key not in self._list_pages:
+            self._list_pages[key] = list_page(self._matching(*key)).encode()
+        return await self._respond(request, self._list_pages[key])
+
+    async def _details(self, request: web.Request) -> web.StreamResponse:
+        form = await request.post()
+        school_id = str(form.get("codCentro", ""))
+        if school_id not in self.school_ids:
+            self.stats["not_found"] += 1
+            return web.Response(status=404, text="Not Found")
+        return await self._respond(request, school_id.encode().join(self._details_page))
+
+    def _matching(self, province: str, naturaleza: str) -> List[FakeSchool]:
+        """Schools matching the filters of a search; 00 and 0 match all."""
+        return [
+            school
+            for school in self.schools
+            if province in ("00", school.province)
+            and naturaleza in ("0", school.naturaleza)
+        ]
+
+    async def _respond(self, request: web.Request, body: bytes) -> web.StreamResponse:
+        """Answer a request as the configured server would."""
+        self.stats["requests"] += 1
+        settings = self.settings
+        if settings.max_concurrent and self.in_flight >= settings.max_concurrent:
+            self.stats["overloaded"] += 1
+            return self._throttled()
+
+        self.in_flight += 1
+        self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.in_flight)
+        try:
+            await asyncio.sleep(self.latency())
+            draw = self._random.random()
+            if draw < settings.throttle_rate:
+                self.stats["throttled"] += 1
+                return self._throttled()
+            if draw < settings.throttle_rate + settings.error_rate:
+                self.stats["errors"] += 1
+                return web.Response(status=500, text="Internal Server Error")
+            if self._random.random() < settings.drip_rate:
+                self.stats["dripped"] += 1
+                return await self._drip(request, body)
+            self.stats["ok"] += 1
+            return web.Response(body=body, content_type="text/html", charset="utf-8")
+        finally:
+            self.in_flight -= 1
+
+    def _throttled(self) -> web.Response:
+        return web.Response(
+            status=429,
+            text="Too Many Requests",
+            headers={"Retry-After": f"{self.settings.retry_after:g}"},
+        )
+
+    async def _drip(self, request: web.Request, body: bytes) -> web.StreamResponse:
+        """Send the body slowly, a chunk at a time."""
+        response = web.StreamResponse(headers={"Content-Length": str(len(body))})
+        response.content_type = "text/html"
+        response.charset = "utf-8"
+        await response.prepare(request)
+        chunk_size = max(self.settings.drip_chunk_size, 1)
+        for start in range(0, len(body), chunk_size):
+            await response.write(body[start : start + chunk_size])
+            await asyncio.sleep(self.settings.drip_interval)
+        await response.write_eof()
+        return response
+
+    def _summary(self) -> str:
+        return ", ".join(f"{count} {name}" for name, count in self.stats.items())
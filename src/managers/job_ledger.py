@@ -0,0 +1,99 @@
+import asyncio
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+from ..database.operations import db
+
+# Job statuses, in pipeline order; failed can follow any of the others
+JOB_STATUSES = ("pending", "fetched", "parsed", "saved", "failed")
+UNFINISHED_STATUSES = ("pending", "fetched", "parsed", "failed")
+
+
+class JobLedger:
+    """
+    Per-school progress of a scrape run, persisted so the run can be resumed.
+
+    Status changes are buffered and written in batches of flush_size, so
+    the ledger adds a few small transactions per thousand schools rather
+    than one per pipeline stage and school.
+    """
+
+    def __init__(self, run_id: str, flush_size: int = 200):
+        self.run_id = run_id
+        self.flush_size = flush_size
+        self._new_jobs: Dict[str, Optional[str]] = {}
+        self._updates: Dict[str, Dict[str, Any]] = {}
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    async def start(cls, force: bool = False) -> "JobLedger":
+        """Start the ledger of a new scrape run."""
+        run_id = await db.create_run(force=force)
+        logger.info(f"Started scrape run {run_id} (resume it with --resume {run_id})")
+        return cls(run_id)
+
+    async def add(self, school_id: str, fingerprint: Optional[str] = None) -> None:
+        """Add a school to the run as a pending job."""
+        self._new_jobs[school_id] = fingerprint
+        await self._flush_if_full()
+
+    async def mark(
+        self,
+        school_id: str,
+        status: str,
+        error: Optional[BaseException] = None,
+        attempt: bool = False,
+    ) -> None:
+        """
+        Record that a school reached a status.
+
+        Args:
+            school_id: ID of the school
+            status: One of JOB_STATUSES
+            error: Error that made the job fail
+            attempt: Whether this status ends a fetch attempt
+        """
+        previous = self._updates.get(school_id)
+        self._updates[school_id] = {
+            "school_id": school_id,
+            "status": status,
+            "last_error": (str(error) or type(error).__name__) if error else None,
+            "attempts": int(attempt) + (previous["attempts"] if previous else 0),
+        }
+        await self._flush_if_full()
+
+    async def mark_listed(self) -> None:
+        """Record that every school to process has been added to the run."""
+        await self.flush()
+        await db.update_run(self.run_id, listed=True)
+
+    async def flush(self) -> None:
+        """Write buffered changes to the database."""
+        async with self._lock:
+            new_jobs, self._new_jobs = self._new_jobs, {}
+            updates, self._updates = self._updates, {}
+            if new_jobs or updates:
+                await db.save_jobs(self.run_id, new_jobs, updates.values())
+
+    async def finish(self) -> Dict[str, int]:
+        """
+        Mark the run as finished.
+
+        Returns:
+            Number of jobs by status
+        """
+        await self.flush()
+        await db.update_run(self.run_id, status="finished")
+        counts = await db.count_jobs(self.run_id)
+        summary = ", ".join(
+            f"{counts.get(status, 0)} {status}" for status in JOB_STATUSES
+        )
+        logger.info(f"Scrape run {self.run_id} finished: {summary}")
+        if counts.get("failed"):
+            logger.info(f"Retry the failed schools with --retry-failed {self.run_id}")
+        return counts
+
+    async def _flush_if_full(self) -> None:
+        if len(self._new_jobs) + len(self._updates) >= self.flush_size:
+            await self.flush()
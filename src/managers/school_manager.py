@@ -1,17 +1,62 @@
-from typing import List, Set
+import asyncio
+import os
+import time
+from contextlib import aclosing
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Coroutine,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
 
 from loguru import logger
 from sqlalchemy import select
 
+from config.config import config
+
 from ..database.models import School
-from ..database.operations import db
-from ..parsers.details_parser import DetailsParser
+from ..database.operations import DatabaseManager, db
+from ..parsers.list_parser import SchoolListing
+from ..parsers.parser_pool import ParserPool
 from ..scrapers.details_scraper import DetailsScraper
+from ..utils.iterables import AnyIterable, aiter_items
+from ..utils.metrics import metrics
+from ..utils.page_store import RawPageStore
+from .job_ledger import UNFINISHED_STATUSES, JobLedger
+
+# Queues connecting the pipeline stages; None marks the end of input
+HtmlQueue = asyncio.Queue[Optional[Tuple[str, str]]]
+RecordQueue = asyncio.Queue[Optional[Dict[str, Any]]]
+
+# Listing fingerprints by school ID, saved along with each school
+Fingerprints = Dict[str, Optional[str]]
+
+# Inputs may be a list or a stream, e.g. ListScraper.iter_school_ids()
+SchoolIds = AnyIterable[str]
+SchoolListings = AnyIterable[SchoolListing]
+
+
+SCHOOLS = metrics.counter(
+    "pipeline_schools_total",
+    "Schools that reached a pipeline stage (fetched, parsed, saved, failed)",
+    ("stage",),
+)
+QUEUE_DEPTH = metrics.gauge(
+    "pipeline_queue_depth", "Items waiting between pipeline stages", ("queue",)
+)
 
 
 class SchoolManager:
-    def __init__(self):
-        self.scraper = DetailsScraper()
+    def __init__(self, page_store: Optional[RawPageStore] = None):
+        self.page_store = page_store
+        self.scraper = DetailsScraper(page_store=page_store)
+        self.ledger: Optional[JobLedger] = None  # Ledger of the current run
 
     async def get_existing_school_ids(self) -> Set[str]:
         """Get all school IDs that are already in the database."""
@@ -20,60 +65,575 @@ class SchoolManager:
             return {row[0] for row in result}
 
     async def scrape_and_parse(
-        self, school_ids: List[str], batch_size: int = 10
+        self,
+        school_ids: SchoolIds,
+        batch_size: Optional[int] = None,
+        workers: Optional[int] = None,
+        fingerprints: Optional[Fingerprints] = None,
+        ledger: Optional[JobLedger] = None,
+        refetch: Optional[Set[str]] = None,
     ) -> None:
         """
         Scrape and parse schools, storing them in the database.
 
+        Fetching, parsing and saving run as concurrent stages connected by
+        bounded queues, so only a handful of pages are held in memory at any
+        time and rows are committed while the scrape is still in progress.
+        IDs may be streamed, in which case fetching starts with the first ID.
+
+        Args:
+            school_ids: School IDs to process, as a list or an async iterable
+            batch_size: Max schools per database transaction (defaults to config)
+            workers: Number of parser processes (defaults to pipeline config)
+            fingerprints: Listing fingerprints to save with each school; may
+                be filled in while the IDs are streamed
+            ledger: Job ledger recording the progress of each school
+            refetch: IDs of schools fetched from the site even if a recent
+                page is stored; may be filled in while the IDs are streamed
+        """
+        progress = {"ids": 0}
+
+        def fetchers(html_queue: HtmlQueue) -> List[Coroutine[Any, Any, None]]:
+            listed = self._listed_ids(school_ids, progress, fingerprints)
+            return [self._fetch_stage(listed, html_queue, refetch)]
+
+        logger.info("Starting pipeline")
+        self.ledger = ledger
+        try:
+            saved = await self._run_pipeline(
+                fetchers, batch_size, workers, fingerprints
+            )
+        finally:
+            self.ledger = None
+            if ledger is not None:
+                await ledger.flush()
+
+        logger.success(f"Successfully saved {saved} out of {progress['ids']} schools")
+        limiter = self.scraper.limiter.metrics()
+        logger.info(
+            f"Fetch concurrency settled at {limiter['limit']} "
+            f"({limiter['successes']} requests, {limiter['overloads']} overloaded)"
+        )
+
+    async def reparse_stored_pages(
+        self,
+        batch_size: Optional[int] = None,
+        workers: Optional[int] = None,
+        fresh: bool = True,
+    ) -> None:
+        """
+        Rebuild the database from the pages in the raw page store.
+
+        Parser processes read, decompress and parse chunks of stored pages
+        themselves, and results are bulk-loaded as they come back.
+
+        A fresh rebuild loads into a new database file, which replaces the
+        current one only once every page is reparsed. The scrape ledger and
+        the schools with no stored page are carried over, and an interrupted
+        rebuild leaves the current database as it was.
+
         Args:
-            school_ids: List of school IDs to process
-            batch_size: Number of schools to process in each batch
+            batch_size: Max schools per database transaction (defaults to config)
+            workers: Number of parser processes (defaults to all CPU cores)
+            fresh: Rebuild into a new database instead of updating in place
+        """
+        if self.page_store is None:
+            raise RuntimeError("Reparsing requires a raw page store")
+
+        batch_size = batch_size or config.database.bulk_batch_size
+        parse_workers = workers or os.cpu_count() or 1
+        chunk_size = config.pipeline.parse_chunk_size
+        school_ids = list(self.page_store.iter_school_ids())
+        chunks = iter(
+            [
+                school_ids[start : start + chunk_size]
+                for start in range(0, len(school_ids), chunk_size)
+            ]
+        )
+        record_queue: RecordQueue = asyncio.Queue(maxsize=config.pipeline.queue_size)
+        progress = {"pages": 0, "failed": 0}
+
+        fingerprints = None
+        target = db
+        if fresh:
+            await db.migrate()  # Old rows are copied over column for column
+            # Kept across the rebuild, as they describe the stored pages
+            fingerprints = await db.get_listing_fingerprints()
+            target = await db.create_rebuild()
+        await target.load_study_cache()
+
+        logger.info(
+            f"Reparsing {len(school_ids)} stored pages from {self.page_store.root} "
+            f"with {parse_workers} workers"
+        )
+        started = time.perf_counter()
+
+        try:
+            async with ParserPool(parse_workers, chunk_size=chunk_size) as pool:
+                readers = [
+                    asyncio.create_task(
+                        self._reparse_worker(
+                            pool, chunks, record_queue, progress, started
+                        )
+                    )
+                    for _ in range(parse_workers)
+                ]
+                writer = asyncio.create_task(
+                    self._write_worker(record_queue, batch_size, fingerprints, target)
+                )
+
+                async def close_stages() -> None:
+                    await asyncio.gather(*readers)
+                    await record_queue.put(None)
+
+                try:
+                    _, saved = await asyncio.gather(close_stages(), writer)
+                except BaseException:
+                    for task in (*readers, writer):
+                        task.cancel()
+                    raise
+
+            kept = await db.finish_rebuild(target) if target is not db else 0
+        except BaseException:
+            if target is not db:
+                await db.discard_rebuild(target)
+            raise
+
+        elapsed = time.perf_counter() - started
+        logger.success(
+            f"Rebuilt {saved} schools from {progress['pages']} stored pages in "
+            f"{elapsed:.1f}s ({progress['pages'] / max(elapsed, 1e-9):.0f} pages/sec)"
+        )
+        if progress["failed"]:
+            logger.warning(f"{progress['failed']} stored pages could not be parsed")
+        if kept:
+            logger.info(f"Kept {kept} schools with no stored page")
+
+    async def _reparse_worker(
+        self,
+        pool: ParserPool,
+        chunks: Iterator[List[str]],
+        record_queue: RecordQueue,
+        progress: Dict[str, int],
+        started: float,
+    ) -> None:
+        """Parse chunks of stored pages from the shared iterator."""
+        assert self.page_store is not None
+        for chunk in chunks:
+            try:
+                results = await pool.parse_stored_chunk(self.page_store, chunk)
+            except Exception as e:
+                logger.error(f"Error reparsing schools {', '.join(chunk)}: {str(e)}")
+                progress["failed"] += len(chunk)
+                continue
+
+            previous = progress["pages"]
+            for school_id, school_data, error in results:
+                if school_data is None or not school_data.get("id"):
+                    error = error or "no school ID found"
+                    logger.error(f"Error parsing school {school_id}: {error}")
+                    progress["failed"] += 1
+                    continue
+                progress["pages"] += 1
+                await record_queue.put(school_data)
+
+            if progress["pages"] // 1000 > previous // 1000:
+                elapsed = time.perf_counter() - started
+                logger.info(
+                    f"Reparsed {progress['pages']} pages "
+                    f"({progress['pages'] / elapsed:.0f} pages/sec)"
+                )
+
+    async def _run_pipeline(
+        self,
+        producers: Callable[[HtmlQueue], List[Coroutine[Any, Any, None]]],
+        batch_size: Optional[int],
+        workers: Optional[int],
+        fingerprints: Optional[Fingerprints] = None,
+    ) -> int:
+        """
+        Run page producers through the parse and save stages.
+
+        Args:
+            producers: Builds the coroutines that put pages on the HTML queue
+            batch_size: Max schools per database transaction (defaults to config)
+            workers: Number of parser processes (defaults to pipeline config)
+            fingerprints: Listing fingerprints to save with each school
+
+        Returns:
+            Number of schools saved
+        """
+        batch_size = batch_size or config.database.bulk_batch_size
+        queue_size = config.pipeline.queue_size
+        parse_workers = workers or config.pipeline.parse_workers
+        html_queue: HtmlQueue = asyncio.Queue(maxsize=queue_size)
+        record_queue: RecordQueue = asyncio.Queue(maxsize=queue_size)
+
+        await db.load_study_cache()
+        QUEUE_DEPTH.track(html_queue.qsize, queue="html")
+        QUEUE_DEPTH.track(record_queue.qsize, queue="records")
+
+        async with ParserPool(
+            parse_workers, chunk_size=config.pipeline.parse_chunk_size
+        ) as pool:
+            sources = [asyncio.create_task(coro) for coro in producers(html_queue)]
+            parsers = [
+                asyncio.create_task(self._parse_worker(pool, html_queue, record_queue))
+                for _ in range(parse_workers)
+            ]
+            writer = asyncio.create_task(
+                self._write_worker(record_queue, batch_size, fingerprints)
+            )
+
+            async def close_stages() -> None:
+                # Signal end of input to each stage once its producers finish
+                await asyncio.gather(*sources)
+                for _ in parsers:
+                    await html_queue.put(None)
+                await asyncio.gather(*parsers)
+                await record_queue.put(None)
+
+            try:
+                _, saved = await asyncio.gather(close_stages(), writer)
+            except BaseException:
+                for task in (*sources, *parsers, writer):
+                    task.cancel()
+                raise
+            finally:
+                QUEUE_DEPTH.untrack(queue="html")
+                QUEUE_DEPTH.untrack(queue="records")
+
+        return saved
+
+    async def _listed_ids(
+        self,
+        school_ids: SchoolIds,
+        progress: Dict[str, int],
+        fingerprints: Optional[Fingerprints] = None,
+    ) -> AsyncIterator[str]:
+        """Yield the school IDs to fetch, adding each to the run's ledger."""
+        async for school_id in aiter_items(school_ids):
+            progress["ids"] += 1
+            if self.ledger is not None:
+                fingerprint = fingerprints.get(school_id) if fingerprints else None
+                await self.ledger.add(school_id, fingerprint)
+            yield school_id
+        if self.ledger is not None:
+            await self.ledger.mark_listed()
+
+    async def _fetch_stage(
+        self,
+        school_ids: AsyncIterator[str],
+        html_queue: HtmlQueue,
+        refetch: Optional[Set[str]] = None,
+    ) -> None:
+        """
+        Fetch pages through the scraper's windowed fetches, putting them on
+        the HTML queue.
         """
-        # Get the HTML content for all schools
-        html_contents = await self.scraper.run(school_ids, batch_size=batch_size)
+        results = self.scraper.iter_results(school_ids, refetch=refetch)
+        async with aclosing(results):
+            async for school_id, html_content, error in results:
+                if html_content is None:
+                    logger.error(f"Error processing school {school_id}: {str(error)}")
+                    await self._mark(school_id, "failed", error, attempt=True)
+                    continue
+
+                await self._mark(school_id, "fetched", attempt=True)
+                # Blocks while the parse stage is behind, and with it fetching
+                await html_queue.put((school_id, html_content))
+
+    async def _mark(
+        self,
+        school_id: str,
+        status: str,
+        error: Optional[BaseException] = None,
+        attempt: bool = False,
+    ) -> None:
+        """Record the progress of a school in the metrics and the run's ledger."""
+        SCHOOLS.inc(stage=status)
+        if self.ledger is not None:
+            await self.ledger.mark(school_id, status, error, attempt)
+
+    async def _parse_worker(
+        self,
+        pool: ParserPool,
+        html_queue: HtmlQueue,
+        record_queue: RecordQueue,
+    ) -> None:
+        """Parse fetched pages in chunks until a sentinel is received."""
+        finished = False
+        while not finished:
+            item = await html_queue.get()
+            if item is None:
+                return
+
+            # Take whatever else is already waiting, up to a full chunk
+            chunk = [item]
+            while len(chunk) < pool.chunk_size:
+                try:
+                    item = html_queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if item is None:
+                    finished = True
+                    break
+                chunk.append(item)
 
-        # Parse and save each school
-        for school_id, html_content in html_contents.items():
             try:
-                # Parse the HTML content
-                parser = DetailsParser(html_content)
-                school_data = parser.parse_all()
+                results = await pool.parse_chunk(chunk)
+            except Exception as e:
+                school_ids = ", ".join(school_id for school_id, _ in chunk)
+                logger.error(f"Error parsing schools {school_ids}: {str(e)}")
+                for school_id, _ in chunk:
+                    await self._mark(school_id, "failed", e)
+                continue
+
+            for school_id, school_data, error in results:
+                if school_data is None or not school_data.get("id"):
+                    error = error or "no school ID found"
+                    logger.error(f"Error parsing school {school_id}: {error}")
+                    await self._mark(school_id, "failed", ValueError(error))
+                    continue
+                await self._mark(school_id, "parsed")
+                await record_queue.put(school_data)
+
+    async def _write_worker(
+        self,
+        record_queue: RecordQueue,
+        batch_size: int,
+        fingerprints: Optional[Fingerprints] = None,
+        database: Optional[DatabaseManager] = None,
+    ) -> int:
+        """
+        Save parsed schools in batches until a sentinel is received.
 
-                # Save to database
-                await db.save_school(school_data)
-                logger.debug(f"Successfully processed and saved school {school_id}")
+        Each batch holds whatever is waiting in the queue, up to batch_size,
+        so rows are written promptly when input is slow and in large
+        transactions when the writer falls behind. Listing fingerprints are
+        saved in the same transaction as their school, so a school that
+        fails to save is fetched again on the next run. Schools are saved
+        to database, or to the global one if not given.
 
+        Returns:
+            Number of schools saved
+        """
+        saved = 0
+        finished = False
+
+        while not finished:
+            school_data = await record_queue.get()
+            if school_data is None:
+                break
+
+            batch = [school_data]
+            while len(batch) < batch_size:
+                try:
+                    school_data = record_queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if school_data is None:
+                    finished = True
+                    break
+                batch.append(school_data)
+
+            if fingerprints is not None:
+                for school_data in batch:
+                    school_data["listing_fingerprint"] = fingerprints.get(
+                        school_data["id"]
+                    )
+            saved += await self._save_batch(batch, database or db)
+
+        return saved
+
+    async def _save_batch(
+        self, batch: List[Dict[str, Any]], database: DatabaseManager
+    ) -> int:
+        """
+        Save a batch of schools in a single transaction.
+
+        If the transaction fails, schools are retried one by one so that a
+        single bad record does not discard the rest of the batch.
+
+        Returns:
+            Number of schools saved
+        """
+        try:
+            saved = await database.save_schools_bulk(batch, batch_size=len(batch))
+            logger.debug("Saved batch of {count} schools", count=saved)
+            for school_data in batch:
+                await self._mark(school_data["id"], "saved")
+            return saved
+        except Exception as e:
+            logger.warning(f"Batch save failed, retrying one by one: {str(e)}")
+
+        saved = 0
+        for school_data in batch:
+            try:
+                saved += await database.save_schools_bulk([school_data])
+                logger.debug(
+                    "Successfully processed and saved school {school_id}",
+                    school_id=school_data["id"],
+                )
+                await self._mark(school_data["id"], "saved")
             except Exception as e:
-                logger.error(f"Error processing school {school_id}: {str(e)}")
+                logger.error(f"Error processing school {school_data['id']}: {str(e)}")
+                await self._mark(school_data["id"], "failed", e)
+        return saved
 
     async def process_new_schools(
-        self, school_ids: List[str], batch_size: int = 10
+        self,
+        school_ids: SchoolIds,
+        batch_size: Optional[int] = None,
+        workers: Optional[int] = None,
     ) -> None:
         """
         Process only schools that don't exist in the database.
 
         Args:
-            school_ids: List of school IDs to check and potentially process
-            batch_size: Number of schools to process in each batch
+            school_ids: School IDs to check, as a list or an async iterable
+            batch_size: Max schools per database transaction (defaults to config)
+            workers: Number of parser processes (defaults to pipeline config)
         """
         existing_ids = await self.get_existing_school_ids()
-        new_ids = [id for id in school_ids if id not in existing_ids]
+        skipped = 0
 
-        if new_ids:
-            logger.info(f"Found {len(new_ids)} new schools to process")
-            await self.scrape_and_parse(new_ids, batch_size)
-        else:
-            logger.info("No new schools to process")
+        async def new_ids() -> AsyncIterator[str]:
+            nonlocal skipped
+            async for school_id in aiter_items(school_ids):
+                if school_id in existing_ids:
+                    skipped += 1
+                    continue
+                yield school_id
+
+        await self.scrape_and_parse(new_ids(), batch_size, workers)
+        logger.info(f"Skipped {skipped} schools already in the database")
 
     async def process_all_schools(
-        self, school_ids: List[str], batch_size: int = 10
+        self,
+        school_ids: SchoolIds,
+        batch_size: Optional[int] = None,
+        workers: Optional[int] = None,
     ) -> None:
         """
         Process all schools regardless of whether they exist in the database.
 
         Args:
-            school_ids: List of school IDs to process
-            batch_size: Number of schools to process in each batch
+            school_ids: School IDs to process, as a list or an async iterable
+            batch_size: Max schools per database transaction (defaults to config)
+            workers: Number of parser processes (defaults to pipeline config)
+        """
+        logger.info("Processing all listed schools")
+        await self.scrape_and_parse(school_ids, batch_size, workers)
+
+    async def process_changed_schools(
+        self,
+        listings: SchoolListings,
+        force: bool = False,
+        batch_size: Optional[int] = None,
+        workers: Optional[int] = None,
+        ledger: Optional[JobLedger] = None,
+    ) -> None:
+        """
+        Process schools that are new or whose search results row changed.
+
+        Each listing's fingerprint is compared with the one saved with the
+        school, so unchanged schools are skipped without fetching their
+        details. Schools saved without a fingerprint are always processed.
+        Changed schools, and all of them when forced, are fetched from the
+        site even if a recent page is stored, as it may predate the change.
+
+        Args:
+            listings: Schools from the search results, as a list or a stream
+            force: Process every listed school, refreshing all fingerprints
+            batch_size: Max schools per database transaction (defaults to config)
+            workers: Number of parser processes (defaults to pipeline config)
+            ledger: Job ledger recording the progress of each school
         """
-        logger.info(f"Processing {len(school_ids)} schools")
-        await self.scrape_and_parse(school_ids, batch_size)
+        stored = await db.get_listing_fingerprints()
+        fingerprints: Fingerprints = {}
+        refetch: Set[str] = set()
+        unchanged = 0
+
+        async def changed_ids() -> AsyncIterator[str]:
+            nonlocal unchanged
+            async for listing in aiter_items(listings):
+                fingerprint = listing.fingerprint
+                if not force and stored.get(listing.id) == fingerprint:
+                    unchanged += 1
+                    continue
+                fingerprints[listing.id] = fingerprint
+                if force or stored.get(listing.id) is not None:
+                    refetch.add(listing.id)
+                yield listing.id
+
+        await self.scrape_and_parse(
+            changed_ids(), batch_size, workers, fingerprints, ledger, refetch
+        )
+        logger.info(f"Skipped {unchanged} schools with unchanged listings")
+
+    async def resume_run(
+        self,
+        run_id: str,
+        listings: SchoolListings,
+        failed_only: bool = False,
+        batch_size: Optional[int] = None,
+        workers: Optional[int] = None,
+    ) -> Dict[str, int]:
+        """
+        Continue a scrape run from its job ledger.
+
+        If the run had listed all its schools, only the jobs it did not save
+        are processed, and the listings are not used. If it stopped while
+        listing, the listings are processed again as in the original run,
+        skipping the schools it already saved.
+
+        Args:
+            run_id: ID of the run to continue
+            listings: Schools from the search results, as a list or a stream
+            failed_only: Only process the jobs that failed
+            batch_size: Max schools per database transaction (defaults to config)
+            workers: Number of parser processes (defaults to pipeline config)
+
+        Returns:
+            Number of jobs of the run by status
+        """
+        run = await db.get_run(run_id)
+        if run is None:
+            raise ValueError(f"Unknown scrape run: {run_id}")
+        ledger = JobLedger(run_id)
+        await db.update_run(run_id, status="running")
+
+        if run.listed or failed_only:
+            statuses = ("failed",) if failed_only else UNFINISHED_STATUSES
+            jobs = await db.get_jobs(run_id, statuses)
+            logger.info(
+                f"Resuming scrape run {run_id} with {len(jobs)} "
+                f"{'failed' if failed_only else 'unfinished'} schools"
+            )
+            stored = await db.get_listing_fingerprints()
+            refetch = {
+                school_id
+                for school_id, fingerprint in jobs.items()
+                if run.force or stored.get(school_id) not in (None, fingerprint)
+            }
+            await self.scrape_and_parse(
+                list(jobs), batch_size, workers, jobs, ledger, refetch
+            )
+        else:
+            saved_ids = set(await db.get_jobs(run_id, ("saved",)))
+            logger.info(
+                f"Resuming scrape run {run_id} from the school list, "
+                f"skipping {len(saved_ids)} schools it already saved"
+            )
+
+            async def unsaved() -> AsyncIterator[SchoolListing]:
+                async for listing in aiter_items(listings):
+                    if listing.id not in saved_ids:
+                        yield listing
+
+            await self.process_changed_schools(
+                unsaved(), run.force, batch_size, workers, ledger
+            )
+
+        return await ledger.finish()
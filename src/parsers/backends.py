@@ -0,0 +1,35 @@
+from typing import Any, Dict, Type
+
+from .details_parser import DetailsParser, SchoolDetailsParser
+from .lxml_details_parser import LxmlDetailsParser
+
+# Available SchoolDetailsParser implementations, by config name
+PARSER_BACKENDS: Dict[str, Type[SchoolDetailsParser]] = {
+    "bs4": DetailsParser,
+    "lxml": LxmlDetailsParser,
+}
+
+
+def parse_details(html_content: str, backend: str = "lxml") -> Dict[str, Any]:
+    """
+    Parse a school details page with the given backend.
+
+    Pages the backend cannot make sense of are parsed again with the
+    BeautifulSoup backend, which is more forgiving of broken markup.
+
+    Args:
+        html_content: The HTML of the school details page
+        backend: Name of the backend in PARSER_BACKENDS
+
+    Returns:
+        The parsed school data, as returned by SchoolDetailsParser.parse_all
+    """
+    try:
+        parser_class = PARSER_BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown parser backend: {backend}") from None
+
+    school_data = parser_class(html_content).parse_all()
+    if not school_data.get("id") and parser_class is not DetailsParser:
+        school_data = DetailsParser(html_content).parse_all()
+    return school_data
@@ -1,4 +1,6 @@
-from typing import Any, Dict, List, cast
+from abc import ABC, abstractmethod
+from functools import cached_property
+from typing import Any, Dict, List, Optional, cast
 
 from bs4 import Tag
 from loguru import logger
@@ -6,27 +8,41 @@ from loguru import logger
 from .base_parser import BaseParser
 
 
-class DetailsParser(BaseParser):
+class SchoolDetailsParser(ABC):
+    """
+    Parser of a school details page, whatever the HTML library.
+
+    The fields of the page and how they map to school data are defined
+    here; each backend only implements access to the document, and must
+    return exactly the same results as the others.
+    """
+
+    @abstractmethod
+    def __init__(self, html_content: str):
+        """Parse the HTML of a school details page."""
+
+    @abstractmethod
+    def _extract_field(self, label: str, tag: str = "span") -> str:
+        """Extract the value of a labelled field block."""
+
+    @abstractmethod
+    def parse_services(self) -> List[str]:
+        """Parse school services."""
+
+    @abstractmethod
+    def parse_imparted_studies(self) -> List[Dict[str, str]]:
+        """Parse imparted studies information."""
+
     def parse_basic_info(self) -> Dict[str, str]:
         """Parse basic school information."""
         try:
             return {
-                "id": self._extract_text(
-                    'div.col-md-6:-soup-contains("Código de centro:") span'
-                ),
-                "name": self._extract_text(
-                    'div.col-md-6:-soup-contains("Denominación específica:") span'
-                ),
-                "phone": self._extract_text(
-                    'div.col-md-6:-soup-contains("Teléfono:") span'
-                ),
-                "fax": self._extract_text('div.col-md-6:-soup-contains("Fax:") span'),
-                "email": self._extract_text(
-                    'div.col-md-6:-soup-contains("Correo electrónico:") span'
-                ),
-                "website": self._extract_text(
-                    'div.col-md-6:-soup-contains("Página Web del centro:") a'
-                ),
+                "id": self._extract_field("Código de centro:"),
+                "name": self._extract_field("Denominación específica:"),
+                "phone": self._extract_field("Teléfono:"),
+                "fax": self._extract_field("Fax:"),
+                "email": self._extract_field("Correo electrónico:"),
+                "website": self._extract_field("Página Web del centro:", "a"),
             }
         except Exception as e:
             logger.warning(f"Error parsing basic info: {str(e)}")
@@ -36,33 +52,15 @@ class DetailsParser(BaseParser):
         """Parse school location information."""
         try:
             return {
-                "autonomous_community": self._extract_text(
-                    'div.col-md-6:-soup-contains("Autonomía:") span'
-                ),
-                "province": self._extract_text(
-                    'div.col-md-6:-soup-contains("Provincia:") span'
-                ),
-                "country": self._extract_text(
-                    'div.col-md-6:-soup-contains("País:") span'
-                ),
-                "region": self._extract_text(
-                    'div.col-md-6:-soup-contains("Comarca:") span'
-                ),
-                "sub_region": self._extract_text(
-                    'div.col-md-6:-soup-contains("Sub.Provincial / Isla:") span'
-                ),
-                "municipality": self._extract_text(
-                    'div.col-md-6:-soup-contains("Municipio:") span'
-                ),
-                "locality": self._extract_text(
-                    'div.col-md-6:-soup-contains("Localidad:") span'
-                ),
-                "address": self._extract_text(
-                    'div.col-md-6:-soup-contains("Domicilio:") span'
-                ),
-                "postal_code": self._extract_text(
-                    'div.col-md-6:-soup-contains("Código postal:") span'
-                ),
+                "autonomous_community": self._extract_field("Autonomía:"),
+                "province": self._extract_field("Provincia:"),
+                "country": self._extract_field("País:"),
+                "region": self._extract_field("Comarca:"),
+                "sub_region": self._extract_field("Sub.Provincial / Isla:"),
+                "municipality": self._extract_field("Municipio:"),
+                "locality": self._extract_field("Localidad:"),
+                "address": self._extract_field("Domicilio:"),
+                "postal_code": self._extract_field("Código postal:"),
             }
         except Exception as e:
             logger.warning(f"Error parsing location info: {str(e)}")
@@ -72,23 +70,73 @@ class DetailsParser(BaseParser):
         """Parse school classification information."""
         try:
             return {
-                "nature": self._extract_text(
-                    'div.col-md-6:-soup-contains("Naturaleza:") span'
-                ),
-                "is_concerted": self._extract_text(
-                    'div.col-md-6:-soup-contains("Concertado:") span'
-                ),
-                "center_type": self._extract_text(
-                    'div.col-md-6:-soup-contains("Tipo de centro:") span'
-                ),
-                "generic_name": self._extract_text(
-                    'div.col-md-6:-soup-contains("Denominación genérica:") span'
-                ),
+                "nature": self._extract_field("Naturaleza:"),
+                "is_concerted": self._extract_field("Concertado:"),
+                "center_type": self._extract_field("Tipo de centro:"),
+                "generic_name": self._extract_field("Denominación genérica:"),
             }
         except Exception as e:
             logger.warning(f"Error parsing classification info: {str(e)}")
             return {}
 
+    def parse_all(self) -> Dict[str, Any]:
+        """Parse all school information."""
+        try:
+            basic_info = self.parse_basic_info()
+            if not basic_info.get(
+                "id"
+            ):  # If we can't get the basic info, something is wrong
+                raise ValueError("Could not parse basic school information")
+
+            return {
+                **basic_info,
+                **self.parse_location_info(),
+                **self.parse_classification_info(),
+                "services": self.parse_services(),
+                "imparted_studies": self.parse_imparted_studies(),
+            }
+        except Exception as e:
+            logger.error(f"Error parsing school details: {str(e)}")
+            # Return a minimal valid structure instead of raising
+            return {"id": None, "name": None, "services": [], "imparted_studies": []}
+
+
+class DetailsParser(BaseParser, SchoolDetailsParser):
+    """SchoolDetailsParser backend working on a BeautifulSoup tree."""
+
+    @cached_property
+    def _field_blocks(self) -> List[Tag]:
+        """Every ``div.col-md-6`` field block, in page order."""
+        return cast(List[Tag], self.soup.find_all("div", class_="col-md-6"))
+
+    @cached_property
+    def _field_index(self) -> Dict[str, Tag]:
+        """Field blocks indexed by their bold label, e.g. ``"Provincia:"``."""
+        index: Dict[str, Tag] = {}
+        for block in self._field_blocks:
+            label = block.find("b")
+            if label is not None:
+                index.setdefault(label.get_text(strip=True), block)
+        return index
+
+    def _extract_field(self, label: str, tag: str = "span") -> str:
+        """
+        Extract the value of a labelled field block.
+
+        Equivalent to ``div.col-md-6:-soup-contains("<label>") <tag>``, but
+        answered from an index built in a single pass over the page.
+        """
+        block: Optional[Tag] = self._field_index.get(label)
+        if block is None:
+            # Unusual markup: fall back to matching the label anywhere in a block
+            block = next((b for b in self._field_blocks if label in b.get_text()), None)
+        if block is None:
+            return ""
+        element = block.find(tag)
+        if element is None:
+            return ""
+        return element.text.strip()
+
     def parse_services(self) -> List[str]:
         """Parse school services."""
         try:
@@ -122,10 +170,13 @@ class DetailsParser(BaseParser):
                     service = td.get_text(strip=True)
                     if service:
                         services.append(service)
-                        logger.debug(f"Found service: {service}")
 
             if services:
-                logger.debug(f"Found {len(services)} services: {services}")
+                logger.debug(
+                    "Found {count} services: {services}",
+                    count=len(services),
+                    services=services,
+                )
             else:
                 logger.debug("No services found in table")
             return services
@@ -172,10 +223,13 @@ class DetailsParser(BaseParser):
                     # Add if there's a valid study name
                     if study["name"]:
                         studies.append(study)
-                        logger.debug(f"Found study: {study}")
 
             if studies:
-                logger.debug(f"Found {len(studies)} studies: {studies}")
+                logger.debug(
+                    "Found {count} studies: {studies}",
+                    count=len(studies),
+                    studies=studies,
+                )
             else:
                 logger.debug("No studies found in table")
             return studies
@@ -183,24 +237,3 @@ class DetailsParser(BaseParser):
         except Exception as e:
             logger.warning(f"Error parsing imparted studies: {str(e)}")
             return []
-
-    def parse_all(self) -> Dict[str, Any]:
-        """Parse all school information."""
-        try:
-            basic_info = self.parse_basic_info()
-            if not basic_info.get(
-                "id"
-            ):  # If we can't get the basic info, something is wrong
-                raise ValueError("Could not parse basic school information")
-
-            return {
-                **basic_info,
-                **self.parse_location_info(),
-                **self.parse_classification_info(),
-                "services": self.parse_services(),
-                "imparted_studies": self.parse_imparted_studies(),
-            }
-        except Exception as e:
-            logger.error(f"Error parsing school details: {str(e)}")
-            # Return a minimal valid structure instead of raising
-            return {"id": None, "name": None, "services": [], "imparted_studies": []}
@@ -0,0 +1,160 @@
+import hashlib
+from dataclasses import astuple, dataclass
+from typing import Any, Dict, List, Optional, Union
+
+from loguru import logger
+from lxml import etree  # type: ignore[import-untyped]
+
+# Search results column headers and the SchoolListing field each one fills
+LISTING_COLUMNS = {
+    "provincia": "province",
+    "localidad": "locality",
+    "denominación genérica": "generic_name",
+    "denominación específica": "specific_name",
+    "naturaleza": "nature",
+}
+
+
+@dataclass(frozen=True)
+class SchoolListing:
+    """A school's row in the search results."""
+
+    id: str
+    province: str = ""
+    locality: str = ""
+    generic_name: str = ""
+    specific_name: str = ""
+    nature: str = ""
+
+    @property
+    def fingerprint(self) -> str:
+        """Hash of the row, which changes whenever any of its columns do."""
+        return hashlib.sha256("\x1f".join(astuple(self)).encode("utf-8")).hexdigest()
+
+
+def _stripped_text(element: Any) -> str:
+    """Equivalent of BeautifulSoup's ``get_text(strip=True)``."""
+    return "".join(piece.strip() for piece in element.itertext())
+
+
+class SchoolListParser:
+    """
+    Incremental parser for the school search results page.
+
+    The page is fed in chunks as it is downloaded, and each school's row
+    is returned as soon as it is complete. Finished rows are discarded,
+    so memory use does not grow with the number of schools.
+
+    The school table is the first table with a "Código" header; rows are
+    read from its ``tbody``, and other known columns are matched by header.
+    """
+
+    def __init__(self):
+        self._parser = etree.HTMLPullParser(events=("start", "end"))
+        self._current_table: Optional[Any] = None
+        self._school_table: Optional[Any] = None
+        self._header_count = 0
+        self._headers: List[str] = []
+        self._finished = False
+        self.codigo_index: Optional[int] = None
+        self.column_indexes: Dict[str, int] = {}
+        self.row_count = 0
+
+    @property
+    def found_table(self) -> bool:
+        """Whether the table with school data has been found."""
+        return self._school_table is not None
+
+    def feed(self, data: Union[str, bytes]) -> List[SchoolListing]:
+        """
+        Feed the next chunk of the page.
+
+        Returns:
+            Schools from the rows completed by this chunk
+        """
+        self._parser.feed(data)
+        return self._read_events()
+
+    def close(self) -> List[SchoolListing]:
+        """
+        Signal the end of the page.
+
+        Returns:
+            Schools from any rows completed by the end of the page
+        """
+        self._parser.close()
+        return self._read_events()
+
+    def _read_events(self) -> List[SchoolListing]:
+        listings: List[SchoolListing] = []
+        for event, element in self._parser.read_events():
+            if self._finished:
+                continue
+            if event == "start":
+                if element.tag == "table" and self._current_table is None:
+                    self._current_table = element
+                    self._header_count = 0
+                    self._headers = []
+            elif element.tag == "th":
+                self._handle_header(element)
+            elif element.tag == "tr":
+                listing = self._handle_row(element)
+                if listing is not None:
+                    listings.append(listing)
+            elif element.tag == "table" and element is self._current_table:
+                self._current_table = None
+                # Only the first table with school data is read
+                self._finished = self._school_table is not None
+        return listings
+
+    def _handle_header(self, element: Any) -> None:
+        if self._current_table is None:
+            return
+        header = _stripped_text(element)
+        self._headers.append(header.lower())
+        if self._school_table is None and "Código" in header:
+            self._school_table = self._current_table
+            self.codigo_index = self._header_count
+            logger.debug(
+                "Found school table with 'Código' in column {column}",
+                column=self.codigo_index,
+            )
+        self._header_count += 1
+
+    def _handle_row(self, element: Any) -> Optional[SchoolListing]:
+        if self._school_table is None or self._current_table is not self._school_table:
+            return None
+
+        listing = None
+        in_body = next(element.iterancestors("tbody"), None) is not None
+        if in_body and self.codigo_index is not None:
+            if not self.column_indexes:
+                self.column_indexes = self._match_columns()
+            cells = list(element.iter("td"))
+            if len(cells) > self.codigo_index:
+                school_id = _stripped_text(cells[self.codigo_index])
+                if school_id:
+                    listing = SchoolListing(
+                        id=school_id,
+                        **{
+                            field: _stripped_text(cells[index])
+                            for field, index in self.column_indexes.items()
+                            if index < len(cells)
+                        },
+                    )
+                self.row_count += 1
+
+        # Drop finished rows so the tree stays small
+        element.clear()
+        parent = element.getparent()
+        while element.getprevious() is not None and parent is not None:
+            del parent[0]
+        return listing
+
+    def _match_columns(self) -> Dict[str, int]:
+        """Map SchoolListing fields to the school table's column indexes."""
+        return {
+            LISTING_COLUMNS[header]: index
+            for index, header in enumerate(self._headers)
+            if header in LISTING_COLUMNS
+        }
@@ -0,0 +1,143 @@
+from typing import Dict, List, Optional
+
+from loguru import logger
+from lxml import etree  # type: ignore[import-untyped]
+from lxml import html as lxml_html  # type: ignore[import-untyped]
+
+from .details_parser import SchoolDetailsParser
+
+# Matches elements whose class list contains "col-md-6", like the CSS selector
+FIELD_BLOCKS_XPATH = (
+    '//div[contains(concat(" ", normalize-space(@class), " "), " col-md-6 ")]'
+)
+
+
+def _stripped_text(element: etree._Element) -> str:
+    """Equivalent of BeautifulSoup's ``get_text(strip=True)``."""
+    return "".join(piece.strip() for piece in element.itertext())
+
+
+class LxmlDetailsParser(SchoolDetailsParser):
+    """
+    SchoolDetailsParser backend working directly on an lxml tree.
+
+    It skips building a BeautifulSoup tree, which is most of the per-page cost.
+    It returns exactly the same results as the BeautifulSoup DetailsParser.
+    """
+
+    def __init__(self, html_content: str):
+        self.tree: Optional[etree._Element]
+        try:
+            self.tree = lxml_html.document_fromstring(html_content)
+        except (etree.ParserError, ValueError) as e:
+            logger.warning(f"Could not parse HTML document: {str(e)}")
+            self.tree = None
+        self._blocks: Optional[List[etree._Element]] = None
+        self._index: Optional[Dict[str, etree._Element]] = None
+
+    def _get_field_blocks(self) -> List[etree._Element]:
+        if self._blocks is None:
+            self._blocks = (
+                [] if self.tree is None else self.tree.xpath(FIELD_BLOCKS_XPATH)
+            )
+        return self._blocks
+
+    def _get_field_index(self) -> Dict[str, etree._Element]:
+        if self._index is None:
+            self._index = {}
+            for block in self._get_field_blocks():
+                label = block.find(".//b")
+                if label is not None:
+                    self._index.setdefault(label.text_content().strip(), block)
+        return self._index
+
+    def _extract_field(self, label: str, tag: str = "span") -> str:
+        """Extract the value of a labelled field block."""
+        block = self._get_field_index().get(label)
+        if block is None:
+            block = next(
+                (b for b in self._get_field_blocks() if label in b.text_content()),
+                None,
+            )
+        if block is None:
+            return ""
+        element = block.find(f".//{tag}")
+        if element is None:
+            return ""
+        return element.text_content().strip()
+
+    def _find_section_table(self, header: str) -> Optional[etree._Element]:
+        """Find the first table after the div holding a section header text."""
+        if self.tree is None:
+            return None
+
+        matches = self.tree.xpath(
+            "(//text() | //comment())[contains(., $header)]", header=header
+        )
+        if not matches:
+            logger.debug("No '{header}' section found", header=header)
+            return None
+
+        node = matches[0]
+        if isinstance(node, etree._Element):  # A comment node
+            container = node.getparent()
+        elif node.is_tail:
+            container = node.getparent().getparent()
+        else:
+            container = node.getparent()
+
+        parent_divs = container.xpath("ancestor-or-self::div[1]")
+        if not parent_divs:
+            logger.debug("No parent div found for '{header}' header", header=header)
+            return None
+
+        tables = parent_divs[0].xpath("(descendant::table | following::table)[1]")
+        if not tables:
+            logger.debug("No table found for '{header}' section", header=header)
+            return None
+        return tables[0]
+
+    def parse_services(self) -> List[str]:
+        """Parse school services."""
+        try:
+            table = self._find_section_table("Servicios complementarios")
+            if table is None:
+                return []
+
+            services = []
+            for row in table.iter("tr"):
+                td = row.find(".//td")
+                if td is not None:
+                    service = _stripped_text(td)
+                    if service:
+                        services.append(service)
+            return services
+
+        except Exception as e:
+            logger.warning(f"Error parsing services: {str(e)}")
+            return []
+
+    def parse_imparted_studies(self) -> List[Dict[str, str]]:
+        """Parse imparted studies information."""
+        try:
+            table = self._find_section_table("Enseñanzas impartidas")
+            if table is None:
+                return []
+
+            studies = []
+            for row in table.iter("tr"):
+                cells = row.findall(".//td")
+                if len(cells) >= 4:  # We expect at least 4 columns
+                    study = {
+                        "degree": cells[0].text_content().strip(),
+                        "family": cells[1].text_content().strip(),
+                        "name": cells[2].text_content().strip(),
+                        "modality": cells[3].text_content().strip(),
+                    }
+                    if study["name"]:
+                        studies.append(study)
+            return studies
+
+        except Exception as e:
+            logger.warning(f"Error parsing imparted studies: {str(e)}")
+            return []
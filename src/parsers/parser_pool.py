@@ -0,0 +1,184 @@
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from loguru import logger
+
+from config.config import config
+
+from ..utils.metrics import FAST_BUCKETS, metrics
+from ..utils.page_store import RawPageStore
+from ..utils.profiling import SamplingWindow, active_profiler, start_worker_sampler
+from .backends import parse_details
+
+PAGE_SECONDS = metrics.histogram(
+    "parser_page_seconds",
+    "Time a parser process spends on one details page",
+    ("backend",),
+    buckets=FAST_BUCKETS,
+)
+
+
+class ParseResult(NamedTuple):
+    """The outcome of parsing one page: its data, or why it could not be parsed."""
+
+    school_id: str
+    school_data: Optional[Dict[str, Any]]
+    error: Optional[str] = None
+
+
+# Parse results as they leave a worker process, with the seconds each took
+# (None for pages that were never parsed)
+TimedResults = List[Tuple[ParseResult, Optional[float]]]
+
+_WARMUP_HTML = (
+    '<html><body><div class="col-md-6"><b>Código de centro:</b>'
+    "<span>0</span></div></body></html>"
+)
+
+
+def _init_worker(
+    backend: str, profile: Optional[Tuple[str, SamplingWindow]] = None
+) -> None:
+    """
+    Warm up a worker process so the first real page is not slowed down.
+
+    Args:
+        backend: Parser backend the worker uses
+        profile: Where to leave stack samples, and when to take them, if the
+            run is being profiled
+    """
+    if profile is not None:
+        start_worker_sampler(*profile)
+    parse_details(_WARMUP_HTML, backend)
+
+
+def _timed_parse(
+    school_id: str, html_content: str, backend: str
+) -> Tuple[ParseResult, float]:
+    """
+    Parse a page, also returning how long it took.
+
+    Errors are returned rather than raised, so that one bad page does not
+    fail the rest of its chunk.
+    """
+    started = time.perf_counter()
+    try:
+        result = ParseResult(school_id, parse_details(html_content, backend))
+    except Exception as e:
+        result = ParseResult(school_id, None, f"{type(e).__name__}: {str(e)}")
+    return result, time.perf_counter() - started
+
+
+def _parse_chunk(pages: List[Tuple[str, str]], backend: str) -> TimedResults:
+    """Parse a chunk of (school_id, html) pairs inside a worker process."""
+    return [
+        _timed_parse(school_id, html_content, backend)
+        for school_id, html_content in pages
+    ]
+
+
+def _parse_stored_chunk(
+    store_root: str, school_ids: List[str], backend: str
+) -> TimedResults:
+    """Read and parse a chunk of stored pages inside a worker process."""
+    page_store = RawPageStore(Path(store_root))
+    results: TimedResults = []
+    for school_id in school_ids:
+        html_content = page_store.get(school_id)
+        if html_content is None:
+            results.append(
+                (ParseResult(school_id, None, "no readable stored page"), None)
+            )
+            continue
+        results.append(_timed_parse(school_id, html_content, backend))
+    return results
+
+
+class ParserPool:
+    """Process pool that parses school detail pages off the event loop."""
+
+    def __init__(
+        self, workers: int, chunk_size: int = 10, backend: Optional[str] = None
+    ):
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.backend = backend or config.pipeline.parser_backend
+        self.executor: Optional[ProcessPoolExecutor] = None
+
+    async def __aenter__(self) -> "ParserPool":
+        profiler = active_profiler()
+        profile = None
+        if profiler is not None and profiler.window is not None:
+            profile = (profiler.worker_samples_dir, profiler.window)
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.backend, profile),
+        )
+        logger.debug(f"Started parser pool with {self.workers} workers")
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        if self.executor:
+            executor, self.executor = self.executor, None
+            # Waiting for the workers to exit must not block the event loop
+            await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+
+    async def parse_chunk(self, pages: List[Tuple[str, str]]) -> List[ParseResult]:
+        """
+        Parse a chunk of pages in a worker process.
+
+        Args:
+            pages: List of (school_id, html_content) pairs
+
+        Returns:
+            A result per page, in the same order
+        """
+        if not self.executor:
+            raise RuntimeError("Pool not started. Use async with context manager.")
+
+        loop = asyncio.get_running_loop()
+        results = await loop.run_in_executor(
+            self.executor, _parse_chunk, pages, self.backend
+        )
+        return self._observe(results)
+
+    async def parse_stored_chunk(
+        self, page_store: RawPageStore, school_ids: List[str]
+    ) -> List[ParseResult]:
+        """
+        Read and parse a chunk of stored pages in a worker process.
+
+        Only the school IDs cross the process boundary; the worker reads and
+        decompresses the pages itself, so reparsing is not limited by the
+        event loop reading files or pickling HTML.
+
+        Args:
+            page_store: Store holding the pages
+            school_ids: IDs of the schools to parse
+
+        Returns:
+            A result per school, in the same order
+        """
+        if not self.executor:
+            raise RuntimeError("Pool not started. Use async with context manager.")
+
+        loop = asyncio.get_running_loop()
+        results = await loop.run_in_executor(
+            self.executor,
+            _parse_stored_chunk,
+            str(page_store.root),
+            school_ids,
+            self.backend,
+        )
+        return self._observe(results)
+
+    def _observe(self, results: TimedResults) -> List[ParseResult]:
+        """Record the parse times measured in the worker and drop them."""
+        for _, seconds in results:
+            if seconds is not None:
+                PAGE_SECONDS.observe(seconds, backend=self.backend)
+        return [result for result, _ in results]
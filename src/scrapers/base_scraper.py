@@ -1,30 +1,126 @@
 import asyncio
-from typing import Any, Dict, Optional
+import codecs
+import time
+from typing import Any, AsyncIterator, Dict, Optional
+from urllib.parse import urlsplit
 
 import aiohttp
 from loguru import logger
 
 from config.config import config
 
+from ..utils.metrics import metrics
+from .concurrency import AdaptiveLimiter, host_limiters
+from .rate_limiter import rate_limiter
+from .retry import CircuitBreaker, RetryPolicy
+from .session_pool import session_pool
+
+REQUESTS = metrics.counter(
+    "scraper_requests_total",
+    "HTTP requests sent, by endpoint and response status or error",
+    ("endpoint", "status"),
+)
+REQUEST_SECONDS = metrics.histogram(
+    "scraper_request_seconds",
+    "Time from sending an HTTP request to reading its response",
+    ("endpoint",),
+)
+
+
+class StreamInterruptedError(aiohttp.ClientPayloadError):
+    """A streamed response that failed after its body had started arriving."""
+
 
 class BaseScraper:
     def __init__(self):
         self.session: Optional[aiohttp.ClientSession] = None
+        self._session_depth = 0  # Nested uses of this scraper as a context
         self.config = config
-        self.semaphore = asyncio.Semaphore(config.scraping.max_concurrent_requests)
+        self.base_url = ""
+        self.retry_policy = RetryPolicy(
+            attempts=config.scraping.retry_attempts,
+            base_delay=config.scraping.retry_delay,
+            max_delay=config.scraping.retry_max_delay,
+        )
+        self.circuit_breakers: Dict[str, CircuitBreaker] = {}
+        self.rate_limiter = rate_limiter  # Shared by all scrapers
 
     async def __aenter__(self) -> "BaseScraper":
-        self.session = aiohttp.ClientSession()
+        self.session = await session_pool.acquire()
+        self._session_depth += 1
         return self
 
     async def __aexit__(
         self,
         exc_type: Optional[type],
-        exc_val: Optional[Exception],
+        exc_val: Optional[BaseException],
         exc_tb: Optional[Any],
     ) -> None:
-        if self.session:
-            await self.session.close()
+        if self._session_depth:
+            self._session_depth -= 1
+            if not self._session_depth:
+                self.session = None
+            await session_pool.release()
+
+    def _circuit_breaker(self, url: str) -> CircuitBreaker:
+        """Get the circuit breaker shared by all requests to the URL's host."""
+        host = urlsplit(url).netloc
+        if host not in self.circuit_breakers:
+            self.circuit_breakers[host] = CircuitBreaker(
+                host,
+                failure_threshold=self.config.scraping.circuit_failure_threshold,
+                reset_timeout=self.config.scraping.circuit_reset_timeout,
+            )
+        return self.circuit_breakers[host]
+
+    def _limiter(self, url: str) -> AdaptiveLimiter:
+        """Get the concurrency limiter shared by all scrapers for the URL's host."""
+        return host_limiters.get(urlsplit(url).netloc)
+
+    @property
+    def limiter(self) -> AdaptiveLimiter:
+        """Concurrency limiter of the scraper's site."""
+        return self._limiter(self.base_url)
+
+    def _record_request(
+        self,
+        url: str,
+        status: str,
+        started: Optional[float] = None,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        """Count a request and time it if the server answered."""
+        endpoint = urlsplit(url).path.rsplit("/", 1)[-1]
+        REQUESTS.inc(endpoint=endpoint, status=status)
+        answered = error is None or isinstance(error, aiohttp.ClientResponseError)
+        if started is not None and answered:
+            REQUEST_SECONDS.observe(time.monotonic() - started, endpoint=endpoint)
+
+    async def _retry_or_raise(
+        self, breaker: CircuitBreaker, attempt: int, error: BaseException
+    ) -> None:
+        """
+        Handle a failed attempt: raise the error if the request should not
+        be retried, otherwise wait before the next attempt.
+
+        The wait happens outside the request slot, so other requests can use
+        the capacity in the meantime.
+        """
+        policy = self.retry_policy
+        if not policy.is_retryable(error):
+            breaker.record_success()  # The host answered, just not with a page
+            raise error
+
+        breaker.record_failure()
+        if attempt + 1 >= policy.attempts:
+            raise error
+
+        delay = policy.delay(attempt, error)
+        logger.warning(
+            f"Request failed (attempt {attempt + 1}/{policy.attempts}): "
+            f"{str(error) or type(error).__name__}, retrying in {delay:.1f}s"
+        )
+        await asyncio.sleep(delay)
 
     async def _make_request(
         self,
@@ -39,9 +135,14 @@ class BaseScraper:
                 "Session not initialized. Use async with context manager."
             )
 
-        async with self.semaphore:
-            for attempt in range(self.config.scraping.retry_attempts):
-                try:
+        breaker = self._circuit_breaker(url)
+        for attempt in range(self.retry_policy.attempts):
+            await breaker.wait()
+            # The slot is only held while the request is in flight
+            slot = self._limiter(url).slot()
+            try:
+                await self.rate_limiter.acquire()
+                async with slot:
                     async with self.session.request(
                         method=method,
                         url=url,
@@ -50,15 +151,86 @@ class BaseScraper:
                         timeout=self.config.scraping.request_timeout,
                     ) as response:
                         response.raise_for_status()
-                        return await response.text()
-
-                except aiohttp.ClientError as e:
-                    logger.warning(
-                        f"Request failed (attempt {attempt + 1}/"
-                        f"{self.config.scraping.retry_attempts}): {str(e)}"
-                    )
-                    if attempt + 1 == self.config.scraping.retry_attempts:
-                        raise
-                    await asyncio.sleep(self.config.scraping.retry_delay)
-
-            raise RuntimeError("Max retry attempts reached")
+                        content = await response.text()
+                breaker.record_success()
+                self._record_request(url, str(response.status), slot.started)
+                return content
+
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self._record_request(url, _error_status(e), slot.started, e)
+                await self._retry_or_raise(breaker, attempt, e)
+            finally:
+                breaker.release()
+
+        raise RuntimeError("Max retry attempts reached")
+
+    async def _stream_request(
+        self,
+        url: str,
+        method: str = "GET",
+        data: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        chunk_size: int = 64 * 1024,
+    ) -> AsyncIterator[str]:
+        """
+        Make an HTTP request and yield the decoded body in chunks as it arrives.
+
+        Failures before the first chunk is yielded are retried like in
+        _make_request; once the body has started streaming they are raised
+        as StreamInterruptedError, as only the caller can start over.
+
+        request_timeout bounds connecting and each wait for data, not the
+        whole download: a slow consumer pauses reading without timing out.
+        """
+        if not self.session:
+            raise RuntimeError(
+                "Session not initialized. Use async with context manager."
+            )
+
+        request_timeout = self.config.scraping.request_timeout
+        timeout = aiohttp.ClientTimeout(
+            total=None, sock_connect=request_timeout, sock_read=request_timeout
+        )
+        breaker = self._circuit_breaker(url)
+        for attempt in range(self.retry_policy.attempts):
+            await breaker.wait()
+            streaming = False
+            try:
+                await self.rate_limiter.acquire()
+                # Long downloads say nothing about latency, so they are untimed
+                async with self._limiter(url).slot(timed=False):
+                    async with self.session.request(
+                        method=method,
+                        url=url,
+                        data=data,
+                        headers=headers,
+                        timeout=timeout,
+                    ) as response:
+                        response.raise_for_status()
+                        breaker.record_success()
+                        self._record_request(url, str(response.status))
+                        decoder = codecs.getincrementaldecoder(
+                            response.charset or "utf-8"
+                        )(errors="replace")
+                        streaming = True
+                        async for chunk in response.content.iter_chunked(chunk_size):
+                            yield decoder.decode(chunk)
+                        yield decoder.decode(b"", final=True)
+                        return
+
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if streaming:
+                    raise StreamInterruptedError(str(e) or type(e).__name__) from e
+                self._record_request(url, _error_status(e))
+                await self._retry_or_raise(breaker, attempt, e)
+            finally:
+                breaker.release()
+
+        raise RuntimeError("Max retry attempts reached")
+
+
+def _error_status(error: BaseException) -> str:
+    """Status label of a failed request: the HTTP status, or the error type."""
+    if isinstance(error, aiohttp.ClientResponseError):
+        return str(error.status)
+    return type(error).__name__
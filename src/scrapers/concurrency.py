@@ -0,0 +1,210 @@
+import asyncio
+import time
+import weakref
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+import aiohttp
+from loguru import logger
+
+from config.config import config
+
+from ..utils.metrics import metrics
+
+CONCURRENCY_LIMIT = metrics.gauge(
+    "scraper_concurrency_limit", "Adaptive limit of requests in flight", ("host",)
+)
+IN_FLIGHT = metrics.gauge(
+    "scraper_requests_in_flight", "HTTP requests in flight", ("host",)
+)
+
+# Response statuses that mean the server is overloaded
+OVERLOAD_STATUSES = {429, 500, 502, 503, 504}
+
+
+def is_overload(error: Optional[BaseException]) -> bool:
+    """Whether a request error suggests the server is overloaded."""
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status in OVERLOAD_STATUSES
+    return isinstance(
+        error,
+        (asyncio.TimeoutError, aiohttp.ServerDisconnectedError, aiohttp.ClientOSError),
+    )
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency limit that adapts to the server, AIMD style.
+
+    Every request that completes in time raises the limit by 1/limit, so
+    it grows by one slot per round trip. A timeout, a 429/5xx
+    response or a response slower than latency_threshold halves it
+    (by decrease_factor), once per round trip: requests already in flight
+    when the limit was cut do not cut it again.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        min_limit: int,
+        max_limit: int,
+        latency_threshold: float,
+        decrease_factor: float = 0.5,
+        window: float = 10.0,
+    ):
+        """
+        Args:
+            initial: Starting limit
+            min_limit: The limit never drops below this
+            max_limit: The limit never grows above this
+            latency_threshold: Seconds after which a response counts as slow
+            decrease_factor: Multiplier applied to the limit on overload
+            window: Seconds of completed requests used for the throughput
+        """
+        self.min_limit = min_limit
+        self.max_limit = max(max_limit, min_limit)
+        self.limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.latency_threshold = latency_threshold
+        self.decrease_factor = decrease_factor
+        self.window = window
+        self.in_flight = 0
+        self.successes = 0
+        self.overloads = 0
+        self._last_decrease = 0.0
+        self._completed: Deque[float] = deque()
+        self._condition = asyncio.Condition()
+
+    def slot(self, timed: bool = True) -> "_Slot":
+        """
+        Reserve a request slot for the duration of an ``async with`` block.
+
+        The outcome of the block (its duration, or the exception it raised)
+        adjusts the limit. Pass timed=False for requests whose duration says
+        nothing about the server, like long streamed downloads.
+        """
+        return _Slot(self, timed)
+
+    @property
+    def throughput(self) -> float:
+        """Requests completed per second over the last window."""
+        self._expire(time.monotonic())
+        return len(self._completed) / self.window
+
+    def metrics(self) -> Dict[str, float]:
+        """Current state of the limiter."""
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "throughput": self.throughput,
+            "successes": self.successes,
+            "overloads": self.overloads,
+        }
+
+    async def _acquire(self) -> None:
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def _release(
+        self, started: float, timed: bool, error: Optional[BaseException]
+    ) -> None:
+        now = time.monotonic()
+        async with self._condition:
+            self.in_flight -= 1
+            self._record(started, now, timed, error)
+            self._condition.notify_all()
+
+    def _record(
+        self,
+        started: float,
+        now: float,
+        timed: bool,
+        error: Optional[BaseException],
+    ) -> None:
+        """Adjust the limit for the outcome of a request."""
+        overloaded = is_overload(error) or (
+            timed and error is None and now - started > self.latency_threshold
+        )
+        if error is None:
+            self.successes += 1
+            self._completed.append(now)
+            self._expire(now)
+
+        if overloaded:
+            self.overloads += 1
+            # Only the first overload of a round trip cuts the limit
+            if started >= self._last_decrease:
+                self._last_decrease = now
+                self._set_limit(self.limit * self.decrease_factor)
+        elif error is None:
+            self._set_limit(self.limit + 1 / int(self.limit))
+
+    def _set_limit(self, limit: float) -> None:
+        previous = int(self.limit)
+        self.limit = min(max(limit, self.min_limit), self.max_limit)
+        if int(self.limit) != previous:
+            logger.debug(
+                f"Concurrency limit {previous} -> {int(self.limit)} "
+                f"({self.throughput:.1f} req/s)"
+            )
+
+    def _expire(self, now: float) -> None:
+        while self._completed and self._completed[0] < now - self.window:
+            self._completed.popleft()
+
+
+class _Slot:
+    """A request slot held for the duration of an ``async with`` block."""
+
+    def __init__(self, limiter: AdaptiveLimiter, timed: bool):
+        self.limiter = limiter
+        self.timed = timed
+        self.started = 0.0
+
+    async def __aenter__(self) -> "_Slot":
+        await self.limiter._acquire()
+        self.started = time.monotonic()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[type],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[Any],
+    ) -> None:
+        await self.limiter._release(self.started, self.timed, exc_val)
+
+
+class HostLimiters:
+    """
+    Adaptive limiters shared by all scrapers, one per host, so that
+    max_concurrent_requests bounds the requests in flight to a host
+    whichever scrapers send them.
+
+    Limiters wait on asyncio primitives, so each event loop has its own.
+    """
+
+    def __init__(self) -> None:
+        self._limiters: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, Dict[str, AdaptiveLimiter]
+        ] = weakref.WeakKeyDictionary()
+
+    def get(self, host: str) -> AdaptiveLimiter:
+        """Get the limiter of a host, creating it from the config."""
+        limiters = self._limiters.setdefault(asyncio.get_running_loop(), {})
+        if host not in limiters:
+            scraping = config.scraping
+            limiter = AdaptiveLimiter(
+                initial=scraping.initial_concurrent_requests,
+                min_limit=scraping.min_concurrent_requests,
+                max_limit=scraping.max_concurrent_requests,
+                latency_threshold=scraping.latency_threshold,
+            )
+            CONCURRENCY_LIMIT.track(lambda: int(limiter.limit), host=host)
+            IN_FLIGHT.track(lambda: limiter.in_flight, host=host)
+            limiters[host] = limiter
+        return limiters[host]
+
+
+# Global per-host limiters shared by all scrapers
+host_limiters = HostLimiters()
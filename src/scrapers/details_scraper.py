@@ -1,17 +1,38 @@
 import asyncio
-from typing import Dict, List, Optional
+from contextlib import AsyncExitStack, aclosing
+from typing import (
+    AsyncGenerator,
+    AsyncIterator,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+)
 
 from loguru import logger
 
+from ..utils.iterables import AnyIterable, aiter_items
+from ..utils.page_store import RawPageStore
 from .base_scraper import BaseScraper
 
 
+class PageResult(NamedTuple):
+    """The outcome of fetching one page: its HTML, or the error it failed with."""
+
+    school_id: str
+    content: Optional[str]
+    error: Optional[BaseException] = None
+
+
 class DetailsScraper(BaseScraper):
     """Scraper for school details from the education ministry website."""
 
-    def __init__(self):
+    def __init__(self, page_store: Optional[RawPageStore] = None):
         super().__init__()
-        self.base_url = "https://www.educacion.gob.es/centros/detalleCentro"
+        self.page_store = page_store
+        self.base_url = self.config.api.details_url
         self.headers = {
             "Content-Type": "application/x-www-form-urlencoded",
             "User-Agent": (
@@ -47,22 +68,65 @@ class DetailsScraper(BaseScraper):
             The HTML content of the school details page if successful, None otherwise.
         """
         try:
-            logger.debug(f"Scraping school {school_id}")
-            payload = self._build_payload(school_id)
-            content = await self._make_request(
-                url=self.base_url,
-                method="POST",
-                data=payload,
-                headers=self.headers,
-            )
-
-            logger.debug(f"Successfully scraped school {school_id}")
-            return content
+            return await self.fetch_school(school_id)
 
         except Exception as e:
             logger.error(f"Error processing school {school_id}: {str(e)}")
             return None
 
+    async def fetch_school(self, school_id: str, use_store: bool = True) -> str:
+        """
+        Get the details page of a school, raising the error if it fails.
+
+        Args:
+            school_id: The ID of the school to scrape.
+            use_store: Whether a page stored less than raw_page_ttl seconds
+                ago may be used instead of fetching it; the page is stored
+                either way.
+
+        Returns:
+            The HTML content of the school details page.
+        """
+        if self.page_store is not None and use_store:
+            content = await self._get_stored_page(school_id)
+            if content is not None:
+                return content
+
+        logger.debug("Scraping school {school_id}", school_id=school_id)
+        payload = self._build_payload(school_id)
+        content = await self._make_request(
+            url=self.base_url,
+            method="POST",
+            data=payload,
+            headers=self.headers,
+        )
+
+        logger.debug("Successfully scraped school {school_id}", school_id=school_id)
+        if self.page_store is not None:
+            await self._store_page(school_id, content)
+        return content
+
+    async def _get_stored_page(self, school_id: str) -> Optional[str]:
+        """Get the stored page of a school if it is within the configured TTL."""
+        assert self.page_store is not None
+        ttl = self.config.storage.raw_page_ttl
+        if not await self.page_store.ais_fresh(school_id, ttl):
+            return None
+        content = await self.page_store.aget(school_id)
+        if content is not None:
+            logger.debug(
+                "Using stored page for school {school_id}", school_id=school_id
+            )
+        return content
+
+    async def _store_page(self, school_id: str, content: str) -> None:
+        """Archive a fetched page; failing to store it must not lose the page."""
+        assert self.page_store is not None
+        try:
+            await self.page_store.aput(school_id, content)
+        except OSError as e:
+            logger.warning(f"Could not store page for school {school_id}: {str(e)}")
+
     async def process_batch(self, school_ids: List[str]) -> Dict[str, str]:
         """
         Process a batch of schools concurrently.
@@ -70,35 +134,165 @@ class DetailsScraper(BaseScraper):
         Returns:
             Dictionary mapping school IDs to their HTML content
         """
-        async with self:  # This will create and close the aiohttp session
-            tasks = [self.scrape_school(school_id) for school_id in school_ids]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-
-            return {
-                school_id: result
-                for school_id, result in zip(school_ids, results)
-                if isinstance(result, str)
-            }
+        return {
+            school_id: content
+            async for school_id, content in self.iter_pages(
+                school_ids, batch_size=len(school_ids) or 1
+            )
+        }
+
+    async def iter_pages(
+        self,
+        school_ids: AnyIterable[str],
+        window: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        session_per_batch: Optional[bool] = None,
+    ) -> AsyncIterator[Tuple[str, str]]:
+        """
+        Fetch school pages, yielding them as they arrive.
+
+        Fetches are windowed and batched like in iter_results. Schools that
+        fail are logged and skipped.
+
+        Args:
+            school_ids: IDs of the schools to fetch, as a list or a stream
+            window: Max fetches in flight (defaults to config)
+            batch_size: Schools per batch (defaults to config)
+            session_per_batch: Whether each batch gets a fresh HTTP session
+                instead of sharing one for the whole run (defaults to config)
+
+        Yields:
+            Tuples of school ID and HTML content, in completion order
+        """
+        async with aclosing(
+            self.iter_results(school_ids, window, batch_size, session_per_batch)
+        ) as results:
+            async for school_id, content, error in results:
+                if content is not None:
+                    yield school_id, content
+                else:
+                    logger.error(f"Error processing school {school_id}: {str(error)}")
+
+    async def iter_results(
+        self,
+        school_ids: AnyIterable[str],
+        window: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        session_per_batch: Optional[bool] = None,
+        refetch: Optional[Set[str]] = None,
+    ) -> AsyncGenerator[PageResult, None]:
+        """
+        Fetch school pages, yielding the outcome of each as it completes.
 
-    async def run(self, school_ids: Optional[List[str]] = None) -> Dict[str, str]:
+        At most window fetches are in flight at a time, and the next school
+        ID is only taken from school_ids when one completes and its result
+        has been consumed, so memory stays bounded however long the
+        (possibly streamed) input is and a slow consumer slows fetching down.
+
+        Args:
+            school_ids: IDs of the schools to fetch, as a list or a stream
+            window: Max fetches in flight (defaults to config)
+            batch_size: Schools per batch (defaults to config)
+            session_per_batch: Whether each batch gets a fresh HTTP session
+                instead of sharing one for the whole run (defaults to config)
+            refetch: IDs of schools fetched from the site even if a recent
+                page is stored; may be filled in while the IDs are streamed
+
+        Yields:
+            A result per school, with its HTML or error, in completion order
+        """
+        window = window or self.config.scraping.fetch_window
+        batch_size = batch_size or self.config.scraping.fetch_batch_size
+        if session_per_batch is None:
+            session_per_batch = self.config.scraping.session_per_batch
+
+        ids = aiter_items(school_ids)
+        exhausted = False
+        async with AsyncExitStack() as run_stack:
+            if not session_per_batch:
+                await run_stack.enter_async_context(self)
+            batch = 0
+            while not exhausted:
+                batch += 1
+                async with AsyncExitStack() as batch_stack:
+                    if session_per_batch:
+                        await batch_stack.enter_async_context(self)
+                    queued = 0
+                    pending: Set[asyncio.Task[PageResult]] = set()
+                    try:
+                        while True:
+                            while len(pending) < window and queued < batch_size:
+                                school_id = await anext(ids, None)
+                                if school_id is None:
+                                    exhausted = True
+                                    break
+                                queued += 1
+                                use_store = refetch is None or school_id not in refetch
+                                pending.add(
+                                    asyncio.create_task(
+                                        self._fetch_page(school_id, use_store)
+                                    )
+                                )
+                            if not pending:
+                                break
+                            done, pending = await asyncio.wait(
+                                pending, return_when=asyncio.FIRST_COMPLETED
+                            )
+                            for task in done:
+                                yield task.result()
+                    finally:
+                        for task in pending:
+                            task.cancel()
+                if queued:
+                    logger.debug(
+                        "Fetched batch {batch} of {queued} schools",
+                        batch=batch,
+                        queued=queued,
+                    )
+
+    async def _fetch_page(self, school_id: str, use_store: bool) -> PageResult:
+        try:
+            return PageResult(school_id, await self.fetch_school(school_id, use_store))
+        except Exception as e:
+            return PageResult(school_id, None, e)
+
+    async def run(
+        self,
+        school_ids: Optional[AnyIterable[str]] = None,
+        batch_size: Optional[int] = None,
+        window: Optional[int] = None,
+        session_per_batch: Optional[bool] = None,
+    ) -> Dict[str, str]:
         """
         Main entry point for the scraper.
 
         Args:
-            school_ids: List of school IDs to scrape.
+            school_ids: IDs of the schools to scrape, as a list or a stream
+            batch_size: Schools per batch (defaults to config)
+            window: Max fetches in flight (defaults to config)
+            session_per_batch: Whether each batch gets a fresh HTTP session
+                (defaults to config)
 
         Returns:
             Dictionary mapping school IDs to their HTML content
         """
-        if not school_ids:
-            school_ids = []
+        total_schools = 0
+
+        async def counted() -> AsyncIterator[str]:
+            nonlocal total_schools
+            async for school_id in aiter_items(school_ids or []):
+                total_schools += 1
+                yield school_id
 
         try:
-            total_schools = len(school_ids)
-            logger.info(f"Starting to scrape {total_schools} schools")
+            logger.info("Starting to scrape schools")
 
-            all_results = {}
-            all_results = await self.process_batch(school_ids)
+            all_results = {
+                school_id: content
+                async for school_id, content in self.iter_pages(
+                    counted(), window, batch_size, session_per_batch
+                )
+            }
 
             logger.success(
                 f"Successfully processed {len(all_results)} "
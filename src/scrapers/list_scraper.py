@@ -1,100 +1,231 @@
-from typing import List
+import asyncio
+from typing import AsyncIterator, Dict, List, Set, Tuple
 
-from bs4 import BeautifulSoup
 from loguru import logger
 
-from .base_scraper import BaseScraper
+from ..parsers.list_parser import SchoolListing, SchoolListParser
+from .base_scraper import BaseScraper, StreamInterruptedError
+
+# INE province codes, 01 (Araba/Álava) to 52 (Melilla)
+PROVINCE_CODES = tuple(f"{code:02d}" for code in range(1, 53))
+
+# A slice of the search results: (province code, naturaleza code)
+Shard = Tuple[str, str]
+
+SHARDING_MODES = ("none", "province", "province_naturaleza")
 
 
 class ListScraper(BaseScraper):
     """Scraper for getting the list of all schools
     from the education ministry website."""
 
-    def __init__(self):
+    def __init__(self, sharding: str = "none"):
+        """
+        Args:
+            sharding: How to split the search: 'none' for a single request
+                for the whole country, 'province' for one request per
+                province, or 'province_naturaleza' for one request per
+                province and type of school
+        """
         super().__init__()
-        self.base_url = "https://www.educacion.gob.es/centros/buscarCentros"
+        if sharding not in SHARDING_MODES:
+            raise ValueError(f"Unknown list sharding mode: {sharding}")
+        self.sharding = sharding
+        self.base_url = self.config.api.base_url
         self.headers = {"Content-Type": "application/x-www-form-urlencoded"}
 
-    def _build_payload(self) -> dict:
-        """Build the payload for the request to get all schools."""
+    def _build_payload(self, province: str = "00", naturaleza: str = "0") -> dict:
+        """Build the payload for the request to get all schools in a shard."""
         return {
-            "ssel_natur": "0",  # All types (public, private, etc.)
-            "comboprov": "00",  # All provinces
+            "ssel_natur": naturaleza,  # "0" for all types (public, private, etc.)
+            "comboprov": province,  # "00" for all provinces
             "comboens": "0",  # All education levels
             "nombreCentro": "",  # No specific name filter
             "tipocentro": "0",  # All center types
             "combofami": "0",  # All families
             "combomodalidad": "0",  # All modalities
             "selectRegCap": "0",  # All regions/capitals
-            "codprov": "00",  # All provinces (again)
+            "codprov": province,  # Same as comboprov
             "combopais": "0",  # Spain
             "submitBuscar": "Buscar",  # Search button
         }
 
+    def _shards(self) -> List[Shard]:
+        """List the searches that together cover every school."""
+        if self.sharding == "province":
+            return [(province, "0") for province in PROVINCE_CODES]
+        if self.sharding == "province_naturaleza":
+            return [
+                (province, naturaleza)
+                for province in PROVINCE_CODES
+                for naturaleza in self.config.scraping.list_naturalezas
+            ]
+        return [("00", "0")]
+
     async def _extract_school_ids(self, html_content: str) -> List[str]:
         """Extract school IDs from the search results page."""
         try:
-            logger.debug(f"Processing HTML content with length: {len(html_content)}")
-            soup = BeautifulSoup(html_content, "lxml")
-            school_ids = []
-
-            # Find all tables in the document
-            tables = soup.find_all("table")
-            logger.debug(f"Found {len(tables)} tables in the HTML")
-
-            # Search for the right table with school data
-            school_table = None
-            codigo_index = None
-
-            for table in tables:
-                # Look for the header row with "Código"
-                headers = table.select("th")
-                if not headers:
-                    continue
-
-                for i, header in enumerate(headers):
-                    header_text = header.get_text(strip=True)
-                    if "Código" in header_text or "Código" in header_text:
-                        school_table = table
-                        codigo_index = i
-                        logger.debug(f"Found school table with 'Código' in column {i}")
-                        break
-
-                if school_table:
-                    break
-
-            if not school_table:
+            logger.debug(
+                "Processing HTML content with length: {length}",
+                length=len(html_content),
+            )
+            parser = SchoolListParser()
+            listings = parser.feed(html_content) + parser.close()
+            school_ids = [listing.id for listing in listings]
+            if not parser.found_table:
                 logger.warning("No table with school data found in the response")
-                return []
-
-            if codigo_index is None:
-                logger.warning(
-                    "Could not determine which column contains the school codes"
-                )
-                return []
-
-            # Extract rows from the table (skip header rows)
-            rows = school_table.select("tbody tr")
-            logger.debug(f"Found {len(rows)} rows in the school table")
-
-            for row in rows:
-                cells = row.select("td")
-                if len(cells) > codigo_index:
-                    school_id = cells[codigo_index].get_text(strip=True)
-                    if school_id:
-                        school_ids.append(school_id)
-                        logger.debug(f"Extracted school ID: {school_id}")
-                        # Log progress every 500 schools
-                        if len(school_ids) % 500 == 0:
-                            logger.info(f"Processed {len(school_ids)} schools...")
-
-            logger.info(f"Extracted {len(school_ids)} school IDs")
+            logger.info("Extracted {count} school IDs", count=len(school_ids))
             return school_ids
 
         except Exception as e:
             logger.error(f"Error extracting school IDs: {str(e)}")
             return []
 
+    async def _stream_shard(self, shard: Shard) -> AsyncIterator[SchoolListing]:
+        """Stream the schools of one search as their rows are downloaded."""
+        parser = SchoolListParser()
+        async for chunk in self._stream_request(
+            url=self.base_url,
+            method="POST",
+            data=self._build_payload(*shard),
+            headers=self.headers,
+        ):
+            for listing in parser.feed(chunk):
+                yield listing
+
+        for listing in parser.close():
+            yield listing
+
+        if not parser.found_table:
+            logger.warning("No table with school data found in the response")
+
+    async def _iter_streamed_listings(
+        self, shard: Shard
+    ) -> AsyncIterator[SchoolListing]:
+        """
+        Stream the schools of a single search, starting it over, up to
+        retry_attempts times, if its response breaks off mid-body. Schools
+        yielded before the break are not yielded again.
+        """
+        seen: Set[str] = set()
+        attempts = self.config.scraping.retry_attempts
+        for attempt in range(1, attempts + 1):
+            try:
+                async for listing in self._stream_shard(shard):
+                    if listing.id not in seen:
+                        seen.add(listing.id)
+                        yield listing
+                return
+            except StreamInterruptedError as e:
+                if attempt >= attempts:
+                    raise RuntimeError(
+                        f"List search failed after {attempt} attempts"
+                    ) from e
+                logger.warning(
+                    f"List search broke off after {len(seen)} schools (attempt "
+                    f"{attempt}/{attempts}), starting over: {str(e)}"
+                )
+                await asyncio.sleep(self.config.scraping.retry_delay)
+
+    async def _fetch_shard(self, shard: Shard, delay: float = 0) -> List[SchoolListing]:
+        """Fetch all schools of one search, after an optional delay."""
+        if delay:
+            await asyncio.sleep(delay)
+        return [listing async for listing in self._stream_shard(shard)]
+
+    async def _iter_sharded_listings(
+        self, shards: List[Shard]
+    ) -> AsyncIterator[SchoolListing]:
+        """
+        Run the searches concurrently and yield new schools as each completes.
+
+        Concurrency is bounded by the request limiter. A search whose
+        response breaks off mid-body is retried on its own, up to
+        retry_attempts times, without repeating the searches that already
+        succeeded. Other failures were already retried by _stream_request
+        and end the scrape.
+        """
+        seen: Set[str] = set()
+        failures: Dict[Shard, int] = {}
+        tasks = {
+            asyncio.create_task(self._fetch_shard(shard)): shard for shard in shards
+        }
+
+        try:
+            while tasks:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    shard = tasks.pop(task)
+                    try:
+                        listings = task.result()
+                    except StreamInterruptedError as e:
+                        failures[shard] = failures.get(shard, 0) + 1
+                        if failures[shard] >= self.config.scraping.retry_attempts:
+                            raise RuntimeError(
+                                f"List shard {shard} failed after "
+                                f"{failures[shard]} attempts"
+                            ) from e
+                        logger.warning(
+                            f"List shard {shard} failed (attempt {failures[shard]}/"
+                            f"{self.config.scraping.retry_attempts}): {str(e)}"
+                        )
+                        retry = self._fetch_shard(
+                            shard, delay=self.config.scraping.retry_delay
+                        )
+                        tasks[asyncio.create_task(retry)] = shard
+                        continue
+
+                    new_listings = [
+                        listing for listing in listings if listing.id not in seen
+                    ]
+                    seen.update(listing.id for listing in new_listings)
+                    logger.info(
+                        f"List shard {shard}: {len(listings)} schools, "
+                        f"{len(new_listings)} new ({len(seen)} total, "
+                        f"{len(tasks)} shards pending)"
+                    )
+                    for listing in new_listings:
+                        yield listing
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def iter_listings(self) -> AsyncIterator[SchoolListing]:
+        """
+        Stream the schools in the search results, one record per table row.
+
+        Without sharding, the single response body is parsed as it is
+        downloaded and each school is yielded as soon as its row is
+        complete; a body that breaks off is requested again and the schools
+        already yielded are skipped. With sharding, the searches run in parallel and the
+        deduplicated schools of each one are yielded as soon as it finishes.
+        Either way callers can start working on the first schools before
+        the whole list has arrived.
+        """
+        shards = self._shards()
+        count = 0
+
+        async with self:  # This will create and close the aiohttp session
+            if len(shards) == 1:
+                listings = self._iter_streamed_listings(shards[0])
+            else:
+                logger.info(f"Searching schools in {len(shards)} shards")
+                listings = self._iter_sharded_listings(shards)
+
+            async for listing in listings:
+                count += 1
+                # Log progress every 500 schools
+                if count % 500 == 0:
+                    logger.info(f"Processed {count} schools...")
+                yield listing
+
+        logger.info(f"Extracted {count} school IDs")
+
+    async def iter_school_ids(self) -> AsyncIterator[str]:
+        """Stream the IDs of the schools in the search results."""
+        async for listing in self.iter_listings():
+            yield listing.id
+
     async def run(self) -> List[str]:
         """
         Main entry point for the scraper.
@@ -105,17 +236,7 @@ class ListScraper(BaseScraper):
         try:
             logger.info("Starting to fetch list of schools...")
 
-            async with self:  # This will create and close the aiohttp session
-                # Make the initial search request
-                content = await self._make_request(
-                    url=self.base_url,
-                    method="POST",
-                    data=self._build_payload(),
-                    headers=self.headers,
-                )
-
-                # Extract school IDs from the response
-                school_ids = await self._extract_school_ids(content)
+            school_ids = [school_id async for school_id in self.iter_school_ids()]
 
             logger.success(f"Successfully found {len(school_ids)} schools")
             return school_ids
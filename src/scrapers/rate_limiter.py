@@ -0,0 +1,114 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from loguru import logger
+
+from config.config import config
+
+
+class TokenBucket:
+    """
+    Token bucket pacing requests to a steady rate with bounded bursts.
+
+    The bucket holds up to ``burst`` tokens and refills at ``rate`` tokens
+    per second; each request takes one. When the bucket is empty a request
+    reserves the next token and sleeps until it is due, so waiting requests
+    are released one by one at exactly ``rate`` per second.
+
+    With a state file, the bucket level is saved at the end of a run and
+    restored (plus whatever refilled meanwhile) at the start of the next,
+    so restarting does not grant a fresh burst to a server we just drained.
+    """
+
+    def __init__(
+        self, rate: float, burst: int, state_file: Optional[Path] = None
+    ) -> None:
+        """
+        Args:
+            rate: Requests per second; 0 disables rate limiting
+            burst: Requests that may be sent at once after an idle period
+            state_file: JSON file persisting the bucket across runs
+        """
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.state_file = state_file
+        self.tokens = float(self.burst)
+        self.requests = 0
+        self.waited = 0.0
+        self._updated = time.monotonic()
+        self._loaded = state_file is None
+
+    async def acquire(self) -> None:
+        """Wait until a request may be sent."""
+        if self.rate <= 0:
+            return
+        if not self._loaded:
+            self.load()
+
+        delay = self._reserve()
+        self.requests += 1
+        if delay > 0:
+            self.waited += delay
+            await asyncio.sleep(delay)
+
+    def _reserve(self) -> float:
+        """Take a token, possibly one not yet refilled, and return its delay."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self.tokens -= 1
+        return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+    def metrics(self) -> Dict[str, float]:
+        """Current state of the bucket."""
+        return {
+            "rate": self.rate,
+            "tokens": self.tokens,
+            "requests": self.requests,
+            "waited": self.waited,
+        }
+
+    def load(self) -> None:
+        """Restore the bucket level saved by a previous run, if any."""
+        self._loaded = True
+        if self.state_file is None or not self.state_file.exists():
+            return
+        try:
+            state = json.loads(self.state_file.read_text())
+            idle = max(time.time() - state["saved_at"], 0.0)
+            tokens = float(state["tokens"]) + idle * self.rate
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring rate limiter state: {str(e)}")
+            return
+        self.tokens = min(self.burst, tokens)
+        self._updated = time.monotonic()
+        logger.debug(f"Restored rate limiter with {self.tokens:.1f} tokens")
+
+    def save(self) -> None:
+        """Persist the bucket level for the next run."""
+        if self.state_file is None or self.rate <= 0:
+            return
+        self._reserve()  # Bring the level up to date...
+        self.tokens += 1  # ...without taking a token
+        state = {"tokens": self.tokens, "saved_at": time.time()}
+        try:
+            self.state_file.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.state_file.parent)
+            with os.fdopen(fd, "w") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.state_file)
+        except OSError as e:
+            logger.warning(f"Could not save rate limiter state: {str(e)}")
+
+
+# Global rate limiter shared by all scrapers
+rate_limiter = TokenBucket(
+    rate=config.scraping.rate_limit,
+    burst=config.scraping.rate_limit_burst,
+    state_file=config.scraping.rate_limit_state_file,
+)
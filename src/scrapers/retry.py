@@ -0,0 +1,134 @@
+import asyncio
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Optional
+
+import aiohttp
+from loguru import logger
+
+# Client error statuses that are worth retrying
+RETRYABLE_CLIENT_STATUSES = {408, 429}
+
+
+class RetryPolicy:
+    """
+    Decides whether a failed request is retried and how long to wait first.
+
+    Delays grow exponentially from base_delay up to max_delay, with full
+    jitter so that workers failing together do not retry together. A
+    Retry-After header sent by the server takes precedence, up to max_delay.
+    """
+
+    def __init__(self, attempts: int, base_delay: float, max_delay: float):
+        """
+        Args:
+            attempts: Total number of attempts, including the first one
+            base_delay: Upper bound of the delay before the first retry
+            max_delay: Upper bound of any computed delay
+        """
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def is_retryable(self, error: BaseException) -> bool:
+        """Whether a request that failed with this error may succeed later."""
+        if isinstance(error, aiohttp.ClientResponseError):
+            return error.status >= 500 or error.status in RETRYABLE_CLIENT_STATUSES
+        return isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError))
+
+    def delay(self, attempt: int, error: Optional[BaseException] = None) -> float:
+        """Seconds to wait after the given (zero-based) failed attempt."""
+        retry_after = self.retry_after(error)
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        ceiling = min(self.max_delay, self.base_delay * 2**attempt)
+        return random.uniform(0, ceiling)
+
+    @staticmethod
+    def retry_after(error: Optional[BaseException]) -> Optional[float]:
+        """Seconds requested by the Retry-After header of a failed response."""
+        if not isinstance(error, aiohttp.ClientResponseError) or not error.headers:
+            return None
+        value = error.headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class CircuitBreaker:
+    """
+    Pauses all requests to a host that is clearly down.
+
+    After failure_threshold consecutive retryable failures the circuit
+    opens and requests wait for reset_timeout. Then a single probe request
+    is let through: if it succeeds the circuit closes, otherwise it opens
+    again.
+    """
+
+    def __init__(self, host: str, failure_threshold: int, reset_timeout: float):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._prober: Optional["asyncio.Task[Any]"] = None  # Sending the probe
+
+    @property
+    def state(self) -> str:
+        """'closed', 'open' or 'half_open' (waiting for a probe request)."""
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.reset_timeout:
+            return "open"
+        return "half_open"
+
+    async def wait(self) -> None:
+        """Wait until a request to the host may be sent."""
+        while self.opened_at is not None:
+            remaining = self.opened_at + self.reset_timeout - time.monotonic()
+            if remaining <= 0 and self._prober is None:
+                self._prober = asyncio.current_task()
+                return
+            # Wait out the circuit, or the probe another worker is sending
+            await asyncio.sleep(remaining if remaining > 0 else self.reset_timeout)
+
+    def record_success(self) -> None:
+        """Close the circuit: the host answered."""
+        if self.opened_at is not None:
+            logger.info(f"Circuit for {self.host} closed, resuming requests")
+        self.failures = 0
+        self.opened_at = None
+        self._prober = None
+
+    def record_failure(self) -> None:
+        """Count a retryable failure, opening the circuit past the threshold."""
+        self.failures += 1
+        if self._prober is not None or (
+            self.opened_at is None and self.failures >= self.failure_threshold
+        ):
+            self._prober = None
+            self.opened_at = time.monotonic()
+            logger.warning(
+                f"Circuit for {self.host} opened after {self.failures} failures, "
+                f"pausing requests for {self.reset_timeout}s"
+            )
+
+    def release(self) -> None:
+        """
+        End the current task's probe if it got no answer, e.g. because it
+        was cancelled, so that another request can probe the host.
+        """
+        if self._prober is not None and self._prober is asyncio.current_task():
+            self._prober = None
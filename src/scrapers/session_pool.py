@@ -0,0 +1,107 @@
+from types import SimpleNamespace
+from typing import Any, Optional
+
+import aiohttp
+from loguru import logger
+
+from config.config import config
+
+
+class SessionPool:
+    """
+    Process-wide aiohttp session shared by all scrapers.
+
+    The session is opened by the first user and closed when the last one
+    releases it, so scrapers that run at the same time (e.g. the list and
+    details scrapers while IDs are streamed) reuse the same warm keep-alive
+    connections, and each host costs a handful of TLS handshakes per run.
+    Hold the pool open with ``async with session_pool`` to share it across
+    scrapers that run one after the other.
+    """
+
+    def __init__(self):
+        self.session: Optional[aiohttp.ClientSession] = None
+        self._users = 0
+        self.requests = 0
+        self.connections = 0
+
+    async def __aenter__(self) -> aiohttp.ClientSession:
+        return await self.acquire()
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[type],
+        exc_val: Optional[Exception],
+        exc_tb: Optional[Any],
+    ) -> None:
+        await self.release()
+
+    async def acquire(self) -> aiohttp.ClientSession:
+        """Get the shared session, opening it if this is the first user."""
+        if self.session is None or self.session.closed:
+            self.session = self._create_session()
+            self.requests = 0
+            self.connections = 0
+        self._users += 1
+        return self.session
+
+    async def release(self) -> None:
+        """Give back the session, closing it if this was the last user."""
+        self._users -= 1
+        if self._users > 0 or self.session is None:
+            return
+
+        await self.session.close()
+        self.session = None
+        logger.debug(
+            f"Closed HTTP session after {self.requests} requests "
+            f"over {self.connections} connections"
+        )
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        """Open a session with the connection settings from the config."""
+        scraping = config.scraping
+        connector = aiohttp.TCPConnector(
+            limit=scraping.connection_limit,
+            limit_per_host=scraping.connection_limit_per_host,
+            keepalive_timeout=scraping.keepalive_timeout,
+            use_dns_cache=True,
+            ttl_dns_cache=scraping.dns_cache_ttl,
+        )
+
+        # Count new connections to check that keep-alive is effective
+        trace_config = aiohttp.TraceConfig()
+        # (aiohttp's signal annotations reject valid callbacks, hence the ignores)
+        trace_config.on_request_start.append(
+            self._on_request_start  # type: ignore[arg-type]
+        )
+        trace_config.on_connection_create_end.append(
+            self._on_connection_created  # type: ignore[arg-type]
+        )
+
+        # aiohttp asks for gzip/deflate (and br if Brotli is installed) itself
+        headers = {} if scraping.compression else {"Accept-Encoding": "identity"}
+
+        return aiohttp.ClientSession(
+            connector=connector, headers=headers, trace_configs=[trace_config]
+        )
+
+    async def _on_request_start(
+        self,
+        session: aiohttp.ClientSession,
+        context: SimpleNamespace,
+        params: aiohttp.TraceRequestStartParams,
+    ) -> None:
+        self.requests += 1
+
+    async def _on_connection_created(
+        self,
+        session: aiohttp.ClientSession,
+        context: SimpleNamespace,
+        params: aiohttp.TraceConnectionCreateEndParams,
+    ) -> None:
+        self.connections += 1
+
+
+# Global session pool instance
+session_pool = SessionPool()
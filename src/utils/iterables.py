@@ -0,0 +1,16 @@
+from typing import AsyncIterable, AsyncIterator, Iterable, TypeVar, Union
+
+T = TypeVar("T")
+
+# Items given as a list or as a stream, e.g. ListScraper.iter_school_ids()
+AnyIterable = Union[Iterable[T], AsyncIterable[T]]
+
+
+async def aiter_items(items: AnyIterable[T]) -> AsyncIterator[T]:
+    """Iterate over items whether they are a list or a stream."""
+    if isinstance(items, AsyncIterable):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
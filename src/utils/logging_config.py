@@ -0,0 +1,71 @@
+import json
+import sys
+import traceback
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from loguru import logger
+
+if TYPE_CHECKING:
+    from loguru import Record
+
+CONSOLE_FORMAT = (
+    "<green>{time:YYYY-MM-DD HH:mm:ss}</green>"
+    "| <level>{level: <8}</level> "
+    "| <cyan>{name}</cyan>:<cyan>{function}</cyan>:"
+    "<cyan>{line}</cyan> - <level>{message}</level>"
+)
+
+# Key of the record's extra fields holding its JSON line while it is written
+_JSON_KEY = "_json"
+
+
+def configure_logging(level: str = "INFO", json_file: Optional[Path] = None) -> None:
+    """
+    Log to stderr and, optionally, as JSON lines to a file.
+
+    The file is written by a background thread fed through a queue, so a
+    slow disk never blocks the event loop. Hot paths should pass values as
+    arguments instead of f-strings, as in
+    ``logger.debug("Saved {count} schools", count=saved)``: the message is
+    then only formatted if some handler accepts the level, and the values
+    become fields of the JSON line.
+
+    Args:
+        level: Lowest level logged, for both handlers
+        json_file: File to append JSON lines to, if any
+    """
+    logger.remove()
+    logger.add(sys.stderr, format=CONSOLE_FORMAT, level=level, colorize=True)
+    if json_file is not None:
+        json_file.parent.mkdir(parents=True, exist_ok=True)
+        logger.add(json_file, format=_json_format, level=level, enqueue=True)
+
+
+def json_event(record: "Record") -> Dict[str, Any]:
+    """The fields of a log record written to its JSON line."""
+    event = {
+        "time": record["time"].isoformat(),
+        "level": record["level"].name,
+        "logger": record["name"],
+        "function": record["function"],
+        "line": record["line"],
+        "process": record["process"].id,
+        "message": record["message"],
+    }
+    event.update(
+        (key, value) for key, value in record["extra"].items() if key != _JSON_KEY
+    )
+    if record["exception"] is not None:
+        event["exception"] = "".join(
+            traceback.format_exception(*record["exception"])
+        ).rstrip()
+    return event
+
+
+def _json_format(record: "Record") -> str:
+    # Serialized here and written by the handler's queue thread
+    record["extra"][_JSON_KEY] = json.dumps(
+        json_event(record), ensure_ascii=False, default=str
+    )
+    return "{extra[%s]}\n" % _JSON_KEY
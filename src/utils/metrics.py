@@ -0,0 +1,380 @@
+import bisect
+import json
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+)
+
+from aiohttp import web
+from loguru import logger
+
+# Values of a metric's labels, in the order of its label names
+LabelValues = Tuple[str, ...]
+
+# Upper bounds of the histogram buckets, in seconds
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+
+# Content type of the Prometheus text exposition format
+TEXT_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Quantiles reported in the JSON summary
+SUMMARY_QUANTILES = (0.5, 0.95, 0.99)
+
+M = TypeVar("M", bound="Metric")
+
+
+class Metric(ABC):
+    """A named metric with a value per combination of label values."""
+
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def _label_dict(self, key: LabelValues) -> Dict[str, str]:
+        return dict(zip(self.labels, key))
+
+    def _format(self, key: LabelValues, extra: Optional[Dict[str, str]] = None) -> str:
+        labels = {**self._label_dict(key), **(extra or {})}
+        if not labels:
+            return ""
+        pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+        return f"{{{pairs}}}"
+
+    @abstractmethod
+    def reset(self) -> None:
+        """Drop all recorded values."""
+
+    @abstractmethod
+    def render(self) -> Iterator[str]:
+        """Sample lines in the Prometheus text format."""
+
+    @abstractmethod
+    def summarize(self, elapsed: float) -> List[Dict[str, Any]]:
+        """Values by label combination, for the JSON summary."""
+
+
+class Counter(Metric):
+    """A count that only goes up, like requests sent."""
+
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self.values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def reset(self) -> None:
+        self.values.clear()
+
+    def render(self) -> Iterator[str]:
+        for key, value in self.values.items():
+            yield f"{self.name}{self._format(key)} {value:g}"
+
+    def summarize(self, elapsed: float) -> List[Dict[str, Any]]:
+        return [
+            {
+                "labels": self._label_dict(key),
+                "value": value,
+                "per_sec": value / elapsed if elapsed else 0.0,
+            }
+            for key, value in self.values.items()
+        ]
+
+
+class Gauge(Metric):
+    """
+    A value that goes up and down, like a queue depth.
+
+    Values are either set, or read from a tracked function when the metrics
+    are collected, so that tracking costs nothing in between.
+    """
+
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self.values: Dict[LabelValues, float] = {}
+        self.functions: Dict[LabelValues, Callable[[], float]] = {}
+
+    def set(self, value: float, **labels: Any) -> None:
+        self.values[self._key(labels)] = value
+
+    def track(self, function: Callable[[], float], **labels: Any) -> None:
+        """Read the value from function whenever the metrics are collected."""
+        self.functions[self._key(labels)] = function
+
+    def untrack(self, **labels: Any) -> None:
+        """Keep the last value read from a tracked function."""
+        key = self._key(labels)
+        function = self.functions.pop(key, None)
+        if function is not None:
+            self.values[key] = function()
+
+    def collect(self) -> Dict[LabelValues, float]:
+        return {
+            **self.values,
+            **{key: function() for key, function in self.functions.items()},
+        }
+
+    def reset(self) -> None:
+        self.values.clear()
+        self.functions.clear()
+
+    def render(self) -> Iterator[str]:
+        for key, value in self.collect().items():
+            yield f"{self.name}{self._format(key)} {value:g}"
+
+    def summarize(self, elapsed: float) -> List[Dict[str, Any]]:
+        return [
+            {"labels": self._label_dict(key), "value": value}
+            for key, value in self.collect().items()
+        ]
+
+
+class Histogram(Metric):
+    """Distribution of observed values, like request durations, in buckets."""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label combination: a count per bucket plus one for +Inf
+        self.counts: Dict[LabelValues, List[int]] = {}
+        self.sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        counts = self.counts.get(key)
+        if counts is None:
+            counts = self.counts[key] = [0] * (len(self.buckets) + 1)
+            self.sums[key] = 0.0
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sums[key] += value
+
+    def time(self, **labels: Any) -> "_Timer":
+        """Observe the duration of a ``with`` block."""
+        return _Timer(self, labels)
+
+    def quantile(self, q: float, **labels: Any) -> float:
+        """Estimate a quantile, interpolating within its bucket."""
+        return self._quantile(q, self.counts.get(self._key(labels), []))
+
+    def _quantile(self, q: float, counts: List[int]) -> float:
+        total = sum(counts)
+        if not total:
+            return 0.0
+        rank = q * total
+        cumulative = 0
+        for index, count in enumerate(counts):
+            if cumulative + count >= rank and count:
+                if index == len(self.buckets):
+                    return self.buckets[-1]  # Beyond the last bound
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index]
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+    def reset(self) -> None:
+        self.counts.clear()
+        self.sums.clear()
+
+    def render(self) -> Iterator[str]:
+        for key, counts in self.counts.items():
+            cumulative = 0
+            bounds = [f"{bound:g}" for bound in self.buckets] + ["+Inf"]
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                labels = self._format(key, {"le": bound})
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            yield f"{self.name}_sum{self._format(key)} {self.sums[key]:g}"
+            yield f"{self.name}_count{self._format(key)} {cumulative}"
+
+    def summarize(self, elapsed: float) -> List[Dict[str, Any]]:
+        summaries = []
+        for key, counts in self.counts.items():
+            count = sum(counts)
+            summary: Dict[str, Any] = {
+                "labels": self._label_dict(key),
+                "count": count,
+                "sum": self.sums[key],
+                "mean": self.sums[key] / count if count else 0.0,
+                "per_sec": count / elapsed if elapsed else 0.0,
+            }
+            for q in SUMMARY_QUANTILES:
+                summary[f"p{round(q * 100)}"] = self._quantile(q, counts)
+            summaries.append(summary)
+        return summaries
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: Dict[str, Any]):
+        self.histogram = histogram
+        self.labels = labels
+        self.started = 0.0
+
+    def __enter__(self) -> "_Timer":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+
+
+class MetricsRegistry:
+    """The metrics of the process, exported as text or as a JSON summary."""
+
+    def __init__(self) -> None:
+        self.metrics: Dict[str, Metric] = {}
+        self.started = time.monotonic()
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, help, labels)
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge, name, help, labels)
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram, name, help, labels, buckets=buckets)
+
+    def _register(
+        self, cls: Type[M], name: str, help: str, labels: Sequence[str], **kwargs: Any
+    ) -> M:
+        metric = self.metrics.get(name)
+        if metric is None:
+            metric = self.metrics[name] = cls(name, help, labels, **kwargs)
+        if not isinstance(metric, cls):
+            raise ValueError(f"Metric {name} is already registered as a {metric.type}")
+        return metric
+
+    def reset(self) -> None:
+        """Forget all values, e.g. at the start of a run."""
+        for metric in self.metrics.values():
+            metric.reset()
+        self.started = time.monotonic()
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> Dict[str, Any]:
+        """All metrics with rates and quantiles, since the last reset."""
+        elapsed = time.monotonic() - self.started
+        return {
+            "elapsed": elapsed,
+            "metrics": {
+                name: {
+                    "type": metric.type,
+                    "help": metric.help,
+                    "values": metric.summarize(elapsed),
+                }
+                for name, metric in self.metrics.items()
+            },
+        }
+
+    def write_summary(self, path: Path) -> None:
+        """Write the summary as JSON."""
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(self.summary(), indent=2))
+        except OSError as e:
+            logger.warning(f"Could not write metrics summary: {str(e)}")
+            return
+        logger.info(f"Metrics summary written to {path}")
+
+
+class MetricsServer:
+    """
+    Serves the metrics over HTTP while a run is in progress.
+
+    If the port cannot be bound, e.g. because another run is serving on
+    it, a warning is logged and the run goes on without serving metrics.
+    """
+
+    def __init__(self, registry: "MetricsRegistry", host: str, port: int):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.url = ""
+        self._runner: Optional[web.AppRunner] = None
+
+    async def __aenter__(self) -> "MetricsServer":
+        app = web.Application()
+        app.router.add_get("/metrics", self._metrics)
+        app.router.add_get("/metrics.json", self._summary)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        try:
+            await web.TCPSite(self._runner, self.host, self.port).start()
+        except OSError as e:
+            logger.warning(
+                f"Not serving metrics, {self.host}:{self.port} is unavailable: {e}"
+            )
+            await self._runner.cleanup()
+            self._runner = None
+            return self
+        host, port = self._runner.addresses[0][:2]
+        self.url = f"http://{host}:{port}/metrics"
+        logger.info(f"Serving metrics at {self.url}")
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _metrics(self, request: web.Request) -> web.Response:
+        return web.Response(
+            body=self.registry.render().encode(),
+            headers={"Content-Type": TEXT_CONTENT_TYPE},
+        )
+
+    async def _summary(self, request: web.Request) -> web.Response:
+        return web.json_response(self.registry.summary())
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+# Metrics of the process, shared by all modules
+metrics = MetricsRegistry()
@@ -0,0 +1,197 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Iterator, Optional, Set, Tuple
+
+from loguru import logger
+
+from config.config import config
+
+
+@dataclass
+class PageEntry:
+    """Metadata about the stored page of a school."""
+
+    sha256: str
+    fetched_at: str
+    size: int
+
+
+class RawPageStore:
+    """
+    Content-addressed store of raw school detail pages.
+
+    Page bodies are gzip-compressed and stored once per distinct content under
+    ``objects/<hash[:2]>/<hash>.html.gz``. Each school has a small reference
+    file under ``refs/<school_id>.json`` pointing at its latest page, so pages
+    can be looked up by school ID and re-parsed without hitting the network.
+    Objects no reference points to any more, left behind when a school's page
+    changes, are deleted by prune().
+    """
+
+    def __init__(self, root: Optional[Path] = None):
+        self.root = Path(root) if root is not None else config.storage.raw_data_path
+        self.objects_path = self.root / "objects"
+        self.refs_path = self.root / "refs"
+
+    def _object_path(self, sha256: str) -> Path:
+        return self.objects_path / sha256[:2] / f"{sha256}.html.gz"
+
+    def _ref_path(self, school_id: str) -> Path:
+        return self.refs_path / f"{school_id}.json"
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes) -> None:
+        """Write a file so readers never see it partially written."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def put(self, school_id: str, html_content: str) -> PageEntry:
+        """
+        Store the page of a school, replacing any previous version.
+
+        Args:
+            school_id: The ID of the school
+            html_content: The raw HTML of the school details page
+
+        Returns:
+            The metadata of the stored page
+        """
+        body = html_content.encode("utf-8")
+        sha256 = hashlib.sha256(body).hexdigest()
+
+        object_path = self._object_path(sha256)
+        if not object_path.exists():
+            self._write_atomic(object_path, gzip.compress(body, compresslevel=6))
+
+        entry = PageEntry(
+            sha256=sha256,
+            fetched_at=datetime.now(timezone.utc).isoformat(),
+            size=len(body),
+        )
+        self._write_atomic(
+            self._ref_path(school_id), json.dumps(asdict(entry)).encode("utf-8")
+        )
+        return entry
+
+    def get_entry(self, school_id: str) -> Optional[PageEntry]:
+        """Get the metadata of the stored page of a school, if any."""
+        try:
+            return PageEntry(**json.loads(self._ref_path(school_id).read_bytes()))
+        except FileNotFoundError:
+            return None
+
+    def get(self, school_id: str) -> Optional[str]:
+        """
+        Get the stored page of a school.
+
+        Returns:
+            The HTML content, or None if the school has no valid stored page
+        """
+        entry = self.get_entry(school_id)
+        if entry is None:
+            return None
+
+        try:
+            body = gzip.decompress(self._object_path(entry.sha256).read_bytes())
+        except (FileNotFoundError, OSError, EOFError) as e:
+            logger.warning(f"Stored page for school {school_id} is unreadable: {e}")
+            return None
+
+        if hashlib.sha256(body).hexdigest() != entry.sha256:
+            logger.warning(f"Stored page for school {school_id} is corrupted")
+            return None
+        return body.decode("utf-8")
+
+    def is_fresh(self, school_id: str, ttl: int) -> bool:
+        """Check whether a school's page was stored less than ttl seconds ago."""
+        if ttl <= 0:
+            return False
+        entry = self.get_entry(school_id)
+        if entry is None:
+            return False
+        age = datetime.now(timezone.utc) - datetime.fromisoformat(entry.fetched_at)
+        return age < timedelta(seconds=ttl)
+
+    def iter_school_ids(self) -> Iterator[str]:
+        """Iterate over the IDs of all schools with a stored page."""
+        if not self.refs_path.exists():
+            return
+        for ref_path in sorted(self.refs_path.glob("*.json")):
+            yield ref_path.stem
+
+    def prune(self, grace: float = 3600) -> int:
+        """
+        Delete the objects that no school's reference points to.
+
+        Objects written less than grace seconds ago are kept, as another
+        process may be about to write the reference to them.
+
+        Returns:
+            Number of objects deleted
+        """
+        if not self.objects_path.exists():
+            return 0
+        referenced: Set[str] = set()
+        for school_id in self.iter_school_ids():
+            try:
+                entry = self.get_entry(school_id)
+            except (OSError, ValueError, TypeError) as e:
+                logger.warning(f"Not pruning: unreadable ref for {school_id}: {e}")
+                return 0
+            if entry is not None:
+                referenced.add(entry.sha256)
+
+        deleted = 0
+        cutoff = time.time() - grace
+        for object_path in self.objects_path.glob("*/*.html.gz"):
+            sha256 = object_path.name.split(".", 1)[0]
+            if sha256 in referenced:
+                continue
+            try:
+                if object_path.stat().st_mtime > cutoff:
+                    continue
+                object_path.unlink()
+            except FileNotFoundError:
+                continue
+            deleted += 1
+        if deleted:
+            logger.info(f"Pruned {deleted} unreferenced pages from {self.root}")
+        return deleted
+
+    def iter_pages(self) -> Iterator[Tuple[str, str]]:
+        """Iterate over (school_id, html_content) for all stored pages."""
+        for school_id in self.iter_school_ids():
+            html_content = self.get(school_id)
+            if html_content is not None:
+                yield school_id, html_content
+
+    async def aput(self, school_id: str, html_content: str) -> PageEntry:
+        """Store a page without blocking the event loop."""
+        return await asyncio.to_thread(self.put, school_id, html_content)
+
+    async def aget(self, school_id: str) -> Optional[str]:
+        """Get a stored page without blocking the event loop."""
+        return await asyncio.to_thread(self.get, school_id)
+
+    async def ais_fresh(self, school_id: str, ttl: int) -> bool:
+        """Check page freshness without blocking the event loop."""
+        return await asyncio.to_thread(self.is_fresh, school_id, ttl)
+
+    async def aprune(self, grace: float = 3600) -> int:
+        """Prune unreferenced pages without blocking the event loop."""
+        return await asyncio.to_thread(self.prune, grace)
@@ -0,0 +1,397 @@
+import asyncio
+import collections.abc
+import io
+import json
+import marshal
+import multiprocessing.util
+import os
+import pickle
+import pstats
+import shutil
+import sys
+import threading
+import time
+import weakref
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Coroutine, Dict, Generator, List, Optional, Tuple
+
+from loguru import logger
+
+from config.config import config
+
+# A function in a sampled stack: (file name, first line, function name)
+Frame = Tuple[str, int, str]
+# A sampled call stack, outermost frame first
+Stack = Tuple[Frame, ...]
+
+# Stacks sampled in each parser process are left here for the report
+WORKER_SAMPLES_DIR = "workers"
+
+
+@dataclass(frozen=True)
+class SamplingWindow:
+    """When to sample, as wall-clock times shared with the parser processes."""
+
+    interval: float
+    start: float
+    end: Optional[float] = None
+
+
+class StackSampler:
+    """
+    Statistical profiler of one thread.
+
+    A background thread records the call stack of the profiled thread every
+    interval seconds. Unlike cProfile, the profiled code runs at full speed:
+    the cost is one stack walk per sample, not a hook on every call.
+    """
+
+    def __init__(self, thread_id: int, window: SamplingWindow):
+        self.thread_id = thread_id
+        self.window = window
+        self.samples: Counter[Stack] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="stack-sampler", daemon=True
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def _run(self) -> None:
+        window = self.window
+        while not self._stop.wait(window.interval):
+            now = time.time()
+            if now < window.start:
+                continue
+            if window.end is not None and now > window.end:
+                return
+            frame = sys._current_frames().get(self.thread_id)
+            stack: List[Frame] = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                frame = frame.f_back
+            if stack:
+                self.samples[tuple(reversed(stack))] += 1
+
+    def dump(self, path: Path) -> None:
+        """Stop sampling and save the samples for the report."""
+        self.stop()
+        with open(path, "wb") as f:
+            pickle.dump(dict(self.samples), f)
+
+
+def start_worker_sampler(samples_dir: str, window: SamplingWindow) -> None:
+    """Sample the calling process until it exits; used by parser processes."""
+    sampler = StackSampler(threading.get_ident(), window)
+    sampler.start()
+    path = Path(samples_dir) / f"parser-{os.getpid()}.samples"
+    # Pool workers exit through multiprocessing, which runs its finalizers
+    multiprocessing.util.Finalize(sampler, sampler.dump, args=(path,), exitpriority=10)
+
+
+@dataclass
+class TaskStats:
+    """Time the tasks running one coroutine function spent running and waiting."""
+
+    tasks: int = 0
+    steps: int = 0
+    running: float = 0.0
+    lifetime: float = 0.0
+
+    @property
+    def waiting(self) -> float:
+        return max(self.lifetime - self.running, 0.0)
+
+
+class _TimedCoroutine(collections.abc.Coroutine):
+    """Wraps the coroutine of a task, timing each step the event loop runs."""
+
+    def __init__(self, coro: Coroutine[Any, Any, Any], stats: TaskStats):
+        self._coro = coro
+        self._stats = stats
+        self._created = time.perf_counter()
+        self._finished = False
+        stats.tasks += 1
+
+    def send(self, value: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            return self._coro.send(value)
+        except BaseException:
+            self._finish()
+            raise
+        finally:
+            self._stats.running += time.perf_counter() - started
+            self._stats.steps += 1
+
+    def throw(self, *args: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            return self._coro.throw(*args)
+        except BaseException:
+            self._finish()
+            raise
+        finally:
+            self._stats.running += time.perf_counter() - started
+            self._stats.steps += 1
+
+    def close(self) -> None:
+        self._coro.close()
+        self._finish()
+
+    def __await__(self) -> Generator[Any, None, Any]:
+        return self._coro.__await__()
+
+    def _finish(self) -> None:
+        if not self._finished:
+            self._finished = True
+            self._stats.lifetime += time.perf_counter() - self._created
+
+
+class TaskAccounting:
+    """
+    Per coroutine function, time its tasks spent running on the event loop
+    and waiting (for I/O, locks, queues or a busy loop).
+
+    Installed as the task factory, so only tasks created after install()
+    are accounted.
+    """
+
+    def __init__(self) -> None:
+        self.stats: Dict[str, TaskStats] = {}
+        self._live: "weakref.WeakSet[_TimedCoroutine]" = weakref.WeakSet()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def install(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._loop.set_task_factory(self._create_task)  # type: ignore[arg-type]
+
+    def uninstall(self) -> None:
+        if self._loop is not None:
+            self._loop.set_task_factory(None)
+            self._loop = None
+        for coro in list(self._live):
+            coro._finish()  # Account tasks still pending up to now
+
+    def _create_task(
+        self, loop: asyncio.AbstractEventLoop, coro: Any, **kwargs: Any
+    ) -> "asyncio.Task[Any]":
+        name = getattr(coro, "__qualname__", type(coro).__name__)
+        stats = self.stats.setdefault(name, TaskStats())
+        timed = _TimedCoroutine(coro, stats)
+        self._live.add(timed)
+        return asyncio.Task(timed, loop=loop, **kwargs)
+
+
+class Profiler:
+    """
+    Profiles a run: stack samples of the event loop thread and of every
+    parser process started while it is active, and asyncio task accounting.
+
+    On exit it writes, to a new directory under output_path:
+    - profile.prof: all samples merged, loadable with pstats (call counts
+      are sample counts)
+    - stacks.collapsed: the samples as collapsed stacks, for flame graphs
+    - tasks.json: running and waiting time by coroutine function
+    - report.txt: the hottest functions and the task accounting
+    """
+
+    def __init__(
+        self,
+        output_path: Path,
+        interval: float,
+        delay: float = 0,
+        duration: float = 0,
+    ):
+        """
+        Args:
+            output_path: Directory under which each profile gets a directory
+            interval: Seconds between stack samples
+            delay: Seconds after starting before sampling starts
+            duration: Seconds of sampling; 0 samples until the end
+        """
+        self.output_path = output_path
+        self.interval = interval
+        self.delay = delay
+        self.duration = duration
+        self.directory = output_path / datetime.now().strftime("%Y%m%d-%H%M%S")
+        self.window: Optional[SamplingWindow] = None
+        self.tasks = TaskAccounting()
+        self._sampler: Optional[StackSampler] = None
+        self._started = 0.0
+
+    @classmethod
+    def from_config(cls) -> "Profiler":
+        settings = config.profiling
+        return cls(
+            settings.output_path, settings.interval, settings.delay, settings.duration
+        )
+
+    def __enter__(self) -> "Profiler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        """Start profiling; must be called from the event loop thread."""
+        global _active
+        start = time.time() + self.delay
+        self.window = SamplingWindow(
+            self.interval, start, start + self.duration if self.duration else None
+        )
+        (self.directory / WORKER_SAMPLES_DIR).mkdir(parents=True, exist_ok=True)
+        self._sampler = StackSampler(threading.get_ident(), self.window)
+        self._sampler.start()
+        self.tasks.install()
+        self._started = time.perf_counter()
+        _active = self
+        logger.info(f"Profiling every {self.interval * 1000:g}ms into {self.directory}")
+
+    def stop(self) -> None:
+        """Stop profiling and write the report."""
+        global _active
+        _active = None
+        self.tasks.uninstall()
+        if self._sampler is None:
+            return
+        self._sampler.stop()
+        elapsed = time.perf_counter() - self._started
+        samples = {"event-loop": self._sampler.samples}
+        samples.update(self._worker_samples())
+        self._write(samples, elapsed)
+        logger.info(f"Profile written to {self.directory}")
+
+    @property
+    def worker_samples_dir(self) -> str:
+        return str(self.directory / WORKER_SAMPLES_DIR)
+
+    def _worker_samples(self) -> Dict[str, Counter[Stack]]:
+        """Samples left by the parser processes, which have exited by now."""
+        samples = {}
+        samples_dir = self.directory / WORKER_SAMPLES_DIR
+        for path in sorted(samples_dir.glob("*.samples")):
+            try:
+                with open(path, "rb") as f:
+                    samples[path.stem] = Counter(pickle.load(f))
+            except (OSError, pickle.UnpicklingError, EOFError) as e:
+                logger.warning(f"Could not read samples {path.name}: {str(e)}")
+        shutil.rmtree(samples_dir, ignore_errors=True)
+        return samples
+
+    def _write(self, samples: Dict[str, Counter[Stack]], elapsed: float) -> None:
+        merged: Counter[Stack] = Counter()
+        for process_samples in samples.values():
+            merged.update(process_samples)
+        write_pstats(merged, self.interval, self.directory / "profile.prof")
+
+        with open(self.directory / "stacks.collapsed", "w") as f:
+            for process, process_samples in samples.items():
+                for stack, count in process_samples.items():
+                    frames = ";".join(_frame_label(frame) for frame in stack)
+                    f.write(f"{process};{frames} {count}\n")
+
+        tasks = {
+            name: {
+                "tasks": stats.tasks,
+                "steps": stats.steps,
+                "running": stats.running,
+                "waiting": stats.waiting,
+            }
+            for name, stats in sorted(
+                self.tasks.stats.items(), key=lambda item: -item[1].waiting
+            )
+        }
+        (self.directory / "tasks.json").write_text(json.dumps(tasks, indent=2))
+        (self.directory / "report.txt").write_text(
+            self._report(samples, tasks, elapsed)
+        )
+
+    def _report(
+        self,
+        samples: Dict[str, Counter[Stack]],
+        tasks: Dict[str, Dict[str, float]],
+        elapsed: float,
+    ) -> str:
+        out = io.StringIO()
+        out.write(f"Profiled {elapsed:.1f}s, sampling every {self.interval}s\n\n")
+        out.write("Samples by process:\n")
+        for process, process_samples in samples.items():
+            out.write(f"  {process}: {sum(process_samples.values())}\n")
+
+        out.write("\nAsyncio tasks by time waiting (seconds):\n")
+        out.write(f"  {'tasks':>7} {'running':>10} {'waiting':>10}  coroutine\n")
+        for name, stats in list(tasks.items())[:30]:
+            out.write(
+                f"  {stats['tasks']:>7} {stats['running']:>10.2f} "
+                f"{stats['waiting']:>10.2f}  {name}\n"
+            )
+
+        out.write("\nHottest functions, all processes (ncalls are samples):\n")
+        profile = pstats.Stats(str(self.directory / "profile.prof"), stream=out)
+        profile.sort_stats("tottime").print_stats(30)
+        return out.getvalue()
+
+
+def write_pstats(samples: Counter[Stack], interval: float, path: Path) -> None:
+    """
+    Write stack samples in the format of cProfile, so pstats and the tools
+    built on it can read them. Times are samples times the interval.
+    """
+    entries: Dict[Frame, List[Any]] = {}
+    for stack, count in samples.items():
+        seconds = count * interval
+        seen = set()
+        for index, frame in enumerate(stack):
+            entry = entries.setdefault(frame, [0, 0, 0.0, 0.0, {}])
+            if frame not in seen:  # Recursive frames count once per sample
+                seen.add(frame)
+                entry[0] += count
+                entry[1] += count
+                entry[3] += seconds
+            leaf = index == len(stack) - 1
+            if leaf:
+                entry[2] += seconds
+            if index:
+                caller = entry[4].setdefault(stack[index - 1], [0, 0, 0.0, 0.0])
+                caller[0] += count
+                caller[1] += count
+                caller[2] += seconds if leaf else 0.0
+                caller[3] += seconds
+
+    stats = {
+        frame: (
+            cc,
+            nc,
+            tt,
+            ct,
+            {caller: tuple(values) for caller, values in callers.items()},
+        )
+        for frame, (cc, nc, tt, ct, callers) in entries.items()
+    }
+    with open(path, "wb") as f:
+        marshal.dump(stats, f)
+
+
+def _frame_label(frame: Frame) -> str:
+    filename, line, name = frame
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+# Profiler of the current run, if any; parser pools started meanwhile join it
+_active: Optional[Profiler] = None
+
+
+def active_profiler() -> Optional[Profiler]:
+    return _active
@@ -28,6 +28,7 @@ async def test_db(test_db_path, monkeypatch):
 
     # Patch the global config
     monkeypatch.setattr("config.config.config", test_config)
+    monkeypatch.setattr("src.database.operations.config", test_config)
 
     # Create database manager with test config
     db = DatabaseManager()
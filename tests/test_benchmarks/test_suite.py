@@ -0,0 +1,21 @@
+import pytest
+
+from benchmarks.suite import bench_extract_ids, bench_pipeline
+
+
+@pytest.mark.asyncio
+async def test_extract_ids_benchmark_lists_all_rows():
+    """Test that the synthetic list page yields one school ID per row."""
+    results = await bench_extract_ids(rows=500, repeat=1)
+
+    assert results["extract_school_ids"]["rows"] == 500
+    assert results["extract_school_ids"]["rows_per_sec"] > 0
+
+
+@pytest.mark.asyncio
+async def test_pipeline_benchmark_saves_all_schools(tmp_path):
+    """Test the end-to-end benchmark against the stand-in server."""
+    results = await bench_pipeline(schools=20, latency=0, workers=1, directory=tmp_path)
+
+    assert results["pipeline"]["schools"] == 20
+    assert results["pipeline"]["requests"] == 21  # The list and each school
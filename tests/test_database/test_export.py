@@ -0,0 +1,93 @@
+import pytest
+
+from src.database.export import DatasetExporter
+from src.database.models import ImpartedStudy, School
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+def make_school(school_id, province, studies):
+    """Build a parsed school dictionary like the one DetailsParser returns."""
+    return {
+        "id": school_id,
+        "name": f"School {school_id}",
+        "province": province,
+        "nature": "Público",
+        "services": ["Comedor"] if studies else [],
+        "imparted_studies": [
+            {"degree": "FP", "family": "SANIDAD", "name": study, "modality": "Diurno"}
+            for study in studies
+        ],
+    }
+
+
+@pytest.fixture
+async def populated_db(test_db):
+    """A database with a few schools sharing studies."""
+    await test_db.save_schools_bulk(
+        [
+            make_school("00000001", "Madrid", ["Enfermería", "Farmacia"]),
+            make_school("00000002", "Madrid", ["Enfermería"]),
+            make_school("00000003", "Sevilla", []),
+        ]
+    )
+    return test_db
+
+
+@pytest.mark.asyncio
+async def test_export_parquet_in_batches(populated_db, tmp_path):
+    """Test that every table is exported, batch by batch, with typed columns."""
+    output = tmp_path / "processed"
+    exporter = DatasetExporter(output_path=output, batch_size=2, database=populated_db)
+
+    counts = await exporter.export()
+
+    assert counts == {"schools": 3, "imparted_studies": 2, "school_studies": 3}
+    assert sorted(path.name for path in output.iterdir()) == [
+        "imparted_studies.parquet",
+        "school_studies.parquet",
+        "schools.parquet",
+    ]
+    schools = pq.read_table(output / "schools.parquet")
+    assert pa.types.is_dictionary(schools.schema.field("province").type)
+    assert pa.types.is_dictionary(schools.schema.field("nature").type)
+    assert schools.column("province").to_pylist() == ["Madrid", "Madrid", "Sevilla"]
+    assert schools.column("services").to_pylist() == [["Comedor"], ["Comedor"], []]
+    assert pq.ParquetFile(output / "schools.parquet").metadata.num_row_groups == 2
+
+    links = pq.read_table(output / "school_studies.parquet")
+    assert links.schema.field("study_id").type == pa.int64()
+    assert links.column("school_id").to_pylist() == ["00000001", "00000001", "00000002"]
+
+
+@pytest.mark.asyncio
+async def test_export_arrow(populated_db, tmp_path):
+    """Test that the Arrow IPC format can be read back."""
+    exporter = DatasetExporter(
+        format="arrow", output_path=tmp_path, database=populated_db
+    )
+
+    await exporter.export_table(ImpartedStudy.__table__)
+
+    with pa.ipc.open_file(tmp_path / "imparted_studies.arrow") as reader:
+        studies = reader.read_all()
+    assert sorted(studies.column("name").to_pylist()) == ["Enfermería", "Farmacia"]
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+@pytest.mark.asyncio
+async def test_export_arrow_in_batches(populated_db, tmp_path):
+    """Test that dictionary columns share one dictionary across Arrow batches."""
+    exporter = DatasetExporter(
+        format="arrow", output_path=tmp_path, batch_size=1, database=populated_db
+    )
+
+    assert await exporter.export_table(School.__table__) == 3
+
+    with pa.ipc.open_file(tmp_path / "schools.arrow") as reader:
+        assert reader.num_record_batches == 3
+        schools = reader.read_all()
+    assert schools.column("province").to_pylist() == ["Madrid", "Madrid", "Sevilla"]
+    assert schools.column("country").to_pylist() == [None, None, None]
+    assert schools.column("services").to_pylist() == [["Comedor"], ["Comedor"], []]
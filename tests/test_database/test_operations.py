@@ -0,0 +1,266 @@
+import pytest
+from sqlalchemy import func, select, text
+
+from config.config import SQLiteProfileConfig
+from src.database import operations
+from src.database.models import ImpartedStudy, school_studies
+
+
+def make_school(school_id, studies, name="Test School"):
+    """Build a parsed school dictionary like the one DetailsParser returns."""
+    return {
+        "id": school_id,
+        "name": name,
+        "phone": "123456789",
+        "province": "Test Province",
+        "services": ["Comedor", "Biblioteca"],
+        "imparted_studies": [
+            {
+                "degree": degree,
+                "family": "Test Family",
+                "name": study,
+                "modality": "Diurno",
+            }
+            for degree, study in studies
+        ],
+    }
+
+
+async def count_rows(db, table):
+    async with db.get_session() as session:
+        return await session.scalar(select(func.count()).select_from(table))
+
+
+@pytest.mark.asyncio
+async def test_save_schools_bulk_inserts_schools_and_studies(test_db):
+    """Test that schools, studies and their links are inserted."""
+    schools = [
+        make_school("00000001", [("Primaria", "Educación Primaria")]),
+        make_school(
+            "00000002",
+            [("Primaria", "Educación Primaria"), ("ESO", "Educación Secundaria")],
+        ),
+    ]
+
+    saved = await test_db.save_schools_bulk(schools)
+
+    assert saved == 2
+    school = await test_db.get_school_by_id("00000002")
+    assert school.name == "Test School"
+    assert school.services == ["Comedor", "Biblioteca"]
+    assert school.created_at is not None
+    # Shared studies are stored once
+    assert await count_rows(test_db, ImpartedStudy.__table__) == 2
+    assert await count_rows(test_db, school_studies) == 3
+
+
+@pytest.mark.asyncio
+async def test_save_schools_bulk_updates_existing_schools(test_db):
+    """Test that saving again updates fields and replaces study links."""
+    await test_db.save_schools_bulk(
+        [make_school("00000001", [("Primaria", "Educación Primaria")])]
+    )
+    created_at = (await test_db.get_school_by_id("00000001")).created_at
+
+    await test_db.save_schools_bulk(
+        [
+            make_school(
+                "00000001", [("ESO", "Educación Secundaria")], name="Renamed School"
+            )
+        ]
+    )
+
+    school = await test_db.get_school_by_id("00000001")
+    assert school.name == "Renamed School"
+    assert school.created_at == created_at
+    assert await count_rows(test_db, school_studies) == 1
+    assert await count_rows(test_db, ImpartedStudy.__table__) == 2
+
+
+@pytest.mark.asyncio
+async def test_save_schools_bulk_keeps_fingerprint_when_missing(test_db):
+    """Test that records without a listing fingerprint keep the stored one."""
+    school = make_school("00000001", [])
+    await test_db.save_schools_bulk([{**school, "listing_fingerprint": "abc"}])
+
+    await test_db.save_schools_bulk([school])
+    assert await test_db.get_listing_fingerprints() == {"00000001": "abc"}
+
+    await test_db.save_schools_bulk([{**school, "listing_fingerprint": "def"}])
+    assert await test_db.get_listing_fingerprints() == {"00000001": "def"}
+
+
+@pytest.mark.asyncio
+async def test_save_schools_bulk_in_batches(test_db):
+    """Test that large inputs are split into several transactions."""
+    schools = [
+        make_school(f"{i:08d}", [("Primaria", f"Study {i % 3}")]) for i in range(25)
+    ]
+
+    saved = await test_db.save_schools_bulk(schools, batch_size=10)
+
+    assert saved == 25
+    assert await count_rows(test_db, ImpartedStudy.__table__) == 3
+    assert await count_rows(test_db, school_studies) == 25
+
+
+@pytest.mark.asyncio
+async def test_save_schools_bulk_matches_save_school(test_db):
+    """Test that the bulk path reuses studies created by save_school."""
+    async with test_db.get_session() as session:
+        await test_db.save_school(
+            make_school("00000001", [("Primaria", "Educación Primaria")]),
+            session=session,
+        )
+
+    await test_db.save_schools_bulk(
+        [make_school("00000002", [("Primaria", "Educación Primaria")])]
+    )
+
+    assert await count_rows(test_db, ImpartedStudy.__table__) == 1
+    assert len(await test_db.get_school_imparted_studies("00000002")) == 1
+
+
+@pytest.mark.asyncio
+async def test_save_school_links_studies_without_loading_them(test_db):
+    """Test that save_school replaces study links from cached study IDs."""
+    await test_db.save_school(
+        make_school("00000001", [("Primaria", "Educación Primaria"), ("ESO", "ESO")])
+    )
+
+    async with test_db.get_session() as session:
+        await test_db.save_school(
+            make_school("00000001", [("ESO", "ESO")]), session=session
+        )
+        loaded = list(session.identity_map.values())
+        assert not any(isinstance(obj, ImpartedStudy) for obj in loaded)
+
+    studies = await test_db.get_school_imparted_studies("00000001")
+    assert len(studies) == 1
+    assert await count_rows(test_db, school_studies) == 1
+
+
+@pytest.mark.asyncio
+async def test_study_cache_is_loaded_from_existing_studies(test_db):
+    """Test that the study cache is preloaded from the database."""
+    await test_db.save_schools_bulk(
+        [make_school("00000001", [("Primaria", "Educación Primaria")])]
+    )
+    test_db.study_cache.clear()
+
+    await test_db.load_study_cache()
+
+    assert len(test_db.study_cache) == 1
+    key = ("Educación Primaria", "Primaria", "Test Family", "Diurno")
+    assert test_db.study_cache.get(key) is not None
+
+
+@pytest.mark.asyncio
+async def test_study_cache_ignores_rolled_back_studies(test_db):
+    """Test that studies from a failed transaction never reach the cache."""
+    with pytest.raises(RuntimeError):
+        async with test_db.get_session() as session:
+            await test_db._save_schools_batch(
+                session, [make_school("00000001", [("ESO", "Educación Secundaria")])]
+            )
+            raise RuntimeError("Simulated failure")
+
+    assert len(test_db.study_cache) == 0
+    assert await count_rows(test_db, ImpartedStudy.__table__) == 0
+
+    await test_db.save_schools_bulk(
+        [make_school("00000001", [("ESO", "Educación Secundaria")])]
+    )
+    assert len(test_db.study_cache) == 1
+    assert len(await test_db.get_school_imparted_studies("00000001")) == 1
+
+
+@pytest.mark.asyncio
+async def test_migrate_merges_duplicates_and_creates_indexes(test_db):
+    """Test upgrading a database created before the study indexes existed."""
+    async with test_db.engine.begin() as conn:
+        await conn.execute(text("DROP INDEX uq_imparted_studies_identity"))
+        await conn.execute(text("DROP INDEX ix_school_studies_study_id"))
+        await conn.execute(text("ALTER TABLE schools DROP COLUMN listing_fingerprint"))
+        await conn.execute(
+            text(
+                "INSERT INTO schools (id, name, created_at, updated_at) "
+                "VALUES ('00000001', 'A', '', ''), ('00000002', 'B', '', '')"
+            )
+        )
+        await conn.execute(
+            text(
+                "INSERT INTO imparted_studies "
+                "(id, name, degree, family, modality, created_at, updated_at) "
+                "VALUES (1, 'ESO', 'ESO', 'F', 'Diurno', '', ''), "
+                "(2, 'ESO', 'ESO', 'F', 'Diurno', '', ''), "
+                "(3, 'Primaria', 'Primaria', 'F', 'Diurno', '', '')"
+            )
+        )
+        await conn.execute(
+            text(
+                "INSERT INTO school_studies (school_id, study_id) "
+                "VALUES ('00000001', 1), ('00000001', 2), ('00000002', 2), "
+                "('00000002', 3)"
+            )
+        )
+
+    await test_db.migrate()
+
+    async with test_db.engine.connect() as conn:
+        indexes = {
+            row[1]
+            for table in ("imparted_studies", "school_studies", "schools")
+            for row in await conn.execute(text(f"PRAGMA index_list({table})"))
+        }
+        links = set(await conn.execute(text("SELECT * FROM school_studies")))
+        columns = {
+            row[1] for row in await conn.execute(text("PRAGMA table_info(schools)"))
+        }
+    assert {
+        "uq_imparted_studies_identity",
+        "ix_school_studies_study_id",
+        "ix_schools_province",
+        "ix_schools_municipality",
+        "ix_schools_postal_code",
+    } <= indexes
+    assert "listing_fingerprint" in columns
+    assert await count_rows(test_db, ImpartedStudy.__table__) == 2
+    assert links == {("00000001", 1), ("00000002", 1), ("00000002", 3)}
+
+
+@pytest.mark.asyncio
+async def test_sqlite_profile_is_applied_on_connect(test_db, monkeypatch):
+    """Test that switching profile reconfigures new connections."""
+    profile = SQLiteProfileConfig(
+        journal_mode="WAL",
+        synchronous="OFF",
+        cache_size=-1024,
+        mmap_size=0,
+        temp_store="MEMORY",
+        busy_timeout=1234,
+    )
+    monkeypatch.setitem(
+        operations.config.database.sqlite_profiles, "test_profile", profile
+    )
+
+    await test_db.use_sqlite_profile("test_profile")
+
+    async with test_db.engine.connect() as conn:
+        pragmas = {
+            pragma: (await conn.execute(text(f"PRAGMA {pragma}"))).scalar()
+            for pragma in ("journal_mode", "synchronous", "cache_size", "busy_timeout")
+        }
+    assert pragmas == {
+        "journal_mode": "wal",
+        "synchronous": 0,
+        "cache_size": -1024,
+        "busy_timeout": 1234,
+    }
+
+
+@pytest.mark.asyncio
+async def test_unknown_sqlite_profile_is_rejected(test_db):
+    """Test that selecting a profile missing from the config fails early."""
+    with pytest.raises(ValueError):
+        await test_db.use_sqlite_profile("missing")
@@ -0,0 +1,82 @@
+import asyncio
+
+import aiohttp
+import pytest
+
+from config.config import FakeSiteConfig, config
+from src.fake_site.server import FakeSite
+from src.parsers.backends import parse_details
+from src.scrapers.details_scraper import DetailsScraper
+from src.scrapers.list_scraper import ListScraper
+from src.scrapers.rate_limiter import rate_limiter
+
+
+@pytest.fixture(autouse=True)
+def no_rate_limit(monkeypatch):
+    """Send requests to the fake site as fast as possible."""
+    monkeypatch.setattr(rate_limiter, "rate", 0)
+
+
+async def post(url, **data):
+    """POST a form and return the status, headers and body of the response."""
+    async with aiohttp.ClientSession() as session:
+        async with session.post(url, data=data) as response:
+            return response.status, response.headers, await response.text()
+
+
+@pytest.mark.asyncio
+async def test_sharded_list_covers_all_schools(monkeypatch):
+    """Test that searches by province and naturaleza list every school once."""
+    async with FakeSite(FakeSiteConfig(schools=120, port=0)) as site:
+        monkeypatch.setattr(config.api, "base_url", f"{site.url}/buscarCentros")
+        async with ListScraper(sharding="province_naturaleza") as scraper:
+            school_ids = await scraper.run()
+
+    assert sorted(school_ids) == sorted(school.id for school in site.schools)
+    assert site.stats["requests"] == 104
+
+
+@pytest.mark.asyncio
+async def test_details_pages_are_parsed_even_when_dripped(monkeypatch):
+    """Test that slowly sent details pages arrive whole."""
+    settings = FakeSiteConfig(
+        schools=3, port=0, drip_rate=1, drip_chunk_size=500, drip_interval=0
+    )
+    async with FakeSite(settings) as site:
+        monkeypatch.setattr(config.api, "details_url", f"{site.url}/detalleCentro")
+        async with DetailsScraper() as scraper:
+            html = await scraper.fetch_school("99000002")
+
+    assert parse_details(html)["id"] == "99000002"
+    assert site.stats["dripped"] == 1
+
+
+@pytest.mark.asyncio
+async def test_faults():
+    """Test the throttled, failed and unknown school responses."""
+    throttled = FakeSiteConfig(schools=1, port=0, throttle_rate=1, retry_after=2)
+    async with FakeSite(throttled) as site:
+        status, headers, _ = await post(
+            f"{site.url}/detalleCentro", codCentro="99000001"
+        )
+        assert status == 429
+        assert headers["Retry-After"] == "2"
+
+    async with FakeSite(FakeSiteConfig(schools=1, port=0, error_rate=1)) as site:
+        status, _, _ = await post(f"{site.url}/detalleCentro", codCentro="99000001")
+        assert status == 500
+        status, _, _ = await post(f"{site.url}/detalleCentro", codCentro="12345678")
+        assert status == 404
+
+
+@pytest.mark.asyncio
+async def test_requests_beyond_max_concurrent_are_throttled():
+    """Test that the fake site throttles requests like an overloaded server."""
+    settings = FakeSiteConfig(schools=1, port=0, latency=0.1, max_concurrent=2)
+    async with FakeSite(settings) as site:
+        responses = await asyncio.gather(
+            *(post(f"{site.url}/detalleCentro", codCentro="99000001") for _ in range(3))
+        )
+
+    assert sorted(status for status, _, _ in responses) == [200, 200, 429]
+    assert site.stats["overloaded"] == 1
@@ -0,0 +1,122 @@
+import pytest
+from aioresponses import CallbackResult, aioresponses
+
+from src.managers.job_ledger import JobLedger
+from src.managers.school_manager import SchoolManager
+from src.parsers.list_parser import SchoolListing
+
+DETAILS_URL = "https://www.educacion.gob.es/centros/detalleCentro"
+
+
+@pytest.fixture
+def manager(test_db, monkeypatch):
+    """Create a school manager and job ledgers that use the test database."""
+    monkeypatch.setattr("src.managers.school_manager.db", test_db)
+    monkeypatch.setattr("src.managers.job_ledger.db", test_db)
+    return SchoolManager()
+
+
+def mock_details(m, sample_school_html, failing_ids=()):
+    """Serve the fixture page for every school and record requested IDs."""
+    requested = []
+
+    def callback(url, **kwargs):
+        school_id = kwargs["data"]["codCentro"]
+        requested.append(school_id)
+        if school_id in failing_ids:
+            return CallbackResult(status=404, body="Not Found", reason="Not Found")
+        return CallbackResult(
+            body=sample_school_html.replace("123456", school_id),
+            headers={"Content-Type": "text/html"},
+        )
+
+    m.post(DETAILS_URL, callback=callback, repeat=True)
+    return requested
+
+
+def make_listings(count):
+    """Build search result rows for schools 00000001 to count."""
+    return [
+        SchoolListing(id=f"{i:08d}", specific_name=f"School {i}")
+        for i in range(1, count + 1)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_ledger_records_job_statuses(manager, test_db, sample_school_html):
+    """Test that every school of a run ends up saved or failed with its error."""
+    ledger = await JobLedger.start()
+
+    with aioresponses() as m:
+        mock_details(m, sample_school_html, failing_ids={"00000002"})
+        await manager.process_changed_schools(make_listings(3), ledger=ledger)
+    counts = await ledger.finish()
+
+    assert counts == {"saved": 2, "failed": 1}
+    run = await test_db.get_run(ledger.run_id)
+    assert run.listed and run.status == "finished"
+    assert list(await test_db.get_jobs(ledger.run_id, ["failed"])) == ["00000002"]
+
+
+@pytest.mark.asyncio
+async def test_resume_processes_only_unfinished_jobs(
+    manager, test_db, sample_school_html
+):
+    """Test that resuming a listed run skips the schools it already saved."""
+    ledger = await JobLedger.start(force=True)
+    for listing in make_listings(4):
+        await ledger.add(listing.id, listing.fingerprint)
+    await ledger.mark("00000001", "saved")
+    await ledger.mark("00000002", "fetched", attempt=True)
+    await ledger.mark_listed()
+
+    with aioresponses() as m:
+        requested = mock_details(m, sample_school_html)
+        counts = await manager.resume_run(ledger.run_id, listings=[])
+
+    assert sorted(requested) == ["00000002", "00000003", "00000004"]
+    assert counts == {"saved": 4}
+    # Listing fingerprints from the ledger are saved with the schools
+    fingerprints = await test_db.get_listing_fingerprints()
+    assert fingerprints["00000003"] == make_listings(3)[2].fingerprint
+
+
+@pytest.mark.asyncio
+async def test_resume_relists_when_listing_was_interrupted(manager, sample_school_html):
+    """Test that a run stopped while listing lists again, skipping saved ones."""
+    ledger = await JobLedger.start(force=True)
+    await ledger.add("00000001")
+    await ledger.mark("00000001", "saved")
+    await ledger.flush()
+
+    with aioresponses() as m:
+        requested = mock_details(m, sample_school_html)
+        await manager.resume_run(ledger.run_id, listings=make_listings(3))
+
+    assert sorted(requested) == ["00000002", "00000003"]
+
+
+@pytest.mark.asyncio
+async def test_retry_failed_processes_only_failed_jobs(
+    manager, test_db, sample_school_html
+):
+    """Test that failed schools can be re-driven on their own."""
+    ledger = await JobLedger.start()
+    with aioresponses() as m:
+        mock_details(m, sample_school_html, failing_ids={"00000002"})
+        await manager.process_changed_schools(make_listings(3), ledger=ledger)
+    await ledger.finish()
+
+    with aioresponses() as m:
+        requested = mock_details(m, sample_school_html)
+        counts = await manager.resume_run(ledger.run_id, [], failed_only=True)
+
+    assert requested == ["00000002"]
+    assert counts == {"saved": 3}
+
+
+@pytest.mark.asyncio
+async def test_resume_unknown_run(manager):
+    """Test that resuming a run that does not exist fails clearly."""
+    with pytest.raises(ValueError):
+        await manager.resume_run("missing", listings=[])
@@ -0,0 +1,216 @@
+import asyncio
+
+import pytest
+from aioresponses import CallbackResult, aioresponses
+
+from config.config import config
+from src.managers.school_manager import SchoolManager
+from src.parsers.list_parser import SchoolListing
+from src.utils.page_store import RawPageStore
+
+DETAILS_URL = "https://www.educacion.gob.es/centros/detalleCentro"
+
+
+@pytest.fixture
+def manager(test_db, monkeypatch):
+    """Create a school manager that writes to the test database."""
+    monkeypatch.setattr("src.managers.school_manager.db", test_db)
+    return SchoolManager()
+
+
+def mock_details(m, sample_school_html, failing_ids=()):
+    """Serve the fixture page for every school, using the requested ID."""
+
+    def callback(url, **kwargs):
+        school_id = kwargs["data"]["codCentro"]
+        if school_id in failing_ids:
+            return CallbackResult(status=404, body="Not Found")
+        return CallbackResult(
+            body=sample_school_html.replace("123456", school_id),
+            headers={"Content-Type": "text/html"},
+        )
+
+    m.post(DETAILS_URL, callback=callback, repeat=True)
+
+
+@pytest.mark.asyncio
+async def test_scrape_and_parse_saves_all_schools(manager, test_db, sample_school_html):
+    """Test that every fetched school goes through the pipeline into the DB."""
+    school_ids = [f"{i:08d}" for i in range(1, 26)]
+
+    with aioresponses() as m:
+        mock_details(m, sample_school_html)
+        await manager.scrape_and_parse(school_ids, batch_size=4)
+
+    assert await manager.get_existing_school_ids() == set(school_ids)
+    studies = await test_db.get_school_imparted_studies("00000001")
+    assert len(studies) == 3
+
+
+@pytest.mark.asyncio
+async def test_scrape_and_parse_skips_failed_fetches(manager, sample_school_html):
+    """Test that schools that fail to fetch do not stop the pipeline."""
+    school_ids = ["00000001", "00000002", "00000003"]
+
+    with aioresponses() as m:
+        mock_details(m, sample_school_html, failing_ids={"00000002"})
+        await manager.scrape_and_parse(school_ids, batch_size=10)
+
+    assert await manager.get_existing_school_ids() == {"00000001", "00000003"}
+
+
+@pytest.mark.asyncio
+async def test_scrape_and_parse_keeps_fetch_window(
+    manager, monkeypatch, sample_school_html
+):
+    """Test that the pipeline fetches at most fetch_window pages at a time."""
+    monkeypatch.setattr(config.scraping, "fetch_window", 3)
+    school_ids = [f"{i:08d}" for i in range(1, 11)]
+    in_flight = 0
+    max_in_flight = 0
+
+    async def fetch_school(school_id, use_store=True):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return sample_school_html.replace("123456", school_id)
+
+    monkeypatch.setattr(manager.scraper, "fetch_school", fetch_school)
+    await manager.scrape_and_parse(school_ids, batch_size=4)
+
+    assert max_in_flight == 3
+    assert await manager.get_existing_school_ids() == set(school_ids)
+
+
+@pytest.mark.asyncio
+async def test_reparse_stored_pages(test_db, monkeypatch, tmp_path, sample_school_html):
+    """Test rebuilding the database from stored pages without the network."""
+    monkeypatch.setattr("src.managers.school_manager.db", test_db)
+    page_store = RawPageStore(tmp_path / "raw")
+    for school_id in ("00000001", "00000002"):
+        page_store.put(school_id, sample_school_html.replace("123456", school_id))
+    manager = SchoolManager(page_store=page_store)
+    run_id = await test_db.create_run()
+    await test_db.save_schools_bulk(
+        [
+            {"id": "00000001", "name": "Stale School"},
+            {
+                "id": "00000009",
+                "name": "Unstored School",
+                "imparted_studies": [
+                    {"name": "Farmacia", "degree": "FP", "family": "", "modality": ""}
+                ],
+            },
+        ]
+    )
+
+    await manager.reparse_stored_pages(workers=2)
+
+    # Stored pages are reparsed; other schools and the ledger are kept
+    assert await manager.get_existing_school_ids() == {
+        "00000001",
+        "00000002",
+        "00000009",
+    }
+    assert (await test_db.get_school_by_id("00000001")).name != "Stale School"
+    assert len(await test_db.get_school_imparted_studies("00000001")) == 3
+    assert len(await test_db.get_school_imparted_studies("00000009")) == 1
+    assert await test_db.get_run(run_id) is not None
+    assert [path.name for path in tmp_path.glob("test.db*")] == ["test.db"]
+
+
+@pytest.mark.asyncio
+async def test_failed_reparse_keeps_database(
+    test_db, monkeypatch, tmp_path, sample_school_html
+):
+    """Test that a rebuild that fails leaves the current database untouched."""
+    monkeypatch.setattr("src.managers.school_manager.db", test_db)
+    page_store = RawPageStore(tmp_path / "raw")
+    page_store.put("00000001", sample_school_html.replace("123456", "00000001"))
+    await test_db.save_schools_bulk([{"id": "00000001", "name": "Stored School"}])
+
+    async def failing_writer(*args):
+        raise RuntimeError("disk full")
+
+    manager = SchoolManager(page_store=page_store)
+    monkeypatch.setattr(manager, "_write_worker", failing_writer)
+    with pytest.raises(RuntimeError):
+        await manager.reparse_stored_pages(workers=1)
+
+    assert (await test_db.get_school_by_id("00000001")).name == "Stored School"
+    assert not list(tmp_path.glob("test.db.rebuild*"))
+
+
+@pytest.mark.asyncio
+async def test_process_new_schools_from_stream(manager, test_db, sample_school_html):
+    """Test that streamed IDs are filtered and fetched as they arrive."""
+    await test_db.save_schools_bulk([{"id": "00000002", "name": "Stored School"}])
+
+    async def stream():
+        for i in range(1, 6):
+            yield f"{i:08d}"
+
+    with aioresponses() as m:
+        mock_details(m, sample_school_html)
+        await manager.process_new_schools(stream())
+
+    assert await manager.get_existing_school_ids() == {f"{i:08d}" for i in range(1, 6)}
+    # Schools already in the database are not fetched again
+    assert (await test_db.get_school_by_id("00000002")).name == "Stored School"
+
+
+@pytest.mark.asyncio
+async def test_process_changed_schools(manager, test_db, sample_school_html):
+    """Test that only schools whose listing changed are fetched again."""
+    listings = [
+        SchoolListing(id=f"{i:08d}", specific_name=f"School {i}") for i in range(1, 4)
+    ]
+    with aioresponses() as m:
+        mock_details(m, sample_school_html)
+        await manager.process_changed_schools(listings)
+
+    listings[1] = SchoolListing(id="00000002", specific_name="Renamed School")
+    listings.append(SchoolListing(id="00000004", specific_name="School 4"))
+    with aioresponses() as m:
+        mock_details(m, sample_school_html)
+        await manager.process_changed_schools(listings)
+        fetched = sorted(
+            call.kwargs["data"]["codCentro"]
+            for calls in m.requests.values()
+            for call in calls
+        )
+
+    assert fetched == ["00000002", "00000004"]
+    fingerprints = await test_db.get_listing_fingerprints()
+    assert fingerprints == {listing.id: listing.fingerprint for listing in listings}
+
+
+@pytest.mark.asyncio
+async def test_changed_listing_is_fetched_despite_stored_page(
+    test_db, monkeypatch, tmp_path, sample_school_html
+):
+    """Test that a listing change inside raw_page_ttl fetches the page again."""
+    monkeypatch.setattr("src.managers.school_manager.db", test_db)
+    manager = SchoolManager(page_store=RawPageStore(tmp_path / "raw"))
+    listings = [
+        SchoolListing(id=f"{i:08d}", specific_name=f"School {i}") for i in range(1, 3)
+    ]
+    with aioresponses() as m:
+        mock_details(m, sample_school_html)
+        await manager.process_changed_schools(listings)
+
+    listings[1] = SchoolListing(id="00000002", specific_name="Renamed School")
+    updated_html = sample_school_html.replace("Test School", "Updated School")
+    with aioresponses() as m:
+        mock_details(m, updated_html)
+        await manager.process_changed_schools(listings)
+        fetched = [
+            call.kwargs["data"]["codCentro"]
+            for calls in m.requests.values()
+            for call in calls
+        ]
+
+    assert fetched == ["00000002"]
+    assert (await test_db.get_school_by_id("00000002")).name == "Updated School"
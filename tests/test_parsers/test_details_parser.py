@@ -106,3 +106,36 @@ def test_parse_with_invalid_html():
     assert info["name"] is None
     assert info["services"] == []
     assert info["imparted_studies"] == []
+
+
+def test_field_index_matches_selectors(sample_school_html):
+    """Test that indexed field lookups match the equivalent CSS selectors."""
+    parser = DetailsParser(sample_school_html)
+
+    for label in [
+        "Código de centro:",
+        "Denominación específica:",
+        "Teléfono:",
+        "Autonomía:",
+        "Comarca:",
+        "Código postal:",
+        "Denominación genérica:",
+    ]:
+        selector = f'div.col-md-6:-soup-contains("{label}") span'
+        assert parser._extract_field(label) == parser._extract_text(selector)
+
+    assert parser._extract_field("Página Web del centro:", "a") == (
+        parser._extract_text('div.col-md-6:-soup-contains("Página Web del centro:") a')
+    )
+
+
+def test_field_without_bold_label():
+    """Test that fields are still found when the label is not in a <b> tag."""
+    parser = DetailsParser(
+        '<div class="col-md-6">Provincia: <span>Test Province</span></div>'
+        '<div class="col-md-6"><b>Municipio:</b> <span></span></div>'
+    )
+
+    assert parser._extract_field("Provincia:") == "Test Province"
+    assert parser._extract_field("Municipio:") == ""
+    assert parser._extract_field("Localidad:") == ""
@@ -0,0 +1,82 @@
+from src.parsers.list_parser import SchoolListing, SchoolListParser
+
+EXPECTED_IDS = ["00000001", "00000002", "00000003", "00000004"]
+
+
+def test_parse_whole_page(sample_schools_html):
+    """Test extracting school IDs from a page fed in one go."""
+    parser = SchoolListParser()
+
+    listings = parser.feed(sample_schools_html) + parser.close()
+
+    assert [listing.id for listing in listings] == EXPECTED_IDS
+    assert parser.found_table
+    assert parser.row_count == 4
+
+
+def test_parse_page_in_small_chunks(sample_schools_html):
+    """Test that IDs are the same however the page is split into chunks."""
+    parser = SchoolListParser()
+    data = sample_schools_html.encode("utf-8")
+
+    listings = []
+    for start in range(0, len(data), 7):
+        listings.extend(parser.feed(data[start : start + 7]))
+    listings.extend(parser.close())
+
+    assert [listing.id for listing in listings] == EXPECTED_IDS
+
+
+def test_ids_are_returned_as_rows_complete(sample_schools_html):
+    """Test that IDs are available before the end of the page is fed."""
+    parser = SchoolListParser()
+    cutoff = sample_schools_html.index("00000003")
+
+    listings = parser.feed(sample_schools_html[:cutoff])
+
+    assert [listing.id for listing in listings] == ["00000001", "00000002"]
+
+
+def test_page_without_school_table():
+    """Test that a page without the school table yields no IDs."""
+    parser = SchoolListParser()
+
+    listings = parser.feed("<html><body><p>No results</p></body></html>")
+    listings += parser.close()
+
+    assert listings == []
+    assert not parser.found_table
+
+
+def test_rows_are_parsed_into_listings(sample_schools_html):
+    """Test that every known column of a row is read into the listing."""
+    parser = SchoolListParser()
+
+    listings = parser.feed(sample_schools_html) + parser.close()
+
+    assert listings[1] == SchoolListing(
+        id="00000002",
+        province="Provincia 1",
+        locality="Localidad 1",
+        generic_name="Colegio de Educación Infantil y Primaria",
+        specific_name="Colegio 1",
+        nature="Centro público",
+    )
+
+
+def test_listing_fingerprint_tracks_every_column():
+    """Test that the fingerprint is stable and changes with any column."""
+    listing = SchoolListing(id="00000001", province="A", specific_name="School")
+
+    assert (
+        listing.fingerprint
+        == SchoolListing(
+            id="00000001", province="A", specific_name="School"
+        ).fingerprint
+    )
+    assert (
+        listing.fingerprint
+        != SchoolListing(
+            id="00000001", province="A", specific_name="Renamed"
+        ).fingerprint
+    )
@@ -0,0 +1,97 @@
+import pytest
+
+from config.config import PipelineConfig, config
+from src.parsers.backends import PARSER_BACKENDS, parse_details
+from src.parsers.details_parser import DetailsParser, SchoolDetailsParser
+from src.parsers.lxml_details_parser import LxmlDetailsParser
+
+PARSE_METHODS = [
+    "parse_basic_info",
+    "parse_location_info",
+    "parse_classification_info",
+    "parse_services",
+    "parse_imparted_studies",
+    "parse_all",
+]
+
+NESTED_MARKUP_HTML = """
+<html><body>
+<div class="row">
+    <div class="col-md-6 extra"><b>Código de centro:</b> <span> 42 </span></div>
+    <div class="col-md-6">Provincia: <span>Sin etiqueta</span></div>
+    <div class="col-md-6"><b>Página Web del centro:</b><a href="#">web</a></div>
+</div>
+<div><h4><!-- Servicios complementarios --></h4></div>
+<div><h4>Enseñanzas impartidas <small>2024</small></h4>
+    <table>
+        <tr>
+            <td>Grado</td><td>Familia</td><td><b>Nombre</b> largo</td><td>Diurno</td>
+        </tr>
+        <tr><td>Incompleta</td></tr>
+    </table>
+</div>
+<table><tr><td> Comedor <i>escolar</i> </td></tr><tr><td></td></tr></table>
+</body></html>
+"""
+
+
+@pytest.mark.parametrize("method", PARSE_METHODS)
+def test_lxml_backend_matches_bs4_on_fixture(sample_school_html, method):
+    """Test that the lxml backend returns exactly what BeautifulSoup does."""
+    expected = getattr(DetailsParser(sample_school_html), method)()
+    actual = getattr(LxmlDetailsParser(sample_school_html), method)()
+
+    assert actual == expected
+
+
+@pytest.mark.parametrize("method", PARSE_METHODS)
+def test_lxml_backend_matches_bs4_on_unusual_markup(method):
+    """Test parity on nested tags, extra classes, comments and missing labels."""
+    expected = getattr(DetailsParser(NESTED_MARKUP_HTML), method)()
+    actual = getattr(LxmlDetailsParser(NESTED_MARKUP_HTML), method)()
+
+    assert actual == expected
+
+
+@pytest.mark.parametrize("html_content", ["", "<invalid>html</invalid>"])
+def test_lxml_backend_matches_bs4_on_invalid_html(html_content):
+    """Test that both backends fail the same way on unusable pages."""
+    assert LxmlDetailsParser(html_content).parse_all() == (
+        DetailsParser(html_content).parse_all()
+    )
+
+
+@pytest.mark.parametrize("backend", sorted(PARSER_BACKENDS))
+def test_parse_details(sample_school_html, backend):
+    """Test parsing through each registered backend."""
+    assert parse_details(sample_school_html, backend) == (
+        DetailsParser(sample_school_html).parse_all()
+    )
+
+
+def test_parse_details_falls_back_to_bs4(monkeypatch, sample_school_html):
+    """Test that pages the fast backend cannot parse are retried with bs4."""
+    monkeypatch.setattr(LxmlDetailsParser, "parse_basic_info", lambda self: {"id": ""})
+
+    assert parse_details(sample_school_html, "lxml")["id"] == "123456"
+
+
+def test_parse_details_unknown_backend(sample_school_html):
+    """Test that unknown backends are rejected."""
+    with pytest.raises(ValueError):
+        parse_details(sample_school_html, "unknown")
+
+
+def test_backends_implement_the_parser_interface():
+    """Test that backends share SchoolDetailsParser, not each other's state."""
+    assert all(
+        issubclass(parser_class, SchoolDetailsParser)
+        for parser_class in PARSER_BACKENDS.values()
+    )
+    assert not issubclass(LxmlDetailsParser, DetailsParser)
+
+
+def test_default_backend_matches_shipped_config():
+    """Test that a config without parser_backend uses the shipped backend."""
+    default = PipelineConfig(queue_size=1, parse_workers=1, parse_chunk_size=1)
+    assert default.parser_backend == config.pipeline.parser_backend == "lxml"
@@ -0,0 +1,70 @@
+import pytest
+
+from src.parsers.details_parser import DetailsParser
+from src.parsers.parser_pool import ParseResult, ParserPool
+from src.utils.page_store import RawPageStore
+
+
+@pytest.mark.asyncio
+async def test_parse_chunk_matches_inline_parsing(sample_school_html):
+    """Test that pages parsed in worker processes match inline parsing."""
+    expected = DetailsParser(sample_school_html).parse_all()
+
+    async with ParserPool(workers=2, chunk_size=3) as pool:
+        results = await pool.parse_chunk(
+            [("1", sample_school_html), ("2", sample_school_html)]
+        )
+
+    assert [result.school_id for result in results] == ["1", "2"]
+    assert all(result.school_data == expected for result in results)
+    assert all(result.error is None for result in results)
+
+
+@pytest.mark.asyncio
+async def test_parse_chunk_with_invalid_html():
+    """Test that invalid pages come back as the minimal parser structure."""
+    async with ParserPool(workers=1) as pool:
+        results = await pool.parse_chunk([("1", "<invalid>html</invalid>")])
+
+    assert results == [
+        ParseResult(
+            "1", {"id": None, "name": None, "services": [], "imparted_studies": []}
+        )
+    ]
+
+
+@pytest.mark.asyncio
+async def test_parse_chunk_keeps_good_pages_when_one_fails(sample_school_html):
+    """Test that a page raising in the worker fails alone, not its chunk."""
+    async with ParserPool(workers=1) as pool:
+        results = await pool.parse_chunk(
+            [("1", sample_school_html), ("2", None), ("3", sample_school_html)]
+        )
+
+    assert [result.school_id for result in results] == ["1", "2", "3"]
+    assert results[0].school_data["id"] and results[2].school_data["id"]
+    assert results[1].school_data is None
+    assert results[1].error.startswith("TypeError")
+
+
+@pytest.mark.asyncio
+async def test_parse_chunk_requires_started_pool():
+    """Test that parsing outside the context manager is rejected."""
+    pool = ParserPool(workers=1)
+    with pytest.raises(RuntimeError):
+        await pool.parse_chunk([])
+
+
+@pytest.mark.asyncio
+async def test_parse_stored_chunk(sample_school_html, tmp_path):
+    """Test that workers read and parse pages straight from the store."""
+    page_store = RawPageStore(tmp_path / "raw")
+    page_store.put("1", sample_school_html)
+
+    async with ParserPool(workers=1) as pool:
+        results = await pool.parse_stored_chunk(page_store, ["1", "missing"])
+
+    assert results == [
+        ParseResult("1", DetailsParser(sample_school_html).parse_all()),
+        ParseResult("missing", None, "no readable stored page"),
+    ]
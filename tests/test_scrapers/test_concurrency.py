@@ -0,0 +1,119 @@
+import asyncio
+
+import aiohttp
+import pytest
+
+from src.scrapers.concurrency import AdaptiveLimiter, is_overload
+from src.scrapers.details_scraper import DetailsScraper
+from src.scrapers.list_scraper import ListScraper
+
+
+def make_limiter(**kwargs):
+    """Create a limiter with small bounds for testing."""
+    options = {"initial": 4, "min_limit": 1, "max_limit": 8, "latency_threshold": 1}
+    options.update(kwargs)
+    return AdaptiveLimiter(**options)
+
+
+def server_error(status):
+    """Build the error raised by raise_for_status for a status code."""
+    return aiohttp.ClientResponseError(None, (), status=status)
+
+
+@pytest.mark.asyncio
+async def test_limit_grows_by_one_per_round_trip():
+    """Test that fast successful requests raise the limit additively."""
+    limiter = make_limiter()
+
+    for _ in range(4):
+        async with limiter.slot():
+            pass
+
+    assert limiter.metrics()["limit"] == 5
+    assert limiter.successes == 4
+
+
+@pytest.mark.asyncio
+async def test_limit_stays_within_bounds():
+    """Test that the limit never leaves the configured range."""
+    limiter = make_limiter(initial=7)
+    for _ in range(100):
+        async with limiter.slot():
+            pass
+    assert limiter.limit == 8
+
+    for _ in range(10):
+        with pytest.raises(aiohttp.ClientResponseError):
+            async with limiter.slot():
+                raise server_error(503)
+    assert limiter.limit == 1
+
+
+@pytest.mark.asyncio
+async def test_overload_halves_limit_once_per_round_trip():
+    """Test that concurrent overloads only cut the limit once."""
+    limiter = make_limiter(initial=8)
+
+    async def overloaded_request():
+        with pytest.raises(asyncio.TimeoutError):
+            async with limiter.slot():
+                await asyncio.sleep(0.01)
+                raise asyncio.TimeoutError()
+
+    await asyncio.gather(*(overloaded_request() for _ in range(4)))
+
+    assert limiter.limit == 4
+    assert limiter.overloads == 4
+
+
+@pytest.mark.asyncio
+async def test_slow_responses_count_as_overload():
+    """Test that responses slower than the threshold reduce the limit."""
+    limiter = make_limiter(latency_threshold=0.01)
+
+    async with limiter.slot():
+        await asyncio.sleep(0.02)
+    assert limiter.limit == 2
+
+    # Untimed requests are not judged by their duration
+    async with limiter.slot(timed=False):
+        await asyncio.sleep(0.02)
+    assert limiter.limit == 2.5
+
+
+@pytest.mark.asyncio
+async def test_in_flight_requests_are_capped():
+    """Test that no more requests than the limit run at the same time."""
+    limiter = make_limiter(initial=2, max_limit=2)
+    peak = 0
+
+    async def request():
+        nonlocal peak
+        async with limiter.slot():
+            peak = max(peak, limiter.in_flight)
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*(request() for _ in range(6)))
+
+    assert peak == 2
+    assert limiter.in_flight == 0
+    assert limiter.throughput > 0
+
+
+def test_overload_classification():
+    """Test which errors are treated as signs of an overloaded server."""
+    assert is_overload(server_error(429))
+    assert is_overload(server_error(503))
+    assert is_overload(asyncio.TimeoutError())
+    assert not is_overload(server_error(404))
+    assert not is_overload(None)
+
+
+@pytest.mark.asyncio
+async def test_scrapers_share_limiter_per_host():
+    """Test that scrapers of the same host share one concurrency limiter."""
+    list_scraper, details_scraper = ListScraper(), DetailsScraper()
+
+    assert list_scraper.limiter is details_scraper.limiter
+    assert list_scraper.limiter is ListScraper().limiter
+    assert list_scraper._limiter("http://other.test/") is not list_scraper.limiter
@@ -1,9 +1,13 @@
+import asyncio
 from pathlib import Path
 
 import pytest
 from aioresponses import aioresponses
 
+from config.config import config
 from src.scrapers.details_scraper import DetailsScraper
+from src.scrapers.session_pool import session_pool
+from src.utils.page_store import RawPageStore
 
 
 @pytest.fixture
@@ -131,3 +135,86 @@ async def test_process_batch_partial_failure(school_html):
             assert results["123456"] == school_html
             assert "789012" not in results
             assert "999999" not in results
+
+
+@pytest.mark.asyncio
+async def test_scrape_school_stores_and_reuses_pages(
+    school_html, tmp_path, monkeypatch
+):
+    """Test that fetched pages are archived and reused within the TTL."""
+    page_store = RawPageStore(tmp_path / "raw")
+    monkeypatch.setattr(config.storage, "raw_page_ttl", 3600)
+
+    with aioresponses() as m:
+        m.post(
+            "https://www.educacion.gob.es/centros/detalleCentro",
+            body=school_html,
+            status=200,
+            headers={"Content-Type": "text/html"},
+        )
+
+        async with DetailsScraper(page_store=page_store) as scraper:
+            first = await scraper.scrape_school("123456")
+            # The mocked response is used up, so this must come from the store
+            second = await scraper.scrape_school("123456")
+
+    assert first == second == school_html
+    assert page_store.get("123456") == school_html
+
+
+@pytest.mark.asyncio
+async def test_iter_pages_bounds_fetches_in_flight(monkeypatch):
+    """Test that iter_pages keeps at most window fetches in flight."""
+    scraper = DetailsScraper()
+    in_flight = 0
+    max_in_flight = 0
+
+    async def fetch_school(school_id, use_store=True):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if school_id == "3":
+            raise RuntimeError("Not Found")
+        return f"<html>{school_id}</html>"
+
+    async def school_ids():
+        for school_id in range(10):
+            yield str(school_id)
+
+    monkeypatch.setattr(scraper, "fetch_school", fetch_school)
+    pages = {
+        school_id: html
+        async for school_id, html in scraper.iter_pages(school_ids(), window=3)
+    }
+
+    assert max_in_flight == 3
+    assert set(pages) == {str(i) for i in range(10)} - {"3"}
+    assert pages["7"] == "<html>7</html>"
+
+
+@pytest.mark.asyncio
+async def test_run_in_batches_with_session_per_batch(monkeypatch):
+    """Test that run fetches in batches, each with its own session."""
+    scraper = DetailsScraper()
+    acquired = 0
+    acquire = session_pool.acquire
+
+    async def counting_acquire():
+        nonlocal acquired
+        acquired += 1
+        return await acquire()
+
+    async def fetch_school(school_id, use_store=True):
+        return f"<html>{school_id}</html>"
+
+    monkeypatch.setattr(session_pool, "acquire", counting_acquire)
+    monkeypatch.setattr(scraper, "fetch_school", fetch_school)
+    results = await scraper.run(
+        [str(i) for i in range(5)], batch_size=2, session_per_batch=True
+    )
+
+    assert len(results) == 5
+    assert acquired == 3
+    assert session_pool.session is None
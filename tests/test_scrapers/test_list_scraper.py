@@ -1,5 +1,10 @@
+import asyncio
+from typing import Dict
+
+import aiohttp
 import pytest
-from aioresponses import aioresponses
+from aiohttp import web
+from aioresponses import CallbackResult, aioresponses
 
 from src.scrapers.list_scraper import ListScraper
 
@@ -169,3 +174,181 @@ async def test_scrape_school_list_no_tables():
         scraper = ListScraper()
         result = await scraper.run()
         assert len(result) == 0  # Should handle HTML with no tables gracefully
+
+
+def make_results_page(school_ids):
+    """Build a search results page listing the given school IDs."""
+    rows = "".join(
+        f"<tr><td>P</td><td>L</td><td>G</td><td>E</td><td>{school_id}</td>"
+        "<td>Público</td><td></td></tr>"
+        for school_id in school_ids
+    )
+    return (
+        "<html><body><table><thead><tr><th>Provincia</th><th>Localidad</th>"
+        "<th>Denominación Genérica</th><th>Denominación Específica</th>"
+        "<th>Código</th><th>Naturaleza</th><th>&nbsp;</th></tr></thead>"
+        f"<tbody>{rows}</tbody></table></body></html>"
+    )
+
+
+@pytest.mark.asyncio
+async def test_scrape_school_list_sharded(monkeypatch):
+    """Test that province shards are merged, deduplicated and retried alone."""
+    monkeypatch.setattr(
+        ListScraper, "_shards", lambda self: [("01", "0"), ("02", "0"), ("03", "0")]
+    )
+    scraper = ListScraper(sharding="province")
+    scraper.retry_policy.base_delay = 0
+    calls = {}
+
+    def callback(url, **kwargs):
+        province = kwargs["data"]["comboprov"]
+        calls[province] = calls.get(province, 0) + 1
+        if (
+            province == "03"
+            and calls[province] < scraper.config.scraping.retry_attempts
+        ):
+            return CallbackResult(
+                status=503, body="Service Unavailable", reason="Service Unavailable"
+            )
+        # A school listed under two provinces is only returned once
+        school_ids = [f"{province}000001", f"{province}000002", "99000001"]
+        return CallbackResult(
+            body=make_results_page(school_ids),
+            headers={"Content-Type": "text/html; charset=utf-8"},
+        )
+
+    with aioresponses() as m:
+        m.post(
+            "https://www.educacion.gob.es/centros/buscarCentros",
+            callback=callback,
+            repeat=True,
+        )
+        result = await scraper.run()
+
+    assert sorted(result) == [
+        "01000001",
+        "01000002",
+        "02000001",
+        "02000002",
+        "03000001",
+        "03000002",
+        "99000001",
+    ]
+    # Only the failing shard was requested again
+    assert calls["01"] == calls["02"] == 1
+    assert calls["03"] == scraper.config.scraping.retry_attempts
+
+
+@pytest.mark.asyncio
+async def test_sharded_list_does_not_retry_failed_requests_again(monkeypatch):
+    """Test that a shard whose request retries ran out is not tried again."""
+    monkeypatch.setattr(ListScraper, "_shards", lambda self: [("01", "0"), ("02", "0")])
+    scraper = ListScraper(sharding="province")
+    scraper.retry_policy.base_delay = 0
+
+    with aioresponses() as m:
+        m.post(
+            "https://www.educacion.gob.es/centros/buscarCentros",
+            status=503,
+            repeat=True,
+        )
+        with pytest.raises(aiohttp.ClientResponseError):
+            await scraper.run()
+
+    requests = next(iter(m.requests.values()))
+    assert len(requests) == 2 * scraper.config.scraping.retry_attempts
+
+
+@pytest.mark.asyncio
+async def test_sharded_list_retries_interrupted_shard(monkeypatch):
+    """Test that a shard whose response breaks off mid-body is fetched again."""
+    monkeypatch.setattr(ListScraper, "_shards", lambda self: [("01", "0"), ("02", "0")])
+    calls: Dict[str, int] = {}
+
+    async def handler(request):
+        province = (await request.post())["comboprov"]
+        calls[province] = calls.get(province, 0) + 1
+        page = make_results_page([f"{province}000001"]).encode()
+        response = web.StreamResponse()
+        response.content_length = len(page)
+        await response.prepare(request)
+        if province == "02" and calls[province] == 1:
+            await response.write(page[: len(page) // 2])
+            request.transport.close()
+            return response
+        await response.write(page)
+        await response.write_eof()
+        return response
+
+    app = web.Application()
+    app.router.add_post("/", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    scraper = ListScraper(sharding="province")
+    scraper.base_url = f"http://127.0.0.1:{port}/"
+    monkeypatch.setattr(scraper.config.scraping, "retry_delay", 0)
+    try:
+        result = await scraper.run()
+    finally:
+        await runner.cleanup()
+
+    assert sorted(result) == ["01000001", "02000001"]
+    assert calls == {"01": 1, "02": 2}
+
+
+def test_province_shards_cover_every_province():
+    """Test that sharded modes build one search per province and type."""
+    assert len(ListScraper(sharding="province")._shards()) == 52
+    shards = ListScraper(sharding="province_naturaleza")._shards()
+    assert len(shards) == 52 * len(ListScraper().config.scraping.list_naturalezas)
+    assert ListScraper()._shards() == [("00", "0")]
+    with pytest.raises(ValueError):
+        ListScraper(sharding="region")
+
+
+@pytest.mark.asyncio
+async def test_unsharded_list_restarts_interrupted_stream(monkeypatch):
+    """Test that a single search that breaks off is resumed without duplicates."""
+    school_ids = [f"{i:08d}" for i in range(1, 201)]
+    page = make_results_page(school_ids).encode()
+    calls = []
+
+    async def handler(request):
+        calls.append(request.path)
+        response = web.StreamResponse()
+        response.content_length = len(page)
+        await response.prepare(request)
+        if len(calls) == 1:
+            await response.write(page[: len(page) // 2])
+            await asyncio.sleep(0.1)  # Let the first rows reach the scraper
+            request.transport.close()
+            return response
+        await response.write(page)
+        await response.write_eof()
+        return response
+
+    app = web.Application()
+    app.router.add_post("/", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    scraper = ListScraper()
+    scraper.base_url = f"http://127.0.0.1:{port}/"
+    monkeypatch.setattr(scraper.config.scraping, "retry_delay", 0)
+    received = []
+    try:
+        async for listing in scraper.iter_listings():
+            received.append(listing.id)
+    finally:
+        await runner.cleanup()
+
+    assert len(calls) == 2
+    assert received == school_ids
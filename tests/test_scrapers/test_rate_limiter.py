@@ -0,0 +1,77 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from src.scrapers.rate_limiter import TokenBucket
+
+
+@pytest.mark.asyncio
+async def test_burst_is_sent_without_waiting():
+    """Test that a full bucket lets a burst of requests through at once."""
+    bucket = TokenBucket(rate=1, burst=5)
+
+    started = time.monotonic()
+    for _ in range(5):
+        await bucket.acquire()
+
+    assert time.monotonic() - started < 0.1
+    assert bucket.waited == 0
+
+
+@pytest.mark.asyncio
+async def test_requests_beyond_burst_are_paced():
+    """Test that concurrent requests past the burst are spaced at the rate."""
+    bucket = TokenBucket(rate=50, burst=2)
+    sent = []
+
+    async def request():
+        await bucket.acquire()
+        sent.append(time.monotonic())
+
+    started = time.monotonic()
+    await asyncio.gather(*(request() for _ in range(7)))
+
+    # 2 from the burst, then 5 more at 50/s
+    assert time.monotonic() - started == pytest.approx(0.1, abs=0.05)
+    gaps = [later - earlier for earlier, later in zip(sent[2:], sent[3:])]
+    assert all(gap == pytest.approx(0.02, abs=0.015) for gap in gaps)
+
+
+@pytest.mark.asyncio
+async def test_zero_rate_disables_limiting():
+    """Test that a rate of zero never delays requests."""
+    bucket = TokenBucket(rate=0, burst=1)
+
+    for _ in range(100):
+        await bucket.acquire()
+
+    assert bucket.waited == 0
+
+
+@pytest.mark.asyncio
+async def test_bucket_level_persists_across_runs(tmp_path):
+    """Test that a drained bucket is not refilled by restarting."""
+    state_file = tmp_path / "rate_limit_state.json"
+    bucket = TokenBucket(rate=1, burst=10, state_file=state_file)
+    for _ in range(10):
+        await bucket.acquire()
+    bucket.save()
+
+    restarted = TokenBucket(rate=1, burst=10, state_file=state_file)
+    restarted.load()
+
+    assert json.loads(state_file.read_text())["tokens"] < 1
+    assert restarted.tokens < 1
+
+
+def test_corrupt_state_is_ignored(tmp_path):
+    """Test that an unreadable state file starts with a full bucket."""
+    state_file = tmp_path / "rate_limit_state.json"
+    state_file.write_text("not json")
+    bucket = TokenBucket(rate=1, burst=10, state_file=state_file)
+
+    bucket.load()
+
+    assert bucket.tokens == 10
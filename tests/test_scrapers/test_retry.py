@@ -0,0 +1,163 @@
+import asyncio
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aioresponses import aioresponses
+
+from config.config import config
+from src.scrapers.details_scraper import DetailsScraper
+from src.scrapers.retry import CircuitBreaker, RetryPolicy
+
+DETAILS_URL = "https://www.educacion.gob.es/centros/detalleCentro"
+
+
+def response_error(status, headers=None):
+    """Build the error raised by raise_for_status for a response."""
+    return aiohttp.ClientResponseError(None, (), status=status, headers=headers)
+
+
+def test_backoff_grows_exponentially_with_jitter():
+    """Test that delays stay within the doubling, capped jitter range."""
+    policy = RetryPolicy(attempts=5, base_delay=1, max_delay=5)
+
+    for attempt, ceiling in enumerate([1, 2, 4, 5, 5]):
+        delays = [policy.delay(attempt) for _ in range(50)]
+        assert all(0 <= delay <= ceiling for delay in delays)
+        assert len(set(delays)) > 1
+
+
+def test_retry_after_header_takes_precedence():
+    """Test that the server's Retry-After, in seconds or as a date, is used."""
+    policy = RetryPolicy(attempts=3, base_delay=1, max_delay=5)
+
+    assert policy.delay(0, response_error(429, {"Retry-After": "3"})) == 3
+    # A longer wait than max_delay is capped to it
+    assert policy.delay(0, response_error(429, {"Retry-After": "120"})) == 5
+    past = {"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}
+    assert policy.delay(0, response_error(503, past)) == 0
+    assert policy.retry_after(response_error(503, {"Retry-After": "soon"})) is None
+
+
+def test_retryable_errors():
+    """Test that only transient failures are retried."""
+    policy = RetryPolicy(attempts=3, base_delay=1, max_delay=5)
+
+    assert policy.is_retryable(asyncio.TimeoutError())
+    assert policy.is_retryable(aiohttp.ClientConnectionError())
+    assert policy.is_retryable(response_error(429))
+    assert policy.is_retryable(response_error(502))
+    assert not policy.is_retryable(response_error(404))
+
+
+@pytest.mark.asyncio
+async def test_circuit_opens_and_recovers_through_a_probe():
+    """Test the closed, open and half-open states of the circuit breaker."""
+    breaker = CircuitBreaker("example.com", failure_threshold=2, reset_timeout=0.05)
+
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    await breaker.wait()  # Sleeps until a probe may be sent
+    assert breaker.state == "half_open"
+    breaker.record_failure()  # A failed probe opens the circuit again
+    assert breaker.state == "open"
+
+    await breaker.wait()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.failures == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_probe_lets_another_request_probe():
+    """Test that a probe cancelled before getting an answer frees the circuit."""
+    breaker = CircuitBreaker("example.com", failure_threshold=1, reset_timeout=0.01)
+    breaker.record_failure()
+
+    async def probe():
+        await breaker.wait()
+        try:
+            await asyncio.sleep(10)  # The probe request, never answered
+        finally:
+            breaker.release()
+
+    task = asyncio.create_task(probe())
+    await asyncio.sleep(0.05)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    await asyncio.wait_for(breaker.wait(), timeout=1)
+    assert breaker.state == "half_open"
+
+
+@pytest.mark.asyncio
+async def test_make_request_honours_retry_after():
+    """Test that a throttled request is retried after the requested delay."""
+    with aioresponses() as m:
+        m.post(DETAILS_URL, status=429, headers={"Retry-After": "0"})
+        m.post(DETAILS_URL, body="<html>ok</html>")
+
+        async with DetailsScraper() as scraper:
+            content = await scraper._make_request(DETAILS_URL, method="POST")
+
+    assert content == "<html>ok</html>"
+
+
+@pytest.mark.asyncio
+async def test_make_request_retries_timeouts():
+    """Test that timeouts are retried instead of escaping the retry loop."""
+    with aioresponses() as m:
+        m.post(DETAILS_URL, exception=asyncio.TimeoutError())
+        m.post(DETAILS_URL, body="<html>ok</html>")
+
+        async with DetailsScraper() as scraper:
+            scraper.retry_policy.base_delay = 0
+            content = await scraper._make_request(DETAILS_URL, method="POST")
+
+    assert content == "<html>ok</html>"
+
+
+@pytest.mark.asyncio
+async def test_make_request_does_not_retry_client_errors():
+    """Test that a 404 fails at once without waiting for retries."""
+    with aioresponses() as m:
+        m.post(DETAILS_URL, status=404, repeat=True)
+
+        async with DetailsScraper() as scraper:
+            with pytest.raises(aiohttp.ClientResponseError):
+                await scraper._make_request(DETAILS_URL, method="POST")
+
+    assert len(next(iter(m.requests.values()))) == 1
+
+
+@pytest.mark.asyncio
+async def test_stream_request_outlasts_timeout_with_slow_consumer(monkeypatch):
+    """Test that a body read slower than request_timeout is not cut short."""
+    body = "x" * (1024 * 1024)
+
+    async def handler(request):
+        return web.Response(text=body)
+
+    app = web.Application()
+    app.router.add_get("/", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    monkeypatch.setattr(config.scraping, "request_timeout", 0.2)
+
+    chunks = []
+    try:
+        async with DetailsScraper() as scraper:
+            async for chunk in scraper._stream_request(f"http://127.0.0.1:{port}/"):
+                chunks.append(chunk)
+                await asyncio.sleep(0.05)  # 16 chunks take longer than the timeout
+    finally:
+        await runner.cleanup()
+
+    assert "".join(chunks) == body
@@ -0,0 +1,76 @@
+import pytest
+from aiohttp import web
+
+from src.scrapers.details_scraper import DetailsScraper
+from src.scrapers.list_scraper import ListScraper
+from src.scrapers.session_pool import SessionPool, session_pool
+
+
+@pytest.fixture
+async def local_server():
+    """Serve a small page over HTTP on a free local port."""
+
+    async def handler(request):
+        return web.Response(text="<html>ok</html>", content_type="text/html")
+
+    app = web.Application()
+    app.router.add_route("*", "/", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    yield f"http://127.0.0.1:{port}/"
+    await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_scrapers_share_one_session():
+    """Test that scrapers used at the same time share the pool's session."""
+    async with ListScraper() as list_scraper, DetailsScraper() as details_scraper:
+        assert list_scraper.session is details_scraper.session
+        assert list_scraper.session is session_pool.session
+
+    # Closed once the last scraper releases it
+    assert session_pool.session is None
+
+
+@pytest.mark.asyncio
+async def test_pool_keeps_session_open_between_scrapers():
+    """Test that holding the pool open shares it across consecutive scrapers."""
+    async with session_pool as session:
+        async with ListScraper() as scraper:
+            assert scraper.session is session
+        assert not session.closed
+        async with DetailsScraper() as scraper:
+            assert scraper.session is session
+
+    assert session.closed
+
+
+@pytest.mark.asyncio
+async def test_connections_are_reused(local_server):
+    """Test that consecutive requests go over the same kept-alive connection."""
+    pool = SessionPool()
+    session = await pool.acquire()
+    try:
+        for _ in range(5):
+            async with session.get(local_server) as response:
+                assert await response.text() == "<html>ok</html>"
+        assert pool.requests == 5
+        assert pool.connections == 1
+    finally:
+        await pool.release()
+
+
+@pytest.mark.asyncio
+async def test_compression_can_be_disabled(monkeypatch):
+    """Test that responses are requested uncompressed when configured."""
+    monkeypatch.setattr("src.scrapers.session_pool.config.scraping.compression", False)
+    pool = SessionPool()
+
+    session = await pool.acquire()
+    try:
+        assert session.headers["Accept-Encoding"] == "identity"
+    finally:
+        await pool.release()
@@ -0,0 +1,80 @@
+import json
+import sys
+
+import pytest
+from loguru import logger
+
+from src.parsers.details_parser import DetailsParser
+from src.utils.logging_config import configure_logging
+
+
+class FormatCounter:
+    """A value that counts how often it is turned into a string."""
+
+    def __init__(self):
+        self.formatted = 0
+
+    def __format__(self, spec):
+        self.formatted += 1
+        return "value"
+
+
+@pytest.fixture
+def restore_logger():
+    """Put back loguru's default handler after a test configures logging."""
+    yield
+    logger.remove()
+    logger.add(sys.stderr)
+
+
+def test_json_lines_are_written_through_the_queue(tmp_path, restore_logger):
+    """Test that events are written as JSON lines with their fields."""
+    log_file = tmp_path / "logs" / "schools.log"
+    configure_logging("INFO", json_file=log_file)
+
+    logger.info("Saved {count} schools", count=3)
+    try:
+        raise ValueError("bad row")
+    except ValueError:
+        logger.exception("Could not save school {school_id}", school_id="28000001")
+    logger.complete()
+
+    events = [json.loads(line) for line in log_file.read_text().splitlines()]
+    assert events[0]["message"] == "Saved 3 schools"
+    assert events[0]["count"] == 3
+    assert events[0]["level"] == "INFO"
+    assert events[0]["function"] == "test_json_lines_are_written_through_the_queue"
+    assert events[1]["school_id"] == "28000001"
+    assert "ValueError: bad row" in events[1]["exception"]
+    assert "_json" not in events[1]
+
+
+def test_filtered_events_are_not_formatted(tmp_path, restore_logger):
+    """Test that no string work is done for events below the level."""
+    configure_logging("INFO", json_file=tmp_path / "schools.log")
+    value = FormatCounter()
+
+    logger.debug("Found {value}", value=value)
+    assert value.formatted == 0
+
+    logger.info("Found {value}", value=value)
+    logger.complete()
+    assert value.formatted == 1
+
+
+def test_parser_debug_events_carry_fields(tmp_path, restore_logger):
+    """Test that parser debug events log one event per section, with fields."""
+    log_file = tmp_path / "schools.log"
+    configure_logging("DEBUG", json_file=log_file)
+    html = (
+        "<html><body><div><h3>Servicios complementarios</h3></div>"
+        "<table><tr><td>Comedor</td></tr><tr><td>Transporte</td></tr></table>"
+        "</body></html>"
+    )
+
+    assert DetailsParser(html).parse_services() == ["Comedor", "Transporte"]
+    logger.complete()
+
+    events = [json.loads(line) for line in log_file.read_text().splitlines()]
+    assert [event["services"] for event in events] == [["Comedor", "Transporte"]]
+    assert events[0]["count"] == 2
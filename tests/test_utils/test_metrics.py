@@ -0,0 +1,82 @@
+from urllib.parse import urlsplit
+
+import aiohttp
+import pytest
+from aioresponses import aioresponses
+
+from src.scrapers.details_scraper import DetailsScraper
+from src.utils.metrics import MetricsRegistry, MetricsServer, metrics
+
+
+def test_render_counters_gauges_and_histograms():
+    """Test the Prometheus text format of each metric type."""
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests", ("status",))
+    depth = registry.gauge("queue_depth", "Depth")
+    seconds = registry.histogram("request_seconds", "Latency", buckets=(0.1, 1))
+
+    requests.inc(status="200")
+    requests.inc(2, status="200")
+    depth.track(lambda: 7)
+    seconds.observe(0.05)
+    seconds.observe(0.5)
+    seconds.observe(5)
+
+    lines = registry.render().splitlines()
+    assert "# TYPE requests_total counter" in lines
+    assert 'requests_total{status="200"} 3' in lines
+    assert "queue_depth 7" in lines
+    assert 'request_seconds_bucket{le="0.1"} 1' in lines
+    assert 'request_seconds_bucket{le="1"} 2' in lines
+    assert 'request_seconds_bucket{le="+Inf"} 3' in lines
+    assert "request_seconds_count 3" in lines
+
+
+def test_histogram_quantiles():
+    """Test that quantiles are interpolated within their bucket."""
+    registry = MetricsRegistry()
+    seconds = registry.histogram("seconds", "Latency", buckets=(1, 2))
+    for value in (0.5, 1.5, 1.5, 1.5):
+        seconds.observe(value)
+
+    assert seconds.quantile(0.25) == 1.0
+    assert seconds.quantile(0.5) == pytest.approx(4 / 3)
+    summary = registry.summary()["metrics"]["seconds"]["values"][0]
+    assert summary["count"] == 4
+    assert summary["mean"] == 1.25
+    assert summary["p99"] == pytest.approx(1 + 2.96 / 3)
+
+
+@pytest.mark.asyncio
+async def test_requests_are_measured_and_served():
+    """Test that scraper requests show up on the metrics endpoint."""
+    metrics.reset()
+    with aioresponses(passthrough=["http://127.0.0.1"]) as m:
+        m.post("https://www.educacion.gob.es/centros/detalleCentro", body="<html>")
+        m.post("https://www.educacion.gob.es/centros/detalleCentro", status=404)
+        async with DetailsScraper() as scraper:
+            assert await scraper.scrape_school("123456") == "<html>"
+            assert await scraper.scrape_school("999999") is None
+
+    async with MetricsServer(metrics, "127.0.0.1", 0) as server:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(server.url) as response:
+                assert response.headers["Content-Type"].startswith("text/plain")
+                text = await response.text()
+            async with session.get(f"{server.url}.json") as response:
+                summary = await response.json()
+
+    assert 'scraper_requests_total{endpoint="detalleCentro",status="200"} 1' in text
+    assert 'scraper_requests_total{endpoint="detalleCentro",status="404"} 1' in text
+    latency = summary["metrics"]["scraper_request_seconds"]["values"][0]
+    assert latency["labels"] == {"endpoint": "detalleCentro"}
+    assert latency["count"] == 2
+
+
+@pytest.mark.asyncio
+async def test_metrics_server_on_busy_port_is_skipped():
+    """Test that a port already in use does not stop the run."""
+    async with MetricsServer(metrics, "127.0.0.1", 0) as first:
+        port = urlsplit(first.url).port
+        async with MetricsServer(metrics, "127.0.0.1", port) as second:
+            assert second.url == ""
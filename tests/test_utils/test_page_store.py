@@ -0,0 +1,90 @@
+import gzip
+
+import pytest
+
+from src.utils.page_store import RawPageStore
+
+
+@pytest.fixture
+def page_store(tmp_path):
+    """Create a raw page store in a temporary directory."""
+    return RawPageStore(tmp_path / "raw")
+
+
+def test_put_and_get(page_store, sample_school_html):
+    """Test that a stored page is read back unchanged."""
+    entry = page_store.put("123456", sample_school_html)
+
+    assert page_store.get("123456") == sample_school_html
+    assert page_store.get_entry("123456") == entry
+    assert entry.size == len(sample_school_html.encode("utf-8"))
+
+
+def test_get_missing_page(page_store):
+    """Test that unknown schools have no stored page."""
+    assert page_store.get("999999") is None
+    assert page_store.get_entry("999999") is None
+
+
+def test_identical_pages_are_stored_once(page_store, sample_school_html):
+    """Test that page bodies are content-addressed and compressed."""
+    first = page_store.put("1", sample_school_html)
+    second = page_store.put("2", sample_school_html)
+
+    objects = list(page_store.objects_path.rglob("*.html.gz"))
+    assert first.sha256 == second.sha256
+    assert len(objects) == 1
+    assert objects[0].stat().st_size < first.size
+
+
+def test_put_replaces_previous_version(page_store, sample_school_html):
+    """Test that storing a new version updates the school's page."""
+    page_store.put("1", sample_school_html)
+    page_store.put("1", "<html>updated</html>")
+
+    assert page_store.get("1") == "<html>updated</html>"
+
+
+def test_corrupted_page_is_ignored(page_store, sample_school_html):
+    """Test that a page whose content no longer matches its hash is rejected."""
+    entry = page_store.put("1", sample_school_html)
+    object_path = page_store._object_path(entry.sha256)
+    object_path.write_bytes(gzip.compress(b"<html>tampered</html>"))
+
+    assert page_store.get("1") is None
+
+
+def test_is_fresh(page_store, sample_school_html):
+    """Test TTL checks on stored pages."""
+    assert not page_store.is_fresh("1", ttl=3600)
+
+    page_store.put("1", sample_school_html)
+
+    assert page_store.is_fresh("1", ttl=3600)
+    assert not page_store.is_fresh("1", ttl=0)
+
+
+def test_iter_pages(page_store, sample_school_html):
+    """Test iterating over every stored page."""
+    page_store.put("2", sample_school_html)
+    page_store.put("1", "<html>one</html>")
+
+    assert list(page_store.iter_school_ids()) == ["1", "2"]
+    assert dict(page_store.iter_pages()) == {
+        "1": "<html>one</html>",
+        "2": sample_school_html,
+    }
+
+
+def test_prune_deletes_replaced_pages(page_store, sample_school_html):
+    """Test that pruning deletes only objects no school refers to."""
+    old = page_store.put("1", sample_school_html)
+    page_store.put("2", "<html>two</html>")
+    page_store.put("1", "<html>updated</html>")
+
+    assert page_store.prune() == 0  # Within the grace period
+    assert page_store.prune(grace=0) == 1
+
+    assert not page_store._object_path(old.sha256).exists()
+    assert page_store.get("1") == "<html>updated</html>"
+    assert page_store.get("2") == "<html>two</html>"
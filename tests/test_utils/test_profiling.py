@@ -0,0 +1,64 @@
+import asyncio
+import pstats
+import time
+from collections import Counter
+
+import pytest
+
+from src.parsers.parser_pool import ParserPool
+from src.utils.profiling import Profiler, write_pstats
+
+PAGE = (
+    '<html><body><div class="col-md-6"><b>Código de centro:</b>'
+    "<span>28000001</span></div></body></html>"
+)
+
+
+def _busy(seconds: float) -> None:
+    """Keep the event loop thread busy."""
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_samples_are_written_as_pstats(tmp_path):
+    """Test that stack samples load as a pstats profile with cumulative times."""
+    outer = ("main.py", 1, "main")
+    inner = ("parser.py", 10, "parse")
+    samples = Counter({(outer, inner): 3, (outer,): 1})
+
+    write_pstats(samples, 0.01, tmp_path / "profile.prof")
+
+    stats = pstats.Stats(str(tmp_path / "profile.prof")).stats  # type: ignore
+    cc, nc, tt, ct, callers = stats[inner]
+    assert (cc, nc) == (3, 3)
+    assert tt == pytest.approx(0.03)
+    assert callers[outer][3] == pytest.approx(0.03)
+    assert stats[outer][3] == pytest.approx(0.04)
+    assert stats[outer][2] == pytest.approx(0.01)
+
+
+@pytest.mark.asyncio
+async def test_profile_of_event_loop_parsers_and_tasks(tmp_path):
+    """Test that a profile covers the loop thread, parser processes and tasks."""
+
+    async def sleeper():
+        await asyncio.sleep(0.2)
+
+    with Profiler(tmp_path, interval=0.001) as profiler:
+        await asyncio.create_task(sleeper())
+        _busy(0.1)
+        async with ParserPool(workers=1) as pool:
+            await pool.parse_chunk([("28000001", PAGE)] * 50)
+
+    directory = profiler.directory
+    collapsed = (directory / "stacks.collapsed").read_text().splitlines()
+    assert any(line.startswith("event-loop;") and "_busy" in line for line in collapsed)
+    assert any(line.startswith("parser-") for line in collapsed)
+
+    tasks = (directory / "tasks.json").read_text()
+    assert "sleeper" in tasks
+    report = (directory / "report.txt").read_text()
+    assert "sleeper" in report
+    assert "_busy" in report
+    assert not (directory / "workers").exists()